@@ -40,6 +40,21 @@ options:
             - Get stack events for the stack
         required: false
         default: false
+    max_events:
+        description:
+            - Maximum number of stack events to return, most recent first.
+              Pages past this count are not requested.
+        required: false
+        default: null
+        version_added: "2.3"
+    since:
+        description:
+            - Only return stack events at or after this UTC timestamp, in
+              C(YYYY-MM-DDTHH:MM:SS) or C(YYYY-MM-DD) format. Pages past this
+              point are not requested.
+        required: false
+        default: null
+        version_added: "2.3"
     stack_template:
         description:
             - Get stack template body for the stack
@@ -81,6 +96,13 @@ EXAMPLES = '''
     stack_resources: true
     stack_policy: true
 
+# Get the last 50 stack events since the start of the day
+- cloudformation_facts:
+    stack_name: my-cloudformation-stack
+    stack_events: true
+    max_events: 50
+    since: "2016-10-01"
+
 # Example dictionary outputs for stack_outputs, stack_parameters and stack_resources:
 "stack_outputs": {
     "ApplicationDatabaseName": "dazvlpr01xj55a.ap-southeast-2.rds.amazonaws.com",
@@ -145,7 +167,10 @@ except ImportError:
 from ansible.module_utils.ec2 import get_aws_connection_info, ec2_argument_spec
 from ansible.module_utils.basic import AnsibleModule
 from functools import partial
+from datetime import datetime
+import itertools
 import json
+import threading
 import traceback
 
 class CloudFormationServiceManager:
@@ -167,7 +192,7 @@ class CloudFormationServiceManager:
     def describe_stack(self, stack_name):
         try:
             func = partial(self.client.describe_stacks,StackName=stack_name)
-            response = self.paginated_response(func, 'Stacks')
+            response = self.paginated_response(func, 'Stacks', limit=1)
             if response:
                 return response[0]
             self.module.fail_json(msg="Error describing stack - an empty response was returned")
@@ -175,50 +200,96 @@ class CloudFormationServiceManager:
             self.module.fail_json(msg="Error describing stack - " + str(e), exception=traceback.format_exc(e))
 
     def list_stack_resources(self, stack_name):
-        try:
-            func = partial(self.client.list_stack_resources,StackName=stack_name)
-            return self.paginated_response(func, 'StackResourceSummaries')
-        except Exception as e:
-            self.module.fail_json(msg="Error listing stack resources - " + str(e), exception=traceback.format_exc(e))
+        func = partial(self.client.list_stack_resources,StackName=stack_name)
+        return self.paginated_response(func, 'StackResourceSummaries')
 
-    def describe_stack_events(self, stack_name):
-        try:
-            func = partial(self.client.describe_stack_events,StackName=stack_name)
-            return self.paginated_response(func, 'StackEvents')
-        except Exception as e:
-            self.module.fail_json(msg="Error describing stack events - " + str(e), exception=traceback.format_exc(e))
+    def describe_stack_events(self, stack_name, max_events=None, since=None):
+        '''
+        Returns stack events, most recent first. Paging stops once
+        'max_events' events have been read or an event older than 'since' is seen.
+        '''
+        func = partial(self.client.describe_stack_events,StackName=stack_name)
+        events = self.paginated_items(func, 'StackEvents')
+        if since:
+            events = itertools.takewhile(lambda event: utc_timestamp(event['Timestamp']) >= since, events)
+        return self.paginated_response(func, 'StackEvents', limit=max_events, items=events)
 
     def get_stack_policy(self, stack_name):
-        try:
-            response = self.client.get_stack_policy(StackName=stack_name)
-            stack_policy = response.get('StackPolicyBody')
-            if stack_policy:
-                return json.loads(stack_policy)
-            return dict()
-        except Exception as e:
-            self.module.fail_json(msg="Error getting stack policy - " + str(e), exception=traceback.format_exc(e))
+        response = self.client.get_stack_policy(StackName=stack_name)
+        stack_policy = response.get('StackPolicyBody')
+        if stack_policy:
+            return json.loads(stack_policy)
+        return dict()
 
     def get_template(self, stack_name):
-        try:
-            response = self.client.get_template(StackName=stack_name)
-            return response.get('TemplateBody')
-        except Exception as e:
-            self.module.fail_json(msg="Error getting stack template - " + str(e), exception=traceback.format_exc(e))
+        response = self.client.get_template(StackName=stack_name)
+        return response.get('TemplateBody')
 
-    def paginated_response(self, func, result_key, next_token=None):
+    def fetch(self, jobs):
+        '''
+        Runs each (key, func, args, error) job in its own thread and returns a
+        dict of results by key. The first failure is reported with its 'error' prefix.
+        '''
+        results = dict()
+        failures = []
+
+        def run(key, func, args, error):
+            try:
+                results[key] = func(*args)
+            except Exception as e:
+                failures.append((error + " - " + str(e), traceback.format_exc()))
+
+        threads = [threading.Thread(target=run, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if failures:
+            msg, exception = failures[0]
+            self.module.fail_json(msg=msg, exception=exception)
+        return results
+
+    def paginated_items(self, func, result_key):
+        '''
+        Yields the items under 'result_key' from each page of a paginated operation,
+        only requesting the next page once the current one has been consumed.
+        '''
+        args = dict()
+        while True:
+            response = func(**args)
+            for item in response.get(result_key) or []:
+                yield item
+            next_token = response.get('NextToken')
+            if not next_token:
+                return
+            args['NextToken'] = next_token
+
+    def paginated_response(self, func, result_key, limit=None, items=None):
         '''
         Returns expanded response for paginated operations.
         The 'result_key' is used to define the concatenated results that are combined from each paginated response.
+        At most 'limit' results are returned, no further pages are requested once it is reached.
         '''
-        args=dict()
-        if next_token:
-            args['NextToken'] = next_token
-        response = func(**args)
-        result = response.get(result_key)
-        next_token = response.get('NextToken')
-        if not next_token:
-           return result
-        return result + self.paginated_response(func, result_key, next_token)
+        if items is None:
+            items = self.paginated_items(func, result_key)
+        if limit:
+            items = itertools.islice(items, limit)
+        return list(items)
+
+def utc_timestamp(timestamp):
+    ''' Converts an aware datetime to a naive UTC datetime '''
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+    return timestamp
+
+def parse_since(since):
+    ''' Parses the 'since' option to a naive UTC datetime '''
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(since, fmt)
+        except ValueError:
+            pass
+    raise ValueError("since must be in YYYY-MM-DDTHH:MM:SS or YYYY-MM-DD format")
 
 def to_dict(items, key, value):
     ''' Transforms a list of items to a Key/Value dictionary '''
@@ -236,6 +307,8 @@ def main():
         stack_events=dict(required=False, default=False, type='bool'),
         stack_resources=dict(required=False, default=False, type='bool'),
         stack_template=dict(required=False, default=False, type='bool'),
+        max_events=dict(required=False, default=None, type='int'),
+        since=dict(required=False, default=None, type='str'),
     ))
 
     module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=False)
@@ -243,6 +316,13 @@ def main():
     if not HAS_BOTO3:
       module.fail_json(msg='boto3 is required.')
 
+    since = module.params.get('since')
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError as e:
+            module.fail_json(msg=str(e))
+
     # Describe the stack
     service_mgr = CloudFormationServiceManager(module)
     stack_name = module.params.get('stack_name')
@@ -262,17 +342,21 @@ def main():
     # camel2snake doesn't handle NotificationARNs properly, so let's fix that
     facts['stack_description']['notification_arns'] = facts['stack_description'].pop('notification_ar_ns', [])
 
-    # Create optional stack outputs
+    # Create optional stack outputs, fetched concurrently
     all_facts = module.params.get('all_facts')
+    jobs = []
     if all_facts or module.params.get('stack_resources'):
-        facts['stack_resource_list'] = service_mgr.list_stack_resources(stack_name)
-        facts['stack_resources'] = to_dict(facts.get('stack_resource_list'), 'LogicalResourceId', 'PhysicalResourceId')
+        jobs.append(('stack_resource_list', service_mgr.list_stack_resources, (stack_name,), "Error listing stack resources"))
     if all_facts or module.params.get('stack_template'):
-        facts['stack_template'] = service_mgr.get_template(stack_name)
+        jobs.append(('stack_template', service_mgr.get_template, (stack_name,), "Error getting stack template"))
     if all_facts or module.params.get('stack_policy'):
-        facts['stack_policy'] = service_mgr.get_stack_policy(stack_name)
+        jobs.append(('stack_policy', service_mgr.get_stack_policy, (stack_name,), "Error getting stack policy"))
     if all_facts or module.params.get('stack_events'):
-        facts['stack_events'] = service_mgr.describe_stack_events(stack_name)
+        jobs.append(('stack_events', service_mgr.describe_stack_events, (stack_name, module.params.get('max_events'), since),
+                     "Error describing stack events"))
+    facts.update(service_mgr.fetch(jobs))
+    if 'stack_resource_list' in facts:
+        facts['stack_resources'] = to_dict(facts.get('stack_resource_list'), 'LogicalResourceId', 'PhysicalResourceId')
 
     result['changed'] = False
     module.exit_json(**result)
@@ -202,13 +202,71 @@ except ImportError:
     HAS_BOTO3 = False
 
 def match_asg_tags(tags_to_match, asg):
-    for key, value in tags_to_match.iteritems():
-        for tag in asg['Tags']:
-            if key == tag['Key'] and value == tag['Value']:
-                break
-        else: return False
+    asg_tags = dict((tag['Key'], tag['Value']) for tag in asg['Tags'])
+    for key, value in tags_to_match.items():
+        if asg_tags.get(key) != value:
+            return False
     return True
 
+
+def find_asg_names_by_tags(conn, tags):
+    """
+    Args:
+        conn (boto3.AutoScaling.Client): Valid Boto3 ASG client.
+        tags (dict): Dictionary of tags and values to search for.
+
+    Basic Usage:
+        >>> tags = { 'env': 'production' }
+        >>> conn = boto3.client('autoscaling', region_name='us-west-2')
+        >>> names = find_asg_names_by_tags(conn, tags)
+
+    Returns:
+        Set of the names of the ASGs carrying every tag
+    """
+    paginator = conn.get_paginator('describe_tags')
+    names = None
+    for key, value in tags.items():
+        filters = [
+            {'Name': 'key', 'Values': [key]},
+            {'Name': 'value', 'Values': [value]},
+        ]
+        tagged = set()
+        for page in paginator.paginate(Filters=filters):
+            for tag in page['Tags']:
+                if tag['ResourceType'] == 'auto-scaling-group':
+                    tagged.add(tag['ResourceId'])
+        if names is None:
+            names = tagged
+        else:
+            names &= tagged
+        if not names:
+            break
+    return names
+
+
+def paginate_asgs(conn, names=None):
+    """
+    Args:
+        conn (boto3.AutoScaling.Client): Valid Boto3 ASG client.
+        names (list): Optional names of the ASGs to describe, all ASGs are
+            described when omitted.
+
+    Returns:
+        Generator of ASG descriptions, one page at a time
+    """
+    paginator = conn.get_paginator('describe_auto_scaling_groups')
+    if names is None:
+        pages = [paginator.paginate()]
+    else:
+        # AutoScalingGroupNames takes at most 50 names per call
+        pages = [paginator.paginate(AutoScalingGroupNames=names[i:i + 50])
+                 for i in range(0, len(names), 50)]
+    for page_iterator in pages:
+        for page in page_iterator:
+            for asg in page['AutoScalingGroups']:
+                yield asg
+
+
 def find_asgs(conn, module, name=None, tags=None):
     """
     Args:
@@ -293,26 +351,27 @@ def find_asgs(conn, module, name=None, tags=None):
         ]
     """
 
-    try:
-        asgs = conn.describe_auto_scaling_groups()
-    except ClientError as e:
-        module.fail_json(msg=e.message, **camel_dict_to_snake_dict(e.response))
+    if name:
+        name_prog = re.compile(r'^' + name)
 
     matched_asgs = []
-    name_prog = re.compile(r'^' + name)
-    for asg in asgs['AutoScalingGroups']:
-        if name:
-            matched_name = name_prog.search(asg['AutoScalingGroupName'])
-        else:
-            matched_name = True
-
+    try:
+        names = None
         if tags:
-            matched_tags = match_asg_tags(tags, asg)
-        else:
-            matched_tags = True
+            # Let describe_tags select the candidate groups so only those
+            # are described
+            names = sorted(find_asg_names_by_tags(conn, tags))
+            if name:
+                names = [n for n in names if name_prog.search(n)]
 
-        if matched_name and matched_tags:
+        for asg in paginate_asgs(conn, names):
+            if name and not name_prog.search(asg['AutoScalingGroupName']):
+                continue
+            if tags and not match_asg_tags(tags, asg):
+                continue
             matched_asgs.append(camel_dict_to_snake_dict(asg))
+    except ClientError as e:
+        module.fail_json(msg=e.message, **camel_dict_to_snake_dict(e.response))
 
     return matched_asgs
 
@@ -388,8 +388,57 @@ def get_nat_gateways(client, subnet_id=None, nat_gateway_id=None,
     return gateways_retrieved, err_msg, existing_gateways
 
 
+class Waiter(object):
+    """Poll a condition with jittered exponential backoff.
+    Kwargs:
+        delay (int): Upper bound, in seconds, of the first sleep between polls.
+            default=1
+        max_delay (int): Upper bound, in seconds, of any sleep between polls.
+            default=30
+        max_polls (int): Total number of polls allowed across all waits.
+            default=0 (no limit)
+
+    Basic Usage:
+        >>> waiter = Waiter(max_polls=50)
+        >>> waiter.wait(lambda: is_ready(), 300)
+        True
+        >>> waiter.polls
+        4
+    """
+
+    def __init__(self, delay=1, max_delay=30, max_polls=0):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_polls = max_polls
+        self.polls = 0
+
+    def wait(self, poll, timeout):
+        """Call poll until it returns True.
+        Args:
+            poll (function): Called without arguments, returns a bool.
+            timeout (int): Number of seconds to wait, until this timeout is reached.
+
+        Returns:
+            bool
+        """
+        deadline = time.time() + timeout
+        delay = self.delay
+        while not self.max_polls or self.polls < self.max_polls:
+            self.polls += 1
+            if poll():
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # Sleep between half and all of the current delay so that
+            # concurrent waiters do not poll in lock step.
+            time.sleep(min(remaining, random.uniform(delay / 2.0, delay)))
+            delay = min(delay * 2, self.max_delay)
+        return False
+
+
 def wait_for_status(client, wait_timeout, nat_gateway_id, status,
-                    check_mode=False):
+                    check_mode=False, waiter=None):
     """Wait for the NAT Gateway to reach a status
     Args:
         client (botocore.client.EC2): Boto3 client
@@ -398,6 +447,13 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
         status (str): The status to wait for.
             examples. status=available, status=deleted
 
+    Kwargs:
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        waiter (Waiter): Waiter used to poll the NAT Gateway, which keeps
+            count of the polls made.
+            default=Waiter()
+
     Basic Usage:
         >>> client = boto3.client('ec2')
         >>> subnet_id = 'subnet-12345678'
@@ -427,50 +483,57 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
-    status_achieved = False
-    nat_gateway = dict()
+    if waiter is None:
+        waiter = Waiter()
     states = ['pending', 'failed', 'available', 'deleting', 'deleted']
-    err_msg = ""
+    result = {
+        'status_achieved': False,
+        'err_msg': '',
+        'nat_gateway': dict(),
+        'failed': False,
+    }
 
-    while wait_timeout > time.time():
+    def poll():
         try:
-            gws_retrieved, err_msg, nat_gateways = (
+            gws_retrieved, result['err_msg'], nat_gateways = (
                 get_nat_gateways(
                     client, nat_gateway_id=nat_gateway_id,
                     states=states, check_mode=check_mode
                 )
             )
-            if gws_retrieved and nat_gateways:
-                nat_gateway = nat_gateways[0]
-                if check_mode:
-                    nat_gateway['state'] = status
+        except botocore.exceptions.ClientError as e:
+            result['err_msg'] = str(e)
+            return False
 
-                if nat_gateway.get('state') == status:
-                    status_achieved = True
-                    break
+        if gws_retrieved and nat_gateways:
+            nat_gateway = nat_gateways[0]
+            result['nat_gateway'] = nat_gateway
+            if check_mode:
+                nat_gateway['state'] = status
 
-                elif nat_gateway.get('state') == 'failed':
-                    err_msg = nat_gateway.get('failure_message')
-                    break
+            if nat_gateway.get('state') == status:
+                result['status_achieved'] = True
+                return True
 
-                elif nat_gateway.get('state') == 'pending':
-                    if 'failure_message' in nat_gateway:
-                        err_msg = nat_gateway.get('failure_message')
-                        status_achieved = False
-                        break
+            elif nat_gateway.get('state') == 'failed':
+                result['err_msg'] = nat_gateway.get('failure_message')
+                result['failed'] = True
+                return True
 
-            else:
-                time.sleep(polling_increment_secs)
+            elif nat_gateway.get('state') == 'pending':
+                if 'failure_message' in nat_gateway:
+                    result['err_msg'] = nat_gateway.get('failure_message')
+                    result['failed'] = True
+                    return True
 
-        except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+        return False
+
+    waiter.wait(poll, wait_timeout)
 
-    if not status_achieved:
-        err_msg = "Wait time out reached, while waiting for results"
+    if not result['status_achieved'] and not result['failed']:
+        result['err_msg'] = "Wait time out reached, while waiting for results"
 
-    return status_achieved, err_msg, nat_gateway
+    return result['status_achieved'], result['err_msg'], result['nat_gateway']
 
 
 def gateway_in_subnet_exists(client, subnet_id, allocation_id=None,
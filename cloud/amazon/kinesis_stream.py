@@ -59,6 +59,15 @@ options:
       - How many seconds to wait for an operation to complete before timing out.
     required: false
     default: 300
+  wait_max_polls:
+    description:
+      - Maximum number of times the stream status is polled while waiting,
+        across all waits of the task. Polls back off exponentially, with
+        jitter, up to 30 seconds apart.
+      - 0 means the number of polls is only bounded by I(wait_timeout).
+    required: false
+    default: 0
+    version_added: "2.3"
   tags:
     description:
       - "A dictionary of resource tags of the form: { tag1: value1, tag2: value2 }."
@@ -136,6 +145,11 @@ retention_period_hours:
   returned: when state == present.
   type: int
   sample: 24
+polls:
+  description: Number of times the stream status was polled while waiting.
+  returned: always
+  type: int
+  sample: 4
 tags:
   description: Dictionary containing all the tags associated with the Kinesis stream.
   returned: when state == present.
@@ -155,6 +169,7 @@ except ImportError:
 
 import re
 import datetime
+import random
 import time
 from functools import reduce
 
@@ -344,8 +359,57 @@ def find_stream(client, stream_name, check_mode=False):
     return success, err_msg, results
 
 
+class Waiter(object):
+    """Poll a condition with jittered exponential backoff.
+    Kwargs:
+        delay (int): Upper bound, in seconds, of the first sleep between polls.
+            default=1
+        max_delay (int): Upper bound, in seconds, of any sleep between polls.
+            default=30
+        max_polls (int): Total number of polls allowed across all waits.
+            default=0 (no limit)
+
+    Basic Usage:
+        >>> waiter = Waiter(max_polls=50)
+        >>> waiter.wait(lambda: is_ready(), 300)
+        True
+        >>> waiter.polls
+        4
+    """
+
+    def __init__(self, delay=1, max_delay=30, max_polls=0):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_polls = max_polls
+        self.polls = 0
+
+    def wait(self, poll, timeout):
+        """Call poll until it returns True.
+        Args:
+            poll (function): Called without arguments, returns a bool.
+            timeout (int): Number of seconds to wait, until this timeout is reached.
+
+        Returns:
+            bool
+        """
+        deadline = time.time() + timeout
+        delay = self.delay
+        while not self.max_polls or self.polls < self.max_polls:
+            self.polls += 1
+            if poll():
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # Sleep between half and all of the current delay so that
+            # concurrent waiters do not poll in lock step.
+            time.sleep(min(remaining, random.uniform(delay / 2.0, delay)))
+            delay = min(delay * 2, self.max_delay)
+        return False
+
+
 def wait_for_status(client, stream_name, status, wait_timeout=300,
-                    check_mode=False):
+                    check_mode=False, waiter=None):
     """Wait for the the status to change for a Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client
@@ -357,6 +421,9 @@ def wait_for_status(client, stream_name, status, wait_timeout=300,
         wait_timeout (int): Number of seconds to wait, until this timeout is reached.
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        waiter (Waiter): Waiter used to poll the stream, which keeps count
+            of the polls made.
+            default=Waiter()
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -366,36 +433,24 @@ def wait_for_status(client, stream_name, status, wait_timeout=300,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
-    status_achieved = False
+    if waiter is None:
+        waiter = Waiter()
     stream = dict()
     err_msg = ""
 
-    while wait_timeout > time.time():
-        try:
-            find_success, find_msg, stream = (
-                find_stream(client, stream_name, check_mode=check_mode)
-            )
-            if check_mode:
-                status_achieved = True
-                break
-
-            elif status != 'DELETING':
-                if find_success and stream:
-                    if stream.get('StreamStatus') == status:
-                        status_achieved = True
-                        break
-
-            elif status == 'DELETING' and not check_mode:
-                if not find_success:
-                    status_achieved = True
-                    break
+    def poll():
+        find_success, find_msg, found = (
+            find_stream(client, stream_name, check_mode=check_mode)
+        )
+        stream.clear()
+        stream.update(found)
+        if check_mode:
+            return True
+        elif status == 'DELETING':
+            return not find_success
+        return find_success and stream.get('StreamStatus') == status
 
-            else:
-                time.sleep(polling_increment_secs)
-        except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+    status_achieved = waiter.wait(poll, wait_timeout)
 
     if not status_achieved:
         err_msg = "Wait time out reached, while waiting for results"
@@ -691,7 +746,8 @@ def retention_action(client, stream_name, retention_period=24,
 
 
 def update(client, current_stream, stream_name, retention_period=None,
-           tags=None, wait=False, wait_timeout=300, check_mode=False):
+           tags=None, wait=False, wait_timeout=300, check_mode=False,
+           waiter=None):
     """Update an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -707,6 +763,8 @@ def update(client, current_stream, stream_name, retention_period=None,
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        waiter (Waiter): Waiter used while waiting for the stream.
+            default=None
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -733,7 +791,7 @@ def update(client, current_stream, stream_name, retention_period=None,
             wait_success, wait_msg, current_stream = (
                 wait_for_status(
                     client, stream_name, 'ACTIVE', wait_timeout,
-                    check_mode=check_mode
+                    check_mode=check_mode, waiter=waiter
                 )
             )
             if not wait_success:
@@ -776,7 +834,7 @@ def update(client, current_stream, stream_name, retention_period=None,
                 wait_success, wait_msg, current_stream = (
                     wait_for_status(
                         client, stream_name, 'ACTIVE', wait_timeout,
-                        check_mode=check_mode
+                        check_mode=check_mode, waiter=waiter
                     )
                 )
                 if not wait_success:
@@ -807,7 +865,7 @@ def update(client, current_stream, stream_name, retention_period=None,
         success, err_msg, _ = (
             wait_for_status(
                 client, stream_name, 'ACTIVE', wait_timeout,
-                check_mode=check_mode
+                check_mode=check_mode, waiter=waiter
             )
         )
     if success and changed:
@@ -819,7 +877,8 @@ def update(client, current_stream, stream_name, retention_period=None,
 
 
 def create_stream(client, stream_name, number_of_shards=1, retention_period=None,
-                  tags=None, wait=False, wait_timeout=300, check_mode=False):
+                  tags=None, wait=False, wait_timeout=300, check_mode=False,
+                  waiter=None):
     """Create an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -838,6 +897,8 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        waiter (Waiter): Waiter used while waiting for the stream.
+            default=None
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -866,13 +927,13 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
         wait_success, wait_msg, current_stream = (
             wait_for_status(
                 client, stream_name, 'ACTIVE', wait_timeout,
-                check_mode=check_mode
+                check_mode=check_mode, waiter=waiter
             )
         )
     if stream_found and current_stream['StreamStatus'] != 'DELETING':
         success, changed, err_msg = update(
             client, current_stream, stream_name, retention_period, tags,
-            wait, wait_timeout, check_mode=check_mode
+            wait, wait_timeout, check_mode=check_mode, waiter=waiter
         )
     else:
         create_success, create_msg = (
@@ -887,7 +948,7 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
                 wait_success, wait_msg, results = (
                     wait_for_status(
                         client, stream_name, 'ACTIVE', wait_timeout,
-                        check_mode=check_mode
+                        check_mode=check_mode, waiter=waiter
                     )
                 )
                 err_msg = (
@@ -956,7 +1017,7 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
 
 
 def delete_stream(client, stream_name, wait=False, wait_timeout=300,
-                  check_mode=False):
+                  check_mode=False, waiter=None):
     """Delete an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -969,6 +1030,8 @@ def delete_stream(client, stream_name, wait=False, wait_timeout=300,
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        waiter (Waiter): Waiter used while waiting for the stream.
+            default=None
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -997,7 +1060,7 @@ def delete_stream(client, stream_name, wait=False, wait_timeout=300,
                 success, err_msg, results = (
                     wait_for_status(
                         client, stream_name, 'DELETING', wait_timeout,
-                        check_mode=check_mode
+                        check_mode=check_mode, waiter=waiter
                     )
                 )
                 err_msg = 'Stream {0} deleted successfully'.format(stream_name)
@@ -1026,6 +1089,7 @@ def main():
             tags=dict(default=None, required=False, type='dict', aliases=['resource_tags']),
             wait=dict(default=True, required=False, type='bool'),
             wait_timeout=dict(default=300, required=False, type='int'),
+            wait_max_polls=dict(default=0, required=False, type='int'),
             state=dict(default='present', choices=['present', 'absent']),
         )
     )
@@ -1041,6 +1105,7 @@ def main():
     tags = module.params.get('tags')
     wait = module.params.get('wait')
     wait_timeout = module.params.get('wait_timeout')
+    waiter = Waiter(max_polls=module.params.get('wait_max_polls'))
 
     if state == 'present' and not shards:
         module.fail_json(msg='Shards is required when state == present.')
@@ -1073,21 +1138,25 @@ def main():
         success, changed, err_msg, results = (
             create_stream(
                 client, stream_name, shards, retention_period, tags,
-                wait, wait_timeout, check_mode
+                wait, wait_timeout, check_mode, waiter
             )
         )
     elif state == 'absent':
         success, changed, err_msg, results = (
-            delete_stream(client, stream_name, wait, wait_timeout, check_mode)
+            delete_stream(
+                client, stream_name, wait, wait_timeout, check_mode, waiter
+            )
         )
 
     if success:
         module.exit_json(
-            success=success, changed=changed, msg=err_msg, **results
+            success=success, changed=changed, msg=err_msg,
+            polls=waiter.polls, **results
         )
     else:
         module.fail_json(
-            success=success, changed=changed, msg=err_msg, result=results
+            success=success, changed=changed, msg=err_msg, result=results,
+            polls=waiter.polls
         )
 
 # import module snippets
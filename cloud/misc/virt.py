@@ -55,6 +55,24 @@ options:
       - XML document used with the define command
     required: false
     default: null
+  entries:
+    description:
+      - A list of guests to reconcile in one go, each a dict with a C(name) and
+        optionally C(state), C(xml) and C(autostart). A missing guest is
+        defined from its C(xml).
+      - All the guests and their state are read once over a single
+        connection, then the entries are applied concurrently, each getting
+        its own result.
+      - Mutually exclusive with C(name) and C(command).
+    required: false
+    default: null
+    version_added: "2.3"
+  workers:
+    description:
+      - Number of entries applied at the same time with C(entries).
+    required: false
+    default: 4
+    version_added: "2.3"
 requirements:
     - "python >= 2.6"
     - "libvirt-python"
@@ -82,6 +100,13 @@ tasks:
           uri=lxc:///
   - name: start vm
     virt: name=foo state=running uri=lxc:///
+
+# define, start and autostart many guests at once
+- virt:
+    entries:
+      - { name: web1, state: running, autostart: yes, xml: "{{ lookup('template', 'web1.xml.j2') }}" }
+      - { name: web2, state: running, autostart: yes, xml: "{{ lookup('template', 'web2.xml.j2') }}" }
+      - { name: old, state: destroyed }
 '''
 
 RETURN = '''
@@ -94,6 +119,12 @@ list_vms:
         "build.example.org", 
         "dev.example.org"
     ]
+# for entries
+entries:
+    description: The result of each entry, in order
+    type: list
+    returned: success, when entries is set
+    sample: [{"name": "web1", "changed": true, "created": "web1"}, {"name": "old", "changed": false}]
 # for status command
 status:
     description: The status of the VM, among running, crashed, paused and shutdown
@@ -106,6 +137,12 @@ VIRT_SUCCESS = 0
 VIRT_UNAVAILABLE=2
 
 import sys
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 try:
     import libvirt
@@ -131,6 +168,9 @@ VIRT_STATE_NAME_MAP = {
    6 : "crashed"
 }
 
+ENTRY_KEYS = ['name', 'state', 'xml', 'autostart']
+ENTRY_STATES = ['running', 'shutdown', 'destroyed', 'paused']
+
 class VMNotFound(Exception):
     pass
 
@@ -156,36 +196,119 @@ class LibvirtConnection(object):
 
         self.conn = conn
 
+        # Domains and their stats are cached for the lifetime of the module run
+        self.domains = {}
+        self.all_domains = None
+        self.stats = None
+        self.autostarted = None
+
+    def invalidate(self, vmid=None):
+        """
+        Forget the cached state, and the cached domain when it was (un)defined
+        """
+        self.stats = None
+        self.autostarted = None
+        if vmid is not None:
+            self.domains.pop(vmid, None)
+            self.all_domains = None
+
+    def list_domains(self):
+        if self.all_domains is not None:
+            return self.all_domains
+
+        conn = self.conn
+        try:
+            vms = conn.listAllDomains(0)
+        except AttributeError:
+            # libvirt < 0.9.13
+            vms = []
+
+            # this block of code borrowed from virt-manager:
+            # get working domain's name
+            ids = conn.listDomainsID()
+            for id in ids:
+                vm = conn.lookupByID(id)
+                vms.append(vm)
+            # get defined domain
+            names = conn.listDefinedDomains()
+            for name in names:
+                vm = conn.lookupByName(name)
+                vms.append(vm)
+
+        self.all_domains = vms
+        for vm in vms:
+            self.domains[vm.name()] = vm
+        return vms
+
     def find_vm(self, vmid):
         """
         Extra bonus feature: vmid = -1 returns a list of everything
         """
-        conn = self.conn
+        if vmid == -1:
+            return self.list_domains()
 
-        vms = []
+        if vmid in self.domains:
+            return self.domains[vmid]
 
-        # this block of code borrowed from virt-manager:
-        # get working domain's name
-        ids = conn.listDomainsID()
-        for id in ids:
-            vm = conn.lookupByID(id)
-            vms.append(vm)
-        # get defined domain
-        names = conn.listDefinedDomains()
-        for name in names:
-            vm = conn.lookupByName(name)
-            vms.append(vm)
+        try:
+            vm = self.conn.lookupByName(vmid)
+        except libvirt.libvirtError, e:
+            if e.get_error_code() != libvirt.VIR_ERR_NO_DOMAIN:
+                raise
+            raise VMNotFound("virtual machine %s not found" % vmid)
 
-        if vmid == -1:
-            return vms
+        self.domains[vmid] = vm
+        return vm
+
+    def get_all_info(self):
+        """
+        The info() tuples of all domains by name, from one bulk stats call
+        """
+        if self.stats is not None:
+            return self.stats
+
+        vms = self.list_domains()
+        self.stats = {}
+        try:
+            records = self.conn.getAllDomainStats(
+                libvirt.VIR_DOMAIN_STATS_STATE | libvirt.VIR_DOMAIN_STATS_CPU_TOTAL |
+                libvirt.VIR_DOMAIN_STATS_BALLOON | libvirt.VIR_DOMAIN_STATS_VCPU, 0)
+        except AttributeError:
+            # libvirt < 1.2.8
+            records = []
+
+        for vm, stats in records:
+            try:
+                self.stats[vm.name()] = [
+                    stats['state.state'],
+                    stats['balloon.maximum'],
+                    stats['balloon.current'],
+                    stats['vcpu.current'],
+                    stats.get('cpu.time', 0),
+                ]
+            except KeyError:
+                # inactive domains may not report all the stats
+                pass
 
         for vm in vms:
-            if vm.name() == vmid:
-                return vm
+            if vm.name() not in self.stats:
+                self.stats[vm.name()] = vm.info()
+        return self.stats
 
-        raise VMNotFound("virtual machine %s not found" % vmid)
+    def get_all_autostart(self):
+        """
+        The names of the domains set to autostart, from one listing
+        """
+        if self.autostarted is None:
+            try:
+                vms = self.conn.listAllDomains(libvirt.VIR_CONNECT_LIST_DOMAINS_AUTOSTART)
+                self.autostarted = set(vm.name() for vm in vms)
+            except AttributeError:
+                self.autostarted = set(vm.name() for vm in self.list_domains() if vm.autostart())
+        return self.autostarted
 
     def shutdown(self, vmid):
+        self.invalidate()
         return self.find_vm(vmid).shutdown()
 
     def pause(self, vmid):
@@ -195,19 +318,25 @@ class LibvirtConnection(object):
         return self.resume(self.conn,vmid)
 
     def suspend(self, vmid):
+        self.invalidate()
         return self.find_vm(vmid).suspend()
 
     def resume(self, vmid):
+        self.invalidate()
         return self.find_vm(vmid).resume()
 
     def create(self, vmid):
+        self.invalidate()
         return self.find_vm(vmid).create()
 
     def destroy(self, vmid):
+        self.invalidate()
         return self.find_vm(vmid).destroy()
 
     def undefine(self, vmid):
-        return self.find_vm(vmid).undefine()
+        vm = self.find_vm(vmid)
+        self.invalidate(vmid)
+        return vm.undefine()
 
     def get_status2(self, vm):
         state = vm.info()[0]
@@ -224,30 +353,33 @@ class LibvirtConnection(object):
         return self.conn.getType()
 
     def get_xml(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.XMLDesc(0)
 
     def get_maxVcpus(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.maxVcpus()
 
     def get_maxMemory(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.maxMemory()
 
     def getFreeMemory(self):
         return self.conn.getFreeMemory()
 
     def get_autostart(self, vmid):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
         return vm.autostart()
 
     def set_autostart(self, vmid, val):
-        vm = self.conn.lookupByName(vmid)
+        vm = self.find_vm(vmid)
+        self.invalidate()
         return vm.setAutostart(val)
 
     def define_from_xml(self, xml):
-        return self.conn.defineXML(xml)
+        vm = self.conn.defineXML(xml)
+        self.invalidate(vm.name())
+        return vm
 
 
 class Virt(object):
@@ -255,28 +387,37 @@ class Virt(object):
     def __init__(self, uri, module):
         self.module = module
         self.uri = uri
+        self.conn = None
 
     def __get_conn(self):
-        self.conn = LibvirtConnection(self.uri, self.module)
+        # One connection for the whole module run
+        if self.conn is None:
+            self.conn = LibvirtConnection(self.uri, self.module)
         return self.conn
 
+    def get_conn(self):
+        return self.__get_conn()
+
     def get_vm(self, vmid):
         self.__get_conn()
         return self.conn.find_vm(vmid)
 
     def state(self):
         vms = self.list_vms()
+        all_info = self.conn.get_all_info()
         state = []
         for vm in vms:
-            state_blurb = self.conn.get_status(vm)
+            state_blurb = VIRT_STATE_NAME_MAP.get(all_info[vm][0],"unknown")
             state.append("%s %s" % (vm,state_blurb))
         return state
 
     def info(self):
         vms = self.list_vms()
+        all_info = self.conn.get_all_info()
+        autostarted = self.conn.get_all_autostart()
         info = dict()
         for vm in vms:
-            data = self.conn.find_vm(vm).info()
+            data = all_info[vm]
             # libvirt returns maxMem, memory, and cpuTime as long()'s, which
             # xmlrpclib tries to convert to regular int's during serialization.
             # This throws exceptions, so convert them to strings here and
@@ -289,7 +430,7 @@ class Virt(object):
                 "nrVirtCpu" : data[3],
                 "cpuTime"   : str(data[4]),
             }
-            info[vm]["autostart"] = self.conn.get_autostart(vm)
+            info[vm]["autostart"] = vm in autostarted
 
         return info
 
@@ -310,13 +451,15 @@ class Virt(object):
         return info
 
     def list_vms(self, state=None):
-        self.conn = self.__get_conn()
+        self.__get_conn()
         vms = self.conn.find_vm(-1)
+        if state:
+            all_info = self.conn.get_all_info()
         results = []
         for x in vms:
             try:
                 if state:
-                    vmstate = self.conn.get_status2(x)
+                    vmstate = VIRT_STATE_NAME_MAP.get(all_info[x.name()][0],"unknown")
                     if vmstate == state:
                         results.append(x.name())
                 else:
@@ -329,11 +472,11 @@ class Virt(object):
         return self.__get_conn().get_type()
 
     def autostart(self, vmid):
-        self.conn = self.__get_conn()
+        self.__get_conn()
         return self.conn.set_autostart(vmid, True)
 
     def freemem(self):
-        self.conn = self.__get_conn()
+        self.__get_conn()
         return self.conn.getFreeMemory()
 
     def shutdown(self, vmid):
@@ -417,6 +560,104 @@ class Virt(object):
         self.__get_conn()
         return self.conn.define_from_xml(xml)
 
+def apply_entry(conn, snapshot, entry):
+    """
+    Bring one guest to the state of its entry, using the snapshot instead of
+    querying libvirt
+    """
+    vms, all_info, autostarted = snapshot
+    name = entry['name']
+    state = entry.get('state')
+    res = {'name': name, 'changed': False}
+
+    vm = vms.get(name)
+    if vm is None:
+        if not entry.get('xml'):
+            raise VMNotFound("virtual machine %s not found, but xml not specified" % name)
+        vm = conn.defineXML(entry['xml'])
+        vms[name] = vm
+        res['changed'] = True
+        res['created'] = name
+        status = "shutdown"
+    else:
+        status = VIRT_STATE_NAME_MAP.get(all_info[name][0],"unknown")
+
+    if state == 'running':
+        if status == 'paused':
+            res['changed'] = True
+            res['msg'] = vm.resume()
+        elif status != 'running':
+            res['changed'] = True
+            res['msg'] = vm.create()
+    elif state == 'shutdown':
+        if status != 'shutdown':
+            res['changed'] = True
+            res['msg'] = vm.shutdown()
+    elif state == 'destroyed':
+        if status != 'shutdown':
+            res['changed'] = True
+            res['msg'] = vm.destroy()
+    elif state == 'paused':
+        if status == 'running':
+            res['changed'] = True
+            res['msg'] = vm.suspend()
+
+    if entry.get('autostart') is not None and bool(entry['autostart']) != (name in autostarted):
+        res['changed'] = True
+        vm.setAutostart(bool(entry['autostart']))
+
+    return res
+
+def apply_entries(module, v):
+    entries = module.params['entries']
+    names = set()
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('name'):
+            module.fail_json(msg="entries[%d] must be a dict with a name" % i)
+        unknown = [key for key in entry if key not in ENTRY_KEYS]
+        if unknown:
+            module.fail_json(msg="entries[%d] has unsupported keys: %s" % (i, ', '.join(sorted(unknown))))
+        if entry.get('state') is not None and entry['state'] not in ENTRY_STATES:
+            module.fail_json(msg="entries[%d] has an invalid state: %s" % (i, entry['state']))
+        if entry['name'] in names:
+            module.fail_json(msg="virtual machine %s is listed more than once" % entry['name'])
+        names.add(entry['name'])
+
+    # One connection and one snapshot shared by all the entries
+    conn = v.get_conn()
+    vms = dict((vm.name(), vm) for vm in conn.find_vm(-1))
+    snapshot = (vms, conn.get_all_info(), conn.get_all_autostart())
+
+    results = [ None ] * len(entries)
+    pending = queue.Queue()
+    for i, entry in enumerate(entries):
+        pending.put((i, entry))
+
+    def worker():
+        while True:
+            try:
+                i, entry = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[i] = apply_entry(conn.conn, snapshot, entry)
+            except Exception, e:
+                results[i] = {'name': entry['name'], 'changed': False, 'failed': True, 'msg': str(e)}
+
+    threads = [ threading.Thread(target=worker) for i in range(max(1, min(module.params['workers'], len(entries)))) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    conn.invalidate()
+
+    changed = [r for r in results if r['changed']]
+    failed = [r for r in results if r.get('failed')]
+    if failed:
+        module.fail_json(msg="%d of %d virtual machines failed" % (len(failed), len(results)),
+                         changed=bool(changed), entries=results)
+    return {'changed': bool(changed), 'entries': results}
+
 def core(module):
 
     state      = module.params.get('state', None)
@@ -428,6 +669,9 @@ def core(module):
     v = Virt(uri, module)
     res = {}
 
+    if module.params.get('entries') is not None:
+        return VIRT_SUCCESS, apply_entries(module, v)
+
     if state and command=='list_vms':
         res = v.list_vms(state=state)
         if type(res) != dict:
@@ -500,7 +744,9 @@ def main():
         command = dict(choices=ALL_COMMANDS),
         uri = dict(default='qemu:///system'),
         xml = dict(),
-    ))
+        entries = dict(type='list'),
+        workers = dict(type='int', default=4),
+    ), mutually_exclusive = [['entries', 'name'], ['entries', 'command']])
 
     if not HAS_VIRT:
         module.fail_json(
@@ -28,7 +28,7 @@ description:
      - Manage I(libvirt) networks.
 options:
     name:
-        required: true
+        required: false
         aliases: ['network']
         description:
             - name of the network being managed. Note that network must be previously
@@ -66,6 +66,22 @@ options:
         required: false
         description:
             - XML document used with the define command.
+    entries:
+        required: false
+        version_added: "2.3"
+        description:
+            - A list of networks to reconcile in one go, each a dict with a C(name) and
+              optionally C(state), C(autostart) and C(xml), which behave like the module
+              options of the same name. A missing network is defined from its C(xml).
+            - All the networks and their state are read once over a single connection,
+              then the entries are applied concurrently, each getting its own result.
+            - Mutually exclusive with C(name) and C(command).
+    workers:
+        required: false
+        default: 4
+        version_added: "2.3"
+        description:
+            - Number of entries applied at the same time with C(entries).
 requirements:
     - "python >= 2.6"
     - "python-libvirt"
@@ -111,6 +127,13 @@ EXAMPLES = '''
 
 # Disable autostart for a given network
 - virt_net: autostart=no name=br_nat
+
+# Define, start and autostart many networks at once
+- virt_net:
+    entries:
+      - { name: br_nat, state: active, autostart: yes, xml: '{{ lookup("template", "network/bridge.xml.j2") }}' }
+      - { name: isolated, state: active, xml: '{{ lookup("template", "network/isolated.xml.j2") }}' }
+      - { name: default, state: absent }
 '''
 
 VIRT_FAILED = 1
@@ -118,6 +141,12 @@ VIRT_SUCCESS = 0
 VIRT_UNAVAILABLE=2
 
 import sys
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 try:
     import libvirt
@@ -156,6 +185,9 @@ ENTRY_STATE_PERSISTENT_MAP = {
     1 : "yes"
 }
 
+ENTRY_KEYS = ['name', 'state', 'autostart', 'xml']
+ENTRY_STATES = ['active', 'inactive', 'present', 'absent', 'undefined']
+
 class EntryNotFound(Exception):
     pass
 
@@ -450,6 +482,121 @@ class VirtNetwork(object):
         return facts
 
 
+def snapshot_entries(conn):
+    """
+    Read all networks with their active and autostart state at once
+    """
+    try:
+        networks = conn.listAllNetworks(0)
+        active = set(n.name() for n in conn.listAllNetworks(libvirt.VIR_CONNECT_LIST_NETWORKS_ACTIVE))
+        autostart = set(n.name() for n in conn.listAllNetworks(libvirt.VIR_CONNECT_LIST_NETWORKS_AUTOSTART))
+    except AttributeError:
+        # libvirt < 0.10.2
+        names = conn.listNetworks()
+        networks = [conn.networkLookupByName(name) for name in names + conn.listDefinedNetworks()]
+        active = set(names)
+        autostart = set(n.name() for n in networks if n.autostart())
+    return dict((n.name(), n) for n in networks), active, autostart
+
+
+def apply_entry(conn, snapshot, entry, check_mode):
+    """
+    Bring one network to the state of its entry, using the snapshot instead
+    of querying libvirt
+    """
+    networks, active, autostart = snapshot
+    name = entry['name']
+    state = entry.get('state')
+    res = {'name': name, 'changed': False}
+
+    network = networks.get(name)
+    if network is None:
+        if state in ['inactive', 'absent', 'undefined']:
+            return res
+        if not entry.get('xml'):
+            raise EntryNotFound("network '" + name + "' not present, but xml not specified")
+        res['changed'] = True
+        res['created'] = name
+        if check_mode:
+            return res
+        network = conn.networkDefineXML(entry['xml'])
+        networks[name] = network
+
+    if state == 'active' and name not in active:
+        res['changed'] = True
+        if not check_mode:
+            network.create()
+        active.add(name)
+    elif state in ['inactive', 'absent', 'undefined'] and name in active:
+        res['changed'] = True
+        if not check_mode:
+            network.destroy()
+        active.discard(name)
+
+    if state in ['absent', 'undefined']:
+        res['changed'] = True
+        if not check_mode:
+            network.undefine()
+        del networks[name]
+        return res
+
+    if entry.get('autostart') is not None and bool(entry['autostart']) != (name in autostart):
+        res['changed'] = True
+        if not check_mode:
+            network.setAutostart(bool(entry['autostart']))
+
+    return res
+
+
+def apply_entries(module, v):
+    entries = module.params['entries']
+    names = set()
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('name'):
+            module.fail_json(msg="entries[%d] must be a dict with a name" % i)
+        unknown = [key for key in entry if key not in ENTRY_KEYS]
+        if unknown:
+            module.fail_json(msg="entries[%d] has unsupported keys: %s" % (i, ', '.join(sorted(unknown))))
+        if entry.get('state') is not None and entry['state'] not in ENTRY_STATES:
+            module.fail_json(msg="entries[%d] has an invalid state: %s" % (i, entry['state']))
+        if entry['name'] in names:
+            module.fail_json(msg="network %s is listed more than once" % entry['name'])
+        names.add(entry['name'])
+
+    # One connection and one snapshot shared by all the entries
+    conn = v.conn.conn
+    snapshot = snapshot_entries(conn)
+
+    results = [ None ] * len(entries)
+    pending = queue.Queue()
+    for i, entry in enumerate(entries):
+        pending.put((i, entry))
+
+    def worker():
+        while True:
+            try:
+                i, entry = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[i] = apply_entry(conn, snapshot, entry, module.check_mode)
+            except Exception, e:
+                results[i] = {'name': entry['name'], 'changed': False, 'failed': True, 'msg': str(e)}
+
+    threads = [ threading.Thread(target=worker) for i in range(max(1, min(module.params['workers'], len(entries)))) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    changed = [r for r in results if r['changed']]
+    failed = [r for r in results if r.get('failed')]
+    if failed:
+        module.fail_json(msg="%d of %d networks failed" % (len(failed), len(results)),
+                         changed=bool(changed), entries=results)
+    return {'changed': bool(changed), 'entries': results}
+
+
 def core(module):
 
     state     = module.params.get('state', None)
@@ -462,6 +609,9 @@ def core(module):
     v = VirtNetwork(uri, module)
     res = {}
 
+    if module.params.get('entries') is not None:
+        return VIRT_SUCCESS, apply_entries(module, v)
+
     if state and command == 'list_nets':
         res = v.list_nets(state=state)
         if type(res) != dict:
@@ -562,8 +712,11 @@ def main():
             command = dict(choices=ALL_COMMANDS),
             uri = dict(default='qemu:///system'),
             xml = dict(),
-            autostart = dict(type='bool')
+            autostart = dict(type='bool'),
+            entries = dict(type='list'),
+            workers = dict(type='int', default=4),
         ),
+        mutually_exclusive = [['entries', 'name'], ['entries', 'command']],
         supports_check_mode = True
     )
 
@@ -71,6 +71,23 @@ options:
         choices: [ 'new', 'repair', 'resize', 'no_overwrite', 'overwrite', 'normal', 'zeroed' ]
         description:
             - Pass additional parameters to 'build' or 'delete' commands.
+    entries:
+        required: false
+        version_added: "2.3"
+        description:
+            - A list of storage pools to reconcile in one go, each a dict with a C(name) and
+              optionally C(state), C(autostart), C(xml) and C(mode), which behave like the
+              module options of the same name. A missing pool is defined from its C(xml),
+              and also built when the entry sets C(build).
+            - All the pools and their state are read once over a single connection,
+              then the entries are applied concurrently, each getting its own result.
+            - Mutually exclusive with C(name) and C(command).
+    workers:
+        required: false
+        default: 4
+        version_added: "2.3"
+        description:
+            - Number of entries applied at the same time with C(entries).
 requirements:
     - "python >= 2.6"
     - "python-libvirt"
@@ -122,6 +139,13 @@ EXAMPLES = '''
 
 # Disable autostart for a given pool
 - virt_pool: autostart=no name=vms
+
+# Define, build, start and autostart many pools at once
+- virt_pool:
+    entries:
+      - { name: vms, state: active, autostart: yes, build: yes, xml: '{{ lookup("template", "pool/dir.xml.j2") }}' }
+      - { name: isos, state: active, xml: '{{ lookup("template", "pool/isos.xml.j2") }}' }
+      - { name: scratch, state: deleted, mode: zeroed }
 '''
 
 VIRT_FAILED = 1
@@ -129,6 +153,12 @@ VIRT_SUCCESS = 0
 VIRT_UNAVAILABLE=2
 
 import sys
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 try:
     import libvirt
@@ -192,6 +222,9 @@ ALL_MODES.extend(ENTRY_BUILD_FLAGS_MAP.keys())
 ALL_MODES.extend(ENTRY_DELETE_FLAGS_MAP.keys())
 
 
+ENTRY_KEYS = ['name', 'state', 'autostart', 'xml', 'mode', 'build']
+ENTRY_STATES = ['active', 'inactive', 'present', 'absent', 'undefined', 'deleted']
+
 class EntryNotFound(Exception):
     pass
 
@@ -530,6 +563,128 @@ class VirtStoragePool(object):
         return facts
 
 
+def snapshot_entries(conn):
+    """
+    Read all storage pools with their active and autostart state at once
+    """
+    try:
+        pools = conn.listAllStoragePools(0)
+        active = set(p.name() for p in conn.listAllStoragePools(libvirt.VIR_CONNECT_LIST_STORAGE_POOLS_ACTIVE))
+        autostart = set(p.name() for p in conn.listAllStoragePools(libvirt.VIR_CONNECT_LIST_STORAGE_POOLS_AUTOSTART))
+    except AttributeError:
+        # libvirt < 0.10.2
+        names = conn.listStoragePools()
+        pools = [conn.storagePoolLookupByName(name) for name in names + conn.listDefinedStoragePools()]
+        active = set(names)
+        autostart = set(p.name() for p in pools if p.autostart())
+    return dict((p.name(), p) for p in pools), active, autostart
+
+
+def apply_entry(conn, snapshot, entry, check_mode):
+    """
+    Bring one storage pool to the state of its entry, using the snapshot
+    instead of querying libvirt
+    """
+    pools, active, autostart = snapshot
+    name = entry['name']
+    state = entry.get('state')
+    mode = entry.get('mode')
+    res = {'name': name, 'changed': False}
+
+    pool = pools.get(name)
+    if pool is None:
+        if state in ['inactive', 'absent', 'undefined', 'deleted']:
+            return res
+        if not entry.get('xml'):
+            raise EntryNotFound("storage pool '" + name + "' not present, but xml not specified")
+        res['changed'] = True
+        res['created'] = name
+        if check_mode:
+            return res
+        pool = conn.storagePoolDefineXML(entry['xml'], 0)
+        pools[name] = pool
+        if entry.get('build'):
+            pool.build(ENTRY_BUILD_FLAGS_MAP.get(mode,0))
+
+    if state == 'active' and name not in active:
+        res['changed'] = True
+        if not check_mode:
+            pool.create()
+        active.add(name)
+    elif state in ['inactive', 'absent', 'undefined', 'deleted'] and name in active:
+        res['changed'] = True
+        if not check_mode:
+            pool.destroy()
+        active.discard(name)
+
+    if state in ['absent', 'undefined', 'deleted']:
+        res['changed'] = True
+        if not check_mode:
+            if state == 'deleted':
+                pool.delete(ENTRY_DELETE_FLAGS_MAP.get(mode,0))
+            pool.undefine()
+        del pools[name]
+        return res
+
+    if entry.get('autostart') is not None and bool(entry['autostart']) != (name in autostart):
+        res['changed'] = True
+        if not check_mode:
+            pool.setAutostart(bool(entry['autostart']))
+
+    return res
+
+
+def apply_entries(module, v):
+    entries = module.params['entries']
+    names = set()
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('name'):
+            module.fail_json(msg="entries[%d] must be a dict with a name" % i)
+        unknown = [key for key in entry if key not in ENTRY_KEYS]
+        if unknown:
+            module.fail_json(msg="entries[%d] has unsupported keys: %s" % (i, ', '.join(sorted(unknown))))
+        if entry.get('state') is not None and entry['state'] not in ENTRY_STATES:
+            module.fail_json(msg="entries[%d] has an invalid state: %s" % (i, entry['state']))
+        if entry.get('mode') is not None and entry['mode'] not in ALL_MODES:
+            module.fail_json(msg="entries[%d] has an invalid mode: %s" % (i, entry['mode']))
+        if entry['name'] in names:
+            module.fail_json(msg="storage pool %s is listed more than once" % entry['name'])
+        names.add(entry['name'])
+
+    # One connection and one snapshot shared by all the entries
+    conn = v.conn.conn
+    snapshot = snapshot_entries(conn)
+
+    results = [ None ] * len(entries)
+    pending = queue.Queue()
+    for i, entry in enumerate(entries):
+        pending.put((i, entry))
+
+    def worker():
+        while True:
+            try:
+                i, entry = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[i] = apply_entry(conn, snapshot, entry, module.check_mode)
+            except Exception, e:
+                results[i] = {'name': entry['name'], 'changed': False, 'failed': True, 'msg': str(e)}
+
+    threads = [ threading.Thread(target=worker) for i in range(max(1, min(module.params['workers'], len(entries)))) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    changed = [r for r in results if r['changed']]
+    failed = [r for r in results if r.get('failed')]
+    if failed:
+        module.fail_json(msg="%d of %d storage pools failed" % (len(failed), len(results)),
+                         changed=bool(changed), entries=results)
+    return {'changed': bool(changed), 'entries': results}
+
+
 def core(module):
 
     state     = module.params.get('state', None)
@@ -543,6 +698,9 @@ def core(module):
     v = VirtStoragePool(uri, module)
     res = {}
 
+    if module.params.get('entries') is not None:
+        return VIRT_SUCCESS, apply_entries(module, v)
+
     if state and command == 'list_pools':
         res = v.list_pools(state=state)
         if type(res) != dict:
@@ -659,7 +817,10 @@ def main():
             xml = dict(),
             autostart = dict(type='bool'),
             mode = dict(choices=ALL_MODES),
+            entries = dict(type='list'),
+            workers = dict(type='int', default=4),
         ),
+        mutually_exclusive = [['entries', 'name'], ['entries', 'command']],
         supports_check_mode = True
     )
 
@@ -89,6 +89,21 @@ options:
         description:
             - The esxi hostname where the VM will run.
         required: True
+   inventory_cache:
+        description:
+            - Save the folder and virtual machine index of the datacenter to disk,
+              keyed by the vCenter instance uuid, so later runs do not walk the
+              inventory again. Entries read from disk are checked before they are
+              used and the index is rebuilt when they are stale.
+        required: False
+        default: False
+        version_added: "2.3"
+   inventory_cache_path:
+        description:
+            - Directory the inventory index is saved in.
+        required: False
+        default: ~/.ansible/vmware_guest_cache
+        version_added: "2.3"
 extends_documentation_fragment: vmware.documentation    
 '''
 
@@ -155,7 +170,7 @@ except ImportError:
 HAS_PYVMOMI = False
 try:
     import pyVmomi
-    from pyVmomi import vim
+    from pyVmomi import vim, vmodl
     from pyVim.connect import SmartConnect, Disconnect
     HAS_PYVMOMI = True
 except ImportError:
@@ -165,10 +180,273 @@ import atexit
 import os
 import ssl
 import string
+import tempfile
 import time
 
 from ansible.module_utils.urls import fetch_url
 
+class InventoryIndex(object):
+
+    ''' Searchable index of the folders and vms under a datacenter's vm folder.
+
+    The index is filled from a property collector filter and refreshed with
+    WaitForUpdatesEx, so after the first read only the changes since the last
+    version are transferred. It can be saved to disk, keyed by the vCenter
+    instance uuid, and entries read back from disk are checked before use. '''
+
+    def __init__(self, si, content, datacenter, cache_path=None):
+        self.si = si
+        self.content = content
+        self.root = datacenter.vmFolder
+        self.cache_file = None
+        if cache_path:
+            self.cache_file = os.path.join(cache_path, '%s.json' % content.about.instanceUuid)
+        # moid -> {'type', 'name', 'parent', 'uuid'}
+        self.objects = {}
+        self.refs = {self.root._moId: self.root}
+        self.collector = None
+        self.version = ''
+        self.from_disk = False
+        self._maps = None
+
+    def load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            f = open(self.cache_file)
+            try:
+                data = json.load(f)
+            finally:
+                f.close()
+        except (IOError, ValueError):
+            return False
+        objects = data.get(self.root._moId)
+        if not objects:
+            return False
+        self.objects = objects
+        self.from_disk = True
+        self._maps = None
+        return True
+
+    def save(self):
+        if not self.cache_file:
+            return
+        data = {}
+        if os.path.exists(self.cache_file):
+            try:
+                f = open(self.cache_file)
+                try:
+                    data = json.load(f)
+                finally:
+                    f.close()
+            except (IOError, ValueError):
+                data = {}
+        data[self.root._moId] = self.objects
+
+        cache_dir = os.path.dirname(self.cache_file)
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir, 0o700)
+            fd, tmp = tempfile.mkstemp(dir=cache_dir)
+            f = os.fdopen(fd, 'w')
+            try:
+                json.dump(data, f)
+            finally:
+                f.close()
+            os.rename(tmp, self.cache_file)
+        except (IOError, OSError):
+            # the index is only an optimisation
+            pass
+
+    def refresh(self):
+        ''' Apply the inventory changes since the last refresh '''
+
+        if self.collector is None:
+            self.collector = self.content.propertyCollector.CreatePropertyCollector()
+            view = self.content.viewManager.CreateContainerView(
+                self.root, [vim.Folder, vim.VirtualMachine], True)
+            traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+                name='traverseEntities', path='view', skip=False, type=vim.view.ContainerView)
+            obj_spec = vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal_spec])
+            prop_specs = [
+                vmodl.query.PropertyCollector.PropertySpec(type=vim.Folder, pathSet=['name', 'parent']),
+                vmodl.query.PropertyCollector.PropertySpec(type=vim.VirtualMachine, pathSet=['name', 'parent', 'config.uuid']),
+            ]
+            filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=[obj_spec], propSet=prop_specs)
+            self.collector.CreateFilter(filter_spec, partialUpdates=False)
+            self.version = ''
+            self.objects = {}
+            self.refs = {self.root._moId: self.root}
+
+        options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=0)
+        changed = False
+        while True:
+            update = self.collector.WaitForUpdatesEx(self.version, options)
+            if update is None:
+                break
+            self.version = update.version
+            for filter_update in update.filterSet:
+                for obj_update in filter_update.objectSet:
+                    self._apply(obj_update)
+                    changed = True
+            if not update.truncated:
+                break
+
+        if changed or self.from_disk:
+            self.from_disk = False
+            self._maps = None
+            self.save()
+
+    def _apply(self, obj_update):
+        moid = obj_update.obj._moId
+        if obj_update.kind == 'leave':
+            self.objects.pop(moid, None)
+            self.refs.pop(moid, None)
+            return
+
+        if isinstance(obj_update.obj, vim.VirtualMachine):
+            entry = self.objects.setdefault(moid, {'type': 'VirtualMachine'})
+        else:
+            entry = self.objects.setdefault(moid, {'type': 'Folder'})
+        self.refs[moid] = obj_update.obj
+        for change in obj_update.changeSet:
+            value = None
+            if change.op != 'remove':
+                value = change.val
+            if change.name == 'parent':
+                entry['parent'] = value and value._moId
+            elif change.name == 'config.uuid':
+                entry['uuid'] = value
+            else:
+                entry[change.name] = value
+
+    def ref(self, moid):
+        ''' Managed object for a moid, built from the session stub when it came from disk '''
+        if moid not in self.refs:
+            if self.objects[moid]['type'] == 'VirtualMachine':
+                self.refs[moid] = vim.VirtualMachine(moid, self.si._stub)
+            else:
+                self.refs[moid] = vim.Folder(moid, self.si._stub)
+        return self.refs[moid]
+
+    def maps(self):
+        ''' Dict and set maps of folder and vm paths, rebuilt only after a change '''
+
+        if self._maps is not None:
+            return self._maps
+
+        folder_paths = {self.root._moId: '/vm'}
+
+        def folder_path(moid):
+            if moid not in folder_paths:
+                entry = self.objects.get(moid)
+                if not entry or entry.get('parent') is None:
+                    return None
+                parent = folder_path(entry['parent'])
+                if parent is None:
+                    return None
+                folder_paths[moid] = parent + '/' + entry['name']
+            return folder_paths[moid]
+
+        maps = {'fmoid_by_path': {}, 'vmoid_by_uuid': {}, 'names': {}, 'paths': {}}
+        for moid, entry in self.objects.items():
+            if entry['type'] == 'Folder':
+                path = folder_path(moid)
+                if path is not None:
+                    maps['fmoid_by_path'][path] = moid
+                continue
+            path = folder_path(entry.get('parent'))
+            if path is None:
+                continue
+            maps['vmoid_by_uuid'][entry.get('uuid')] = moid
+            maps['names'].setdefault(entry['name'], set()).add(moid)
+            maps['paths'].setdefault(path, set()).add(moid)
+        maps['fmoid_by_path']['/vm'] = self.root._moId
+
+        self._maps = maps
+        return maps
+
+    def find_folders(self, folder):
+        ''' (path, folder) pairs matching an absolute path or a path suffix '''
+        paths = self.maps()['fmoid_by_path']
+        if folder.startswith('/'):
+            matches = [path for path in paths if path == folder]
+        else:
+            matches = [path for path in paths if path.endswith(folder)]
+        return [(path, self.ref(paths[path])) for path in matches]
+
+    def find_vms(self, path, name):
+        ''' Vms called name directly in the folder at path '''
+        maps = self.maps()
+        moids = maps['paths'].get(path, set()) & maps['names'].get(name, set())
+        return [self.ref(moid) for moid in moids]
+
+    def verify(self, path, obj):
+        ''' Whether an object read back from disk still has its indexed name and path '''
+        if not self.from_disk:
+            return True
+        try:
+            name = obj.name
+        except vmodl.fault.ManagedObjectNotFound:
+            return False
+        return path == '/vm' or path.endswith('/' + name)
+
+
+class PropertyWaiter(object):
+
+    ''' Block on property collector updates until a property of every watched
+    object satisfies a condition, instead of polling each object in turn. '''
+
+    def __init__(self, content):
+        self.content = content
+
+    def wait(self, objs, path, done, timeout=None):
+
+        ''' Wait until done(value) holds for the property at path of every object,
+        or until timeout seconds have passed in total. Returns the last value seen
+        for each object by moid and the moids still pending. '''
+
+        values = {}
+        pending = set(obj._moId for obj in objs)
+        if not pending:
+            return values, pending
+
+        collector = self.content.propertyCollector.CreatePropertyCollector()
+        obj_specs = [vmodl.query.PropertyCollector.ObjectSpec(obj=obj) for obj in objs]
+        prop_spec = vmodl.query.PropertyCollector.PropertySpec(type=type(objs[0]), pathSet=[path])
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=obj_specs, propSet=[prop_spec])
+        collector.CreateFilter(filter_spec, partialUpdates=True)
+
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        version = ''
+        try:
+            while pending:
+                options = vmodl.query.PropertyCollector.WaitOptions()
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    options.maxWaitSeconds = max(1, int(remaining))
+                update = collector.WaitForUpdatesEx(version, options)
+                if update is None:
+                    continue
+                version = update.version
+                for filter_update in update.filterSet:
+                    for obj_update in filter_update.objectSet:
+                        moid = obj_update.obj._moId
+                        for change in obj_update.changeSet:
+                            if change.name != path:
+                                continue
+                            values[moid] = change.val
+                            if done(change.val):
+                                pending.discard(moid)
+        finally:
+            collector.Destroy()
+        return values, pending
+
+
 class PyVmomiHelper(object):
 
     def __init__(self, module):
@@ -182,7 +460,6 @@ class PyVmomiHelper(object):
         self.smartconnect()
         self.datacenter = None
         self.folders = None
-        self.foldermap = None
 
     def smartconnect(self):
         kwargs = {'host': self.params['hostname'],
@@ -204,102 +481,35 @@ class PyVmomiHelper(object):
         atexit.register(Disconnect, self.si)
         self.content = self.si.RetrieveContent()
 
-    def _build_folder_tree(self, folder, tree={}, treepath=None):
-
-        tree = {'virtualmachines': [],
-                        'subfolders': {},
-                        'vimobj': folder,
-                        'name': folder.name}
-
-        children = None
-        if hasattr(folder, 'childEntity'):
-            children = folder.childEntity
-
-        if children:
-            for child in children:
-                if child == folder or child in tree:
-                    continue
-                if type(child) == vim.Folder:
-                    ctree = self._build_folder_tree(child)
-                    tree['subfolders'][child] = dict.copy(ctree)
-                elif type(child) == vim.VirtualMachine:
-                    tree['virtualmachines'].append(child)
-        else:
-            if type(folder) == vim.VirtualMachine:
-                return folder
-        return tree
-
-
-    def _build_folder_map(self, folder, vmap={}, inpath='/'):
-
-        ''' Build a searchable index for vms+uuids+folders '''
-
-        if type(folder) == tuple:
-            folder = folder[1]
-
-        if not 'names' in vmap:
-            vmap['names'] = {}
-        if not 'uuids' in vmap:
-            vmap['uuids'] = {}
-        if not 'paths' in vmap:
-            vmap['paths'] = {}
-
-        if inpath == '/':
-            thispath = '/vm'
-        else:
-            thispath = os.path.join(inpath, folder['name'])
-
-        if thispath not in vmap['paths']:
-            vmap['paths'][thispath] = []
-
-        # helpful for isolating folder objects later on
-        if not 'path_by_fvim' in vmap:
-            vmap['path_by_fvim'] = {}
-        if not 'fvim_by_path' in vmap:
-            vmap['fvim_by_path'] = {}
-        # store object by path and store path by object
-        vmap['fvim_by_path'][thispath] = folder['vimobj']
-        vmap['path_by_fvim'][folder['vimobj']] = thispath
-
-        # helpful for isolating vm objects later on
-        if not 'path_by_vvim' in vmap:
-            vmap['path_by_vvim'] = {}
-        if not 'vvim_by_path' in vmap:
-            vmap['vvim_by_path'] = {}
-        if thispath not in vmap['vvim_by_path']:
-            vmap['vvim_by_path'][thispath] = []
-    
-
-        for item in folder.items():
-            k = item[0]
-            v = item[1]
-
-            if k == 'name':
-                pass
-            elif k == 'subfolders':
-                for x in v.items():
-                    vmap = self._build_folder_map(x, vmap=vmap, inpath=thispath)
-            elif k == 'virtualmachines':
-                for x in v:
-                    if not x.config.name in vmap['names']:
-                        vmap['names'][x.config.name] = []
-                    vmap['names'][x.config.name].append(x.config.uuid)
-                    vmap['uuids'][x.config.uuid] = x.config.name
-                    vmap['paths'][thispath].append(x.config.uuid)
-
-                    if x not in vmap['vvim_by_path'][thispath]:
-                        vmap['vvim_by_path'][thispath].append(x)
-                    if x not in vmap['path_by_vvim']:
-                        vmap['path_by_vvim'][x] = thispath
-        return vmap
-
     def getfolders(self):
 
+        ''' Return the folder and vm index of the datacenter, refreshed with the
+        changes since it was last read '''
+
         if not self.datacenter:
             self.get_datacenter()
-        self.folders = self._build_folder_tree(self.datacenter.vmFolder)
-        self.folder_map = self._build_folder_map(self.folders)
-        return (self.folders, self.folder_map)
+        if not self.folders:
+            cache_path = None
+            if self.params['inventory_cache']:
+                cache_path = self.params['inventory_cache_path']
+            self.folders = InventoryIndex(self.si, self.content, self.datacenter, cache_path)
+            self.folders.load()
+        if not self.folders.from_disk:
+            # entries read from disk are verified when used instead
+            self.folders.refresh()
+        return self.folders
+
+    def find_folders(self, folder):
+
+        ''' Folders matching an absolute path or a path suffix, rebuilding the
+        index when entries read from disk turn out to be stale '''
+
+        index = self.getfolders()
+        folders = index.find_folders(folder)
+        if index.from_disk and (not folders or not all(index.verify(p, f) for p, f in folders)):
+            index.refresh()
+            folders = index.find_folders(folder)
+        return folders
 
     def get_datacenter(self):
         self.datacenter = get_obj(self.content, [vim.Datacenter], 
@@ -331,27 +541,21 @@ class PyVmomiHelper(object):
                 searchpath += '/vm' + self.params['folder']
             else:
                 # need to look for matching absolute path
-                if not self.folders:
-                    self.getfolders()
-                paths = self.folder_map['paths'].keys()
-                paths = [x for x in paths if x.endswith(self.params['folder'])]
+                paths = [x[0] for x in self.find_folders(self.params['folder'])]
                 if len(paths) > 1:
                     self.module.fail_json(msg='%s matches more than one folder. Please use the absolute path starting with /vm/' % self.params['folder'])
                 elif paths:
-                    searchpath = paths[0]
+                    if not self.folders.from_disk and not self.folders.find_vms(paths[0], name):
+                        # the index is current, so the vm does not exist
+                        return None
+                    searchpath = '%s' % self.params['datacenter']
+                    searchpath += paths[0]
 
             if searchpath:
-                # get all objects for this path ...
-                fObj = self.si.content.searchIndex.FindByInventoryPath(searchpath)
-                if fObj:
-                    if isinstance(fObj, vim.Datacenter):
-                        fObj = fObj.vmFolder
-                    for cObj in fObj.childEntity:
-                        if not type(cObj) == vim.VirtualMachine:
-                            continue
-                        if cObj.name == name:
-                            vm = cObj
-                            break
+                # the search index resolves the vm itself, without listing the folder
+                vObj = self.si.content.searchIndex.FindByInventoryPath('%s/%s' % (searchpath, name))
+                if isinstance(vObj, vim.VirtualMachine):
+                    vm = vObj
 
         else:
             vmList = get_all_objs(self.content, [vim.VirtualMachine])
@@ -520,14 +724,8 @@ class PyVmomiHelper(object):
         if not datacenter:
             self.module.fail_json(msg='No datacenter named %s was found' % self.params['datacenter'])
 
-        if not self.foldermap:
-            self.folders, self.foldermap = self.getfolders()
-
         # find matching folders
-        if self.params['folder'].startswith('/'):
-            folders = [x for x in self.foldermap['fvim_by_path'].items() if x[0] == self.params['folder']]
-        else:
-            folders = [x for x in self.foldermap['fvim_by_path'].items() if x[0].endswith(self.params['folder'])]
+        folders = self.find_folders(self.params['folder'])
 
         # throw error if more than one match or no matches
         if len(folders) == 0:
@@ -643,24 +841,31 @@ class PyVmomiHelper(object):
         # https://www.vmware.com/support/developer/vc-sdk/visdk25pubs/ReferenceGuide/vim.Task.html
         # https://www.vmware.com/support/developer/vc-sdk/visdk25pubs/ReferenceGuide/vim.TaskInfo.html
         # https://github.com/virtdevninja/pyvmomi-community-samples/blob/master/samples/tools/tasks.py
-        while task.info.state not in ['success', 'error']:
-            time.sleep(1)
-
-    def wait_for_vm_ip(self, vm, poll=100, sleep=5):            
-        ips = None
-        facts = {}
-        thispoll = 0
-        while not ips and thispoll <= poll:
-            newvm = self.getvm(uuid=vm.config.uuid)
-            facts = self.gather_facts(newvm)
-            if facts['ipv4'] or facts['ipv6']:
-                ips = True
-            else:
-                time.sleep(sleep)
-                thispoll += 1
+        self.wait_for_tasks([task])
 
-        #import epdb; epdb.st()
-        return facts
+    def wait_for_tasks(self, tasks, timeout=None):
+
+        ''' Block until every task has finished, or timeout seconds have passed.
+        Returns the tasks still running. '''
+
+        waiter = PropertyWaiter(self.content)
+        values, pending = waiter.wait(tasks, 'info.state',
+                                      lambda state: state in ['success', 'error'], timeout)
+        return [task for task in tasks if task._moId in pending]
+
+    def wait_for_vms_ip(self, vms, timeout=None):
+
+        ''' Block until vcenter reports a guest ip address for every vm, or timeout
+        seconds have passed. Returns the vms still without an address. '''
+
+        waiter = PropertyWaiter(self.content)
+        values, pending = waiter.wait(vms, 'guest.ipAddress', lambda ip: bool(ip), timeout)
+        return [vm for vm in vms if vm._moId in pending]
+
+    def wait_for_vm_ip(self, vm, poll=100, sleep=5):
+        # the poll budget of the old loop is kept as the overall timeout
+        self.wait_for_vms_ip([vm], timeout=poll * sleep)
+        return self.gather_facts(vm)
 
 
     def fetch_file_from_guest(self, vm, username, password, src, dest):
@@ -894,7 +1099,9 @@ def main():
             force=dict(required=False, type='bool', default=False),
             datacenter=dict(required=False, type='str', default=None),
             esxi_hostname=dict(required=False, type='str', default=None),
-            wait_for_ip_address=dict(required=False, type='bool', default=True)
+            wait_for_ip_address=dict(required=False, type='bool', default=True),
+            inventory_cache=dict(required=False, type='bool', default=False),
+            inventory_cache_path=dict(required=False, type='path', default='~/.ansible/vmware_guest_cache'),
         ),
         supports_check_mode=True,
         mutually_exclusive=[],
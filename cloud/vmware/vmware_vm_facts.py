@@ -31,6 +31,18 @@ notes:
 requirements:
     - "python >= 2.6"
     - PyVmomi
+options:
+    properties:
+        description:
+            - Additional virtual machine property paths to return, for example
+              C(config.hardware.numCPU) or C(runtime.host). Each is returned under
+              its path in the facts of every virtual machine. Managed objects are
+              returned as their id and data objects as a dict of their properties.
+            - All properties are read with the property collector in pages, so only
+              the requested paths are transferred.
+        required: false
+        default: []
+        version_added: "2.3"
 extends_documentation_fragment: vmware.documentation
 '''
 
@@ -41,6 +53,16 @@ EXAMPLES = '''
     hostname: esxi_or_vcenter_ip_or_hostname
     username: username
     password: password
+
+- name: Gather registered virtual machines with their CPU count and host
+  local_action:
+    module: vmware_vm_facts
+    hostname: esxi_or_vcenter_ip_or_hostname
+    username: username
+    password: password
+    properties:
+      - config.hardware.numCPU
+      - runtime.host
 '''
 
 try:
@@ -49,35 +71,83 @@ try:
 except ImportError:
     HAS_PYVMOMI = False
 
+SUMMARY_PROPERTIES = [
+    'summary.config.name',
+    'summary.config.guestFullName',
+    'summary.runtime.powerState',
+    'summary.guest.ipAddress',
+]
+PAGE_SIZE = 1000
+
+
+def property_value(value):
+    if isinstance(value, vmodl.ManagedObject):
+        return value._moId
+    if isinstance(value, list):
+        return [property_value(v) for v in value]
+    if isinstance(value, vmodl.DataObject):
+        # nested like the rest of the facts, by property name
+        return dict((prop.name, property_value(getattr(value, prop.name)))
+                    for prop in value._GetPropertyList())
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def retrieve_properties(content, vimtype, paths):
+    """Yield a dict of the requested property paths for every object of vimtype,
+    reading them with the property collector a page at a time"""
+    container = content.viewManager.CreateContainerView(content.rootFolder, [vimtype], True)
+    try:
+        traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+            name='traverseEntities', path='view', skip=False, type=vim.view.ContainerView)
+        obj_spec = vmodl.query.PropertyCollector.ObjectSpec(obj=container, skip=True, selectSet=[traversal_spec])
+        prop_spec = vmodl.query.PropertyCollector.PropertySpec(type=vimtype, pathSet=paths)
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=[obj_spec], propSet=[prop_spec])
+        options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=PAGE_SIZE)
+
+        collector = content.propertyCollector
+        result = collector.RetrievePropertiesEx([filter_spec], options)
+        while result:
+            for obj in result.objects:
+                yield dict((prop.name, prop.val) for prop in obj.propSet)
+            if not result.token:
+                break
+            result = collector.ContinueRetrievePropertiesEx(result.token)
+    finally:
+        container.Destroy()
+
 
 # https://github.com/vmware/pyvmomi-community-samples/blob/master/samples/getallvms.py
-def get_all_virtual_machines(content):
-    virtual_machines = get_all_objs(content, [vim.VirtualMachine])
+def get_all_virtual_machines(content, properties=None):
+    properties = properties or []
+    extra_properties = []
+    for path in properties:
+        if path not in SUMMARY_PROPERTIES and path not in extra_properties:
+            extra_properties.append(path)
     _virtual_machines = {}
 
-    for vm in virtual_machines:
-        _ip_address = ""
-        summary = vm.summary
-        if summary.guest is not None:
-            _ip_address = summary.guest.ipAddress
-            if _ip_address is None:
-                _ip_address = ""
+    for props in retrieve_properties(content, vim.VirtualMachine, SUMMARY_PROPERTIES + extra_properties):
+        _ip_address = props.get('summary.guest.ipAddress')
+        if _ip_address is None:
+            _ip_address = ""
 
         virtual_machine = {
-            summary.config.name: {
-                "guest_fullname": summary.config.guestFullName,
-                "power_state": summary.runtime.powerState,
-                "ip_address": _ip_address
-            }
+            "guest_fullname": props.get('summary.config.guestFullName'),
+            "power_state": props.get('summary.runtime.powerState'),
+            "ip_address": _ip_address
         }
+        for path in properties:
+            virtual_machine[path] = property_value(props.get(path))
 
-        _virtual_machines.update(virtual_machine)
+        _virtual_machines[props.get('summary.config.name')] = virtual_machine
     return _virtual_machines
 
 
 def main():
 
     argument_spec = vmware_argument_spec()
+    argument_spec.update(dict(properties=dict(required=False, type='list', default=[])))
     module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=False)
 
     if not HAS_PYVMOMI:
@@ -85,7 +155,7 @@ def main():
 
     try:
         content = connect_to_api(module)
-        _virtual_machines = get_all_virtual_machines(content)
+        _virtual_machines = get_all_virtual_machines(content, module.params['properties'])
         module.exit_json(changed=False, virtual_machines=_virtual_machines)
     except vmodl.RuntimeFault as runtime_fault:
         module.fail_json(msg=runtime_fault.msg)
@@ -42,7 +42,8 @@ options:
   src:
     description:
       - The file to push to vCenter
-    required: true
+      - Required unless C(files) is given.
+    required: false
   datacenter:
     description:
       - The datacenter on the vCenter server that holds the datastore.
@@ -50,11 +51,60 @@ options:
   datastore:
     description:
       - The datastore on the vCenter server to push files to.
-    required: true
+      - Required unless C(files) is given, where it is the default datastore.
+    required: false
   path:
     description:
       - The file to push to the datastore on the vCenter server.
-    required: true
+      - Required unless C(files) is given.
+    required: false
+  files:
+    description:
+      - List of uploads, each a dict with C(src), C(path) and optionally
+        C(datastore) and C(datacenter), which default to the module options.
+        The uploads run concurrently, see C(workers).
+    required: false
+    default: null
+    version_added: "2.3"
+  workers:
+    description:
+      - Number of uploads in C(files) to run at the same time.
+    required: false
+    default: 1
+    version_added: "2.3"
+  chunk_size:
+    description:
+      - Number of bytes read from the source and sent at a time. The file is
+        streamed, so memory use is bounded by this size.
+    required: false
+    default: 1048576
+    version_added: "2.3"
+  retries:
+    description:
+      - Number of times to restart an upload that failed on a network error or
+        a server error, waiting C(retry_delay) seconds, doubled on every retry.
+      - The datastore does not accept partial writes, so the upload restarts
+        from the beginning of the file.
+    required: false
+    default: 0
+    version_added: "2.3"
+  retry_delay:
+    description:
+      - Seconds to wait before the first retry.
+    required: false
+    default: 2
+    version_added: "2.3"
+  digest_cache:
+    description:
+      - Path of a file recording the SHA1 digest of the sources and of what was
+        last uploaded to each datastore path. When set, an upload is skipped if
+        the remote file has the size of the source and the digest last uploaded
+        there matches the source.
+      - The datastore does not report checksums, so only uploads recorded in
+        this file can be skipped.
+    required: false
+    default: null
+    version_added: "2.3"
   validate_certs:
     description:
       - If C(no), SSL certificates will not be validated. This should only be
@@ -74,13 +124,43 @@ EXAMPLES = '''
   transport: local
 - vsphere_copy: host=vhost login=vuser password=vpass src=/other/local/file datacenter='DC2 Someplace' datastore=datastore2 path=other/remote/file
   delegate_to: other_system
+
+# Upload ISO images to two datastores, two at a time, skipping unchanged ones
+- vsphere_copy:
+    host: vhost
+    login: vuser
+    password: vpass
+    datacenter: DC1 Someplace
+    datastore: datastore1
+    workers: 2
+    retries: 3
+    digest_cache: /var/cache/ansible/vsphere_copy.json
+    files:
+      - src: /isos/centos7.iso
+        path: isos/centos7.iso
+      - src: /isos/centos7.iso
+        path: isos/centos7.iso
+        datastore: datastore2
+      - src: /isos/debian8.iso
+        path: isos/debian8.iso
+  transport: local
 '''
 
-import atexit
 import urllib
-import mmap
 import errno
+import hashlib
+import json
+import os
 import socket
+import tempfile
+import threading
+import time
+import urllib2
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.pycompat24 import get_exception
@@ -100,6 +180,157 @@ def vmware_path(datastore, datacenter, path):
     params = urllib.urlencode(params)
     return "%s?%s" % (path, params)
 
+class ChunkReader(object):
+    ''' File wrapper handing out chunk_size bytes per read, whatever size the
+    HTTP library asks for, so the request body is streamed in those chunks '''
+
+    def __init__(self, fd, chunk_size):
+        self.fd = fd
+        self.chunk_size = chunk_size
+
+    def read(self, size=-1):
+        return self.fd.read(self.chunk_size)
+
+class DigestCache(object):
+    ''' Digests of the local sources and of the last upload to each url '''
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {'files': {}, 'uploads': {}}
+        if os.path.exists(path):
+            try:
+                f = open(path)
+                try:
+                    data = json.load(f)
+                finally:
+                    f.close()
+                self.data['files'].update(data.get('files', {}))
+                self.data['uploads'].update(data.get('uploads', {}))
+            except (IOError, ValueError):
+                pass
+
+    def digest(self, src, chunk_size):
+        st = os.stat(src)
+        key = os.path.realpath(src)
+        with self.lock:
+            entry = self.data['files'].get(key)
+        if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+            return entry['sha1']
+
+        sha1 = hashlib.sha1()
+        f = open(src, 'rb')
+        try:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha1.update(chunk)
+        finally:
+            f.close()
+        with self.lock:
+            self.data['files'][key] = dict(size=st.st_size, mtime=st.st_mtime, sha1=sha1.hexdigest())
+        return sha1.hexdigest()
+
+    def uploaded(self, url):
+        with self.lock:
+            return self.data['uploads'].get(url)
+
+    def record(self, url, sha1, size):
+        with self.lock:
+            self.data['uploads'][url] = dict(sha1=sha1, size=size)
+
+    def save(self):
+        cache_dir = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(self.data, f)
+        finally:
+            f.close()
+        os.rename(tmp, self.path)
+
+def remote_size(url, login, password, validate_certs):
+    ''' Size of the file on the datastore, or None when it does not exist '''
+    try:
+        r = open_url(url, method='HEAD', url_username=login, url_password=password,
+                validate_certs=validate_certs, force_basic_auth=True)
+    except urllib2.HTTPError:
+        return None
+    length = r.headers.get('content-length', None)
+    if length is None:
+        return None
+    return int(length)
+
+def upload(job, login, password, validate_certs, chunk_size, retries, retry_delay, cache=None):
+    ''' Upload job['src'] to job['url'] and return the result of the upload '''
+    src = job['src']
+    url = job['url']
+    size = os.path.getsize(src)
+
+    sha1 = None
+    if cache:
+        sha1 = cache.digest(src, chunk_size)
+        last = cache.uploaded(url)
+        if last and last['sha1'] == sha1 and last['size'] == size and \
+                remote_size(url, login, password, validate_certs) == size:
+            return dict(changed=False, src=src, url=url, msg='Remote file matches the source')
+
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "Content-Length": str(size),
+    }
+
+    attempt = 0
+    while True:
+        fd = open(src, "rb")
+        try:
+            r = open_url(url, data=ChunkReader(fd, chunk_size), headers=headers, method='PUT',
+                    url_username=login, url_password=password, validate_certs=validate_certs,
+                    force_basic_auth=True)
+            break
+        except urllib2.HTTPError:
+            e = get_exception()
+            if e.code < 500 or attempt >= retries:
+                return dict(failed=True, msg=str(e), status=e.code, errno=None, reason=str(e), src=src, url=url)
+        except (urllib2.URLError, socket.error):
+            e = get_exception()
+            if isinstance(e, urllib2.URLError):
+                if not isinstance(e.reason, socket.error):
+                    return dict(failed=True, msg=str(e), status=None, errno=-1, reason=str(e), src=src, url=url)
+                e = e.reason
+            if attempt >= retries:
+                if isinstance(e.args, tuple) and e[0] == errno.ECONNRESET:
+                    # VSphere resets connection if the file is in use and cannot be replaced
+                    return dict(failed=True, msg='Failed to upload, image probably in use', status=None, errno=e[0], reason=str(e), src=src, url=url)
+                return dict(failed=True, msg=str(e), status=None, errno=e[0], reason=str(e), src=src, url=url)
+        except Exception:
+            e = get_exception()
+            error_code = -1
+            try:
+                if isinstance(e[0], int):
+                    error_code = e[0]
+            except (KeyError, IndexError, TypeError):
+                pass
+            return dict(failed=True, msg=str(e), status=None, errno=error_code, reason=str(e), src=src, url=url)
+        finally:
+            fd.close()
+        time.sleep(retry_delay * 2 ** attempt)
+        attempt += 1
+
+    status = r.getcode()
+    if 200 <= status < 300:
+        if cache:
+            cache.record(url, sha1, size)
+        return dict(changed=True, status=status, reason=r.msg, src=src, url=url, retries=attempt)
+
+    length = r.headers.get('content-length', None)
+    if r.headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunked = 1
+    else:
+        chunked = 0
+    return dict(failed=True, msg='Failed to upload', errno=None, status=status, reason=r.msg, length=length,
+                headers=dict(r.headers), chunked=chunked, src=src, url=url)
+
 def main():
 
     module = AnsibleModule(
@@ -107,12 +338,20 @@ def main():
             host = dict(required=True, aliases=[ 'hostname' ]),
             login = dict(required=True, aliases=[ 'username' ]),
             password = dict(required=True, no_log=True),
-            src = dict(required=True, aliases=[ 'name' ]),
+            src = dict(required=False, aliases=[ 'name' ]),
             datacenter = dict(required=True),
-            datastore = dict(required=True),
-            dest = dict(required=True, aliases=[ 'path' ]),
+            datastore = dict(required=False),
+            dest = dict(required=False, aliases=[ 'path' ]),
+            files = dict(required=False, type='list'),
+            workers = dict(required=False, default=1, type='int'),
+            chunk_size = dict(required=False, default=1048576, type='int'),
+            retries = dict(required=False, default=0, type='int'),
+            retry_delay = dict(required=False, default=2, type='int'),
+            digest_cache = dict(required=False, type='path'),
             validate_certs = dict(required=False, default=True, type='bool'),
         ),
+        required_one_of = [ [ 'src', 'files' ] ],
+        mutually_exclusive = [ [ 'src', 'files' ] ],
         # Implementing check-mode using HEAD is impossible, since size/date is not 100% reliable
         supports_check_mode = False,
     )
@@ -125,53 +364,69 @@ def main():
     datastore = module.params.get('datastore')
     dest = module.params.get('dest')
     validate_certs = module.params.get('validate_certs')
+    chunk_size = module.params.get('chunk_size')
+    retries = module.params.get('retries')
+    retry_delay = module.params.get('retry_delay')
 
-    fd = open(src, "rb")
-    atexit.register(fd.close)
+    if module.params.get('files'):
+        entries = module.params.get('files')
+    else:
+        entries = [ dict(src=src, path=dest) ]
 
-    data = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
-    atexit.register(data.close)
+    jobs = []
+    for entry in entries:
+        entry_datastore = entry.get('datastore', datastore)
+        entry_dest = entry.get('path', entry.get('dest'))
+        if not entry.get('src') or not entry_datastore or not entry_dest:
+            module.fail_json(msg='src, datastore and path are required for every upload', entry=entry)
+        remote_path = vmware_path(entry_datastore, entry.get('datacenter', datacenter), entry_dest)
+        jobs.append(dict(src=os.path.expanduser(entry['src']), url='https://%s%s' % (host, remote_path)))
 
-    remote_path = vmware_path(datastore, datacenter, dest)
-    url = 'https://%s%s' % (host, remote_path)
+    cache = None
+    if module.params.get('digest_cache'):
+        cache = DigestCache(module.params.get('digest_cache'))
 
-    headers = {
-        "Content-Type": "application/octet-stream",
-        "Content-Length": str(len(data)),
-    }
+    results = [ None ] * len(jobs)
+    pending = queue.Queue()
+    for i, job in enumerate(jobs):
+        pending.put((i, job))
 
-    try:
-        r = open_url(url, data=data, headers=headers, method='PUT',
-                url_username=login, url_password=password, validate_certs=validate_certs,
-                force_basic_auth=True)
-    except socket.error:
-        e = get_exception()
-        if isinstance(e.args, tuple) and e[0] == errno.ECONNRESET:
-            # VSphere resets connection if the file is in use and cannot be replaced
-            module.fail_json(msg='Failed to upload, image probably in use', status=None, errno=e[0], reason=str(e), url=url)
-        else:
-            module.fail_json(msg=str(e), status=None, errno=e[0], reason=str(e), url=url)
-    except Exception:
-        e = get_exception()
-        error_code = -1
+    def worker():
+        while True:
+            try:
+                i, job = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[i] = upload(job, login, password, validate_certs, chunk_size, retries, retry_delay, cache)
+            except Exception:
+                # e.g. a missing or unreadable src, reported for this job only
+                e = get_exception()
+                results[i] = dict(failed=True, msg=str(e), status=None, errno=-1, reason=str(e), src=job['src'], url=job['url'])
+
+    threads = [ threading.Thread(target=worker) for i in range(max(1, min(module.params.get('workers'), len(jobs)))) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if cache:
         try:
-            if isinstance(e[0], int):
-                error_code = e[0]
-        except KeyError:
+            cache.save()
+        except (IOError, OSError):
+            # the digest cache only saves uploads, it is not worth failing for
             pass
-        module.fail_json(msg=str(e), status=None, errno=error_code, reason=str(e), url=url)
 
-    status = r.getcode()
-    if 200 <= status < 300:
-        module.exit_json(changed=True, status=status, reason=r.msg, url=url)
-    else:
-        length = r.headers.get('content-length', None)
-        if r.headers.get('transfer-encoding', '').lower() == 'chunked':
-            chunked = 1
-        else:
-            chunked = 0
+    if not module.params.get('files'):
+        result = results[0]
+        if result.pop('failed', False):
+            module.fail_json(**result)
+        module.exit_json(**result)
 
-        module.fail_json(msg='Failed to upload', errno=None, status=status, reason=r.msg, length=length, headers=dict(r.headers), chunked=chunked, url=url)
+    changed = any(r.get('changed') for r in results)
+    if any(r.get('failed') for r in results):
+        module.fail_json(msg='Failed to upload', changed=changed, results=results)
+    module.exit_json(changed=changed, results=results)
 
 if __name__ == '__main__':
     main()
@@ -40,9 +40,49 @@ options:
     required: true
   format:
     description:
-      - The type of compression to use. Can be 'gz', 'bz2', or 'zip'.
-    choices: [ 'gz', 'bz2', 'zip' ]
+      - The type of compression to use. Can be 'gz', 'bz2', 'xz', or 'zip'.
+      - 'xz' was added in version 2.3 and requires the lzma module.
+    choices: [ 'gz', 'bz2', 'xz', 'zip' ]
     default: 'gz'
+  workers:
+    description:
+      - Number of threads compressing with C(format) 'gz', 'bz2' or 'xz'. When
+        greater than 1 the data is compressed in independent blocks that are
+        written as concatenated gzip members, bzip2 streams or xz streams, as
+        pigz, pbzip2 and pixz do. These are read by the usual tools.
+      - Memory use is bounded by a few blocks per worker, whatever the size of
+        the tree.
+    required: false
+    default: 1
+    version_added: 2.3
+  manifest:
+    description:
+      - Record the path, size, mtime and inode of every archived file in
+        C(dest).manifest, and skip writing the archive when the sources still
+        match it, so unchanged trees only cost a stat of each file.
+      - Not used with C(remove).
+    type: bool
+    required: false
+    default: false
+    version_added: 2.3
+  manifest_checksum:
+    description:
+      - Also record the SHA1 of every file in the manifest, catching changes
+        that keep the size and mtime, at the cost of reading every file.
+    type: bool
+    required: false
+    default: false
+    version_added: 2.3
+  incremental:
+    description:
+      - With C(manifest) and C(format=tar), append only the new and changed
+        files to the existing archive instead of rewriting it. Extracting the
+        archive keeps the last copy of each file. The archive is rewritten when
+        files were removed from the sources.
+    type: bool
+    required: false
+    default: false
+    version_added: 2.3
   dest:
     description:
       - The file name of the destination archive. This is required when C(path) refers to multiple files by either specifying a glob, a directory or multiple paths in a list.
@@ -58,7 +98,7 @@ options:
 author: "Ben Doherty (@bendoh)"
 notes:
     - requires tarfile, zipfile, gzip, and bzip2 packages on target host
-    - can produce I(gzip), I(bzip2) and I(zip) compressed files or archives
+    - can produce I(gzip), I(bzip2), I(xz) and I(zip) compressed files or archives
 '''
 
 EXAMPLES = '''
@@ -78,6 +118,21 @@ EXAMPLES = '''
         - /path/wong/foo
     dest: /path/file.tar.bz2
     format: bz2
+
+# Re-create a tarball only when files under /srv/data changed, appending changed files
+- archive:
+    path: /srv/data
+    dest: /backup/data.tar
+    format: tar
+    manifest: yes
+    incremental: yes
+
+# Create a xz compressed tarball of a log tree using 8 compression threads
+- archive:
+    path: /var/log/app
+    dest: /backup/app-logs.tar.xz
+    format: xz
+    workers: 8
 '''
 
 RETURN = '''
@@ -112,17 +167,248 @@ import glob
 import shutil
 import gzip
 import bz2
-import filecmp
+import hashlib
+import json
+import struct
+import sys
+import tempfile
+import threading
+import time
 import zipfile
 import tarfile
+import zlib
+from collections import deque
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+try:
+    import lzma
+    HAS_LZMA = True
+except ImportError:
+    try:
+        from backports import lzma
+        HAS_LZMA = True
+    except ImportError:
+        HAS_LZMA = False
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+BLOCK_SIZE = 1024 * 1024
+# Joins bytes on python 3 and str on python 2
+EMPTY = ''.encode('ascii')
+
+
+def compress_block(format, block):
+    """Compress block into a self-contained gzip member, bzip2 stream or xz stream"""
+    if format == 'gz':
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+        header = struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, 0, int(time.time()), 2, 0xff)
+        trailer = struct.pack('<II', zlib.crc32(block) & 0xffffffff, len(block) & 0xffffffff)
+        return header + compressor.compress(block) + compressor.flush() + trailer
+    elif format == 'bz2':
+        return bz2.compress(block, 9)
+    elif format == 'xz':
+        return lzma.compress(block, format=lzma.FORMAT_XZ)
+    raise ValueError("Invalid format")
+
+
+class BlockCompressor(object):
+    """Write-only file object that cuts the data into blocks, compresses them in
+    worker threads and writes the results to fileobj in order. zlib, bz2 and
+    lzma release the GIL while compressing, so the threads run in parallel."""
+
+    def __init__(self, fileobj, format, workers, block_size=BLOCK_SIZE):
+        self.fileobj = fileobj
+        self.format = format
+        self.block_size = block_size
+        self.buf = []
+        self.buflen = 0
+        self.written = False
+        self.pending = deque()
+        self.max_pending = 2 * workers
+        self.jobs = queue.Queue()
+        self.threads = [threading.Thread(target=self._work) for i in range(workers)]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                job['data'] = compress_block(self.format, job['block'])
+            except Exception:
+                job['error'] = get_exception()
+            job['block'] = None
+            job['done'].set()
+
+    def _write_oldest(self):
+        job = self.pending.popleft()
+        job['done'].wait()
+        if 'error' in job:
+            raise job['error']
+        self.fileobj.write(job['data'])
+
+    def _submit(self, block):
+        job = dict(block=block, done=threading.Event())
+        self.pending.append(job)
+        self.jobs.put(job)
+        self.written = True
+        # Bound the memory held by blocks in flight
+        while len(self.pending) > self.max_pending:
+            self._write_oldest()
+
+    def write(self, data):
+        self.buf.append(data)
+        self.buflen += len(data)
+        if self.buflen >= self.block_size:
+            data = EMPTY.join(self.buf)
+            offset = 0
+            while len(data) - offset >= self.block_size:
+                self._submit(data[offset:offset + self.block_size])
+                offset += self.block_size
+            self.buf = [data[offset:]]
+            self.buflen = len(data) - offset
+
+    def close(self):
+        try:
+            if self.buflen or not self.written:
+                self._submit(EMPTY.join(self.buf))
+                self.buf = []
+                self.buflen = 0
+            while self.pending:
+                self._write_oldest()
+        finally:
+            for thread in self.threads:
+                self.jobs.put(None)
+            for thread in self.threads:
+                thread.join()
+
+
+def manifest_name(path):
+    """Return path as text, the type json.load gives back for the manifest
+    on python 2, so names read back compare equal to freshly built ones"""
+    if isinstance(path, text_type):
+        return path
+    return path.decode(sys.getfilesystemencoding() or 'utf-8', 'replace')
+
+
+def build_manifest(paths, arcroot, exclude, checksum=False):
+    """Map the archive name of every entry under paths to the [size, mtime,
+    inode] of its source, plus its SHA1 with checksum, or to [] for directories"""
+    entries = {}
+
+    def add(fullpath, is_dir):
+        if fullpath in exclude:
+            return
+        try:
+            st = os.lstat(fullpath)
+        except OSError:
+            return
+        entry = []
+        if not is_dir:
+            entry = [st.st_size, st.st_mtime, st.st_ino]
+            if checksum and os.path.isfile(fullpath):
+                sha1 = hashlib.sha1()
+                f = open(fullpath, 'rb')
+                try:
+                    while True:
+                        chunk = f.read(BLOCK_SIZE)
+                        if not chunk:
+                            break
+                        sha1.update(chunk)
+                finally:
+                    f.close()
+                entry.append(sha1.hexdigest())
+        entries[manifest_name(fullpath[len(arcroot):])] = entry
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in walk(path):
+                if not dirpath.endswith(os.sep):
+                    dirpath += os.sep
+                for dirname in dirnames:
+                    add(dirpath + dirname, True)
+                for filename in filenames:
+                    add(dirpath + filename, False)
+        else:
+            add(path, False)
+    return entries
+
+
+def read_manifest(path):
+    try:
+        f = open(path)
+        try:
+            return json.load(f)
+        finally:
+            f.close()
+    except (IOError, ValueError):
+        return None
+
+
+def write_manifest(path, manifest):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    f = os.fdopen(fd, 'w')
+    try:
+        json.dump(manifest, f)
+    finally:
+        f.close()
+    os.rename(tmp, path)
+
+
+def walk(top):
+    """os.walk(top) built on os.scandir where it is available, which saves a
+    stat per entry when telling directories from files"""
+    if not hasattr(os, 'scandir'):
+        for entry in os.walk(top, topdown=True):
+            yield entry
+        return
+
+    stack = [top]
+    while stack:
+        dirpath = stack.pop()
+        dirnames = []
+        filenames = []
+        subdirs = []
+        try:
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                dirnames.append(entry.name)
+                if not entry.is_symlink():
+                    subdirs.append(entry.name)
+            else:
+                filenames.append(entry.name)
+        yield dirpath, dirnames, filenames
+        stack.extend(os.path.join(dirpath, d) for d in reversed(subdirs) if d in dirnames)
+
 
 def main():
     module = AnsibleModule(
         argument_spec = dict(
             path = dict(type='list', required=True),
-            format  = dict(choices=['gz', 'bz2', 'zip', 'tar'], default='gz', required=False),
+            format  = dict(choices=['gz', 'bz2', 'xz', 'zip', 'tar'], default='gz', required=False),
             dest = dict(required=False, type='path'),
             remove = dict(required=False, default=False, type='bool'),
+            workers = dict(required=False, default=1, type='int'),
+            manifest = dict(required=False, default=False, type='bool'),
+            manifest_checksum = dict(required=False, default=False, type='bool'),
+            incremental = dict(required=False, default=False, type='bool'),
         ),
         add_file_common_args=True,
         supports_check_mode=True,
@@ -133,6 +419,7 @@ def main():
     paths = params['path']
     dest = params['dest']
     remove = params['remove']
+    workers = params['workers']
 
     expanded_paths = []
     format = params['format']
@@ -140,6 +427,9 @@ def main():
     changed = False
     state = 'absent'
 
+    if format == 'xz' and not HAS_LZMA:
+        module.fail_json(msg='The lzma module is required for format=xz')
+
     # Simple or archive file compression (inapplicable with 'zip' since it's always an archive)
     archive = False
     successes = []
@@ -176,23 +466,13 @@ def main():
 
     archive_paths = []
     missing = []
-    arcroot = ''
-
-    for path in expanded_paths:
-        # Use the longest common directory name among all the files
-        # as the archive root path
-        if arcroot == '':
-            arcroot = os.path.dirname(path) + os.sep
-        else:
-            for i in range(len(arcroot)):
-                if path[i] != arcroot[i]:
-                    break
-
-            if i < len(arcroot):
-                arcroot = os.path.dirname(arcroot[0:i+1])
 
-            arcroot += os.sep
+    # Use the longest common directory name among all the files
+    # as the archive root path
+    arcroot = os.path.commonprefix([os.path.dirname(path) + os.sep for path in expanded_paths])
+    arcroot = arcroot[:arcroot.rfind(os.sep) + 1]
 
+    for path in expanded_paths:
         # Don't allow archives to be created anywhere within paths to be removed
         if remove and os.path.isdir(path) and dest.startswith(path):
             module.fail_json(path=', '.join(paths), msg='Error, created archive can not be contained in source paths when remove=True')
@@ -205,7 +485,7 @@ def main():
     # No source files were found but the named archive exists: are we 'compress' or 'archive' now?
     if len(missing) == len(expanded_paths) and dest and os.path.exists(dest):
         # Just check the filename to know if it's an archive or simple compressed file
-        if re.search(r'(\.tar|\.tar\.gz|\.tgz|.tbz2|\.tar\.bz2|\.zip)$', os.path.basename(dest), re.IGNORECASE):
+        if re.search(r'(\.tar|\.tar\.gz|\.tgz|.tbz2|\.tar\.bz2|\.txz|\.tar\.xz|\.zip)$', os.path.basename(dest), re.IGNORECASE):
             state = 'archive'
         else:
             state = 'compress'
@@ -227,28 +507,63 @@ def main():
         if os.path.lexists(dest):
             size = os.path.getsize(dest)
 
-        if state != 'archive':
+        # Compare the sources with the manifest recorded along the archive
+        manifest_file = dest + '.manifest'
+        manifest = None
+        unchanged = False
+        only = None
+        if params['manifest'] and state != 'archive' and len(archive_paths) > 0:
+            manifest = dict(format=format, arcroot=manifest_name(arcroot),
+                            entries=build_manifest(archive_paths, arcroot, [dest, manifest_file], params['manifest_checksum']))
+            old_manifest = None
+            if os.path.exists(dest):
+                old_manifest = read_manifest(manifest_file)
+            if old_manifest and old_manifest.get('format') == format and old_manifest.get('arcroot') == manifest['arcroot']:
+                old_entries = old_manifest.get('entries', {})
+                if old_entries == manifest['entries']:
+                    unchanged = not remove
+                elif params['incremental'] and format == 'tar' and set(old_entries) <= set(manifest['entries']):
+                    # Nothing was removed, so only new and changed files need appending
+                    only = set(arcname for arcname, entry in manifest['entries'].items()
+                               if old_entries.get(arcname) != entry)
+
+        if state != 'archive' and unchanged:
+            if state != 'incomplete':
+                state = 'archive'
+
+        elif state != 'archive':
             if check_mode:
                 changed = True
 
             else:
+                arcfile = dest_file = compressor = None
                 try:
                     # Slightly more difficult (and less efficient!) compression using zipfile module
                     if format == 'zip':
                         arcfile = zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED)
 
+                    # Stream the tarball through the block compressor, in parallel
+                    # when there are several workers
+                    elif format == 'xz' or (workers > 1 and format in ('gz', 'bz2')):
+                        dest_file = open(dest, 'wb')
+                        compressor = BlockCompressor(dest_file, format, max(1, workers))
+                        arcfile = tarfile.open(fileobj=compressor, mode='w|')
+
                     # Easier compression using tarfile module
                     elif format == 'gz' or format == 'bz2':
                         arcfile = tarfile.open(dest, 'w|' + format)
 
-                    # Or plain tar archiving
+                    # Or plain tar archiving, appending to it in incremental mode
                     elif format == 'tar':
-                        arcfile = tarfile.open(dest, 'w')
+                        arcfile = tarfile.open(dest, only is None and 'w' or 'a')
+
+                    # Never add the archive to itself
+                    dest_stat = os.stat(dest)
 
                     for path in archive_paths:
                         if os.path.isdir(path):
                             # Recurse into directories
-                            for dirpath, dirnames, filenames in os.walk(path, topdown=True):
+                            for dirpath, dirnames, filenames in walk(path):
                                 if not dirpath.endswith(os.sep):
                                     dirpath += os.sep
 
@@ -256,6 +571,9 @@ def main():
                                     fullpath = dirpath + dirname
                                     arcname = fullpath[len(arcroot):]
 
+                                    if only is not None and manifest_name(arcname) not in only:
+                                        continue
+
                                     try:
                                         if format == 'zip':
                                             arcfile.write(fullpath, arcname)
@@ -270,7 +588,16 @@ def main():
                                     fullpath = dirpath + filename
                                     arcname = fullpath[len(arcroot):]
 
-                                    if not filecmp.cmp(fullpath, dest):
+                                    try:
+                                        st = os.stat(fullpath)
+                                        is_dest = (st.st_dev, st.st_ino) == (dest_stat.st_dev, dest_stat.st_ino)
+                                    except OSError:
+                                        is_dest = False
+
+                                    if fullpath == manifest_file or (only is not None and manifest_name(arcname) not in only):
+                                        continue
+
+                                    if not is_dest:
                                         try:
                                             if format == 'zip':
                                                 arcfile.write(fullpath, arcname)
@@ -281,6 +608,8 @@ def main():
                                         except Exception:
                                             e = get_exception()
                                             errors.append('Adding %s: %s' % (path, str(e)))
+                        elif only is not None and manifest_name(path[len(arcroot):]) not in only:
+                            continue
                         else:
                             if format == 'zip':
                                 arcfile.write(path, path[len(arcroot):])
@@ -293,13 +622,33 @@ def main():
                     e = get_exception()
                     return module.fail_json(msg='Error when writing %s archive at %s: %s' % (format == 'zip' and 'zip' or ('tar.' + format), dest, str(e)))
 
-                if arcfile:
-                    arcfile.close()
-                    state = 'archive'
+                try:
+                    if arcfile:
+                        arcfile.close()
+                        state = 'archive'
+                    if compressor:
+                        compressor.close()
+                    if dest_file:
+                        dest_file.close()
+                except Exception:
+                    e = get_exception()
+                    return module.fail_json(msg='Error when writing %s archive at %s: %s' % ('tar.' + format, dest, str(e)))
 
                 if len(errors) > 0:
                     module.fail_json(msg='Errors when writing archive at %s: %s' % (dest, '; '.join(errors)))
 
+                try:
+                    if manifest:
+                        write_manifest(manifest_file, manifest)
+                        # the sources differ from the last manifest, whatever the size says
+                        changed = True
+                    elif os.path.exists(manifest_file):
+                        # A manifest left from an earlier run no longer describes the archive
+                        os.remove(manifest_file)
+                except (IOError, OSError):
+                    e = get_exception()
+                    module.fail_json(msg='Error when writing manifest at %s: %s' % (manifest_file, str(e)))
+
         if state in ['archive', 'incomplete'] and remove:
             for path in successes:
                 try:
@@ -339,7 +688,7 @@ def main():
                     changed = True
             else:
                 size = 0
-                f_in = f_out = arcfile = None
+                f_in = f_out = arcfile = dest_file = None
 
                 if os.path.lexists(dest):
                     size = os.path.getsize(dest)
@@ -354,14 +703,17 @@ def main():
                     else:
                         f_in = open(path, 'rb')
 
-                        if format == 'gz':
+                        if format == 'xz' or (workers > 1 and format in ('gz', 'bz2')):
+                            dest_file = open(dest, 'wb')
+                            f_out = BlockCompressor(dest_file, format, max(1, workers))
+                        elif format == 'gz':
                             f_out = gzip.open(dest, 'wb')
                         elif format == 'bz2':
                             f_out = bz2.BZ2File(dest, 'wb')
                         else:
                             raise OSError("Invalid format")
 
-                        shutil.copyfileobj(f_in, f_out)
+                        shutil.copyfileobj(f_in, f_out, BLOCK_SIZE)
 
                     successes.append(path)
 
@@ -375,6 +727,8 @@ def main():
                     f_in.close()
                 if f_out:
                     f_out.close()
+                if dest_file:
+                    dest_file.close()
 
                 # Rudimentary check: If size changed then file changed. Not perfect, but easy.
                 if os.path.getsize(dest) != size:
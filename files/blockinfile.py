@@ -100,6 +100,19 @@ options:
     description:
       - 'This flag indicates that filesystem links, if they exist, should be followed.'
     version_added: "2.1"
+  blocks:
+    required: false
+    default: null
+    description:
+      - A list of blocks to manage in one pass over the file, instead of
+        C(block). Each item is a dict with C(block) and optionally C(marker),
+        C(state), C(insertafter) and C(insertbefore), which default to the
+        module options. Every marker must be unique.
+      - The file is read twice, line by line, and written once, so the number
+        of blocks does not add passes. Insertion points and markers are looked
+        up in the file as it was before the change, blocks inserted at the same
+        point keep their order in the list.
+    version_added: "2.3"
 """
 
 EXAMPLES = r"""
@@ -144,13 +157,28 @@ EXAMPLES = r"""
       - { name: host1, ip: 10.10.1.10 }
       - { name: host2, ip: 10.10.1.11 }
       - { name: host3, ip: 10.10.1.12 }
+
+- name: Add the same mappings to /etc/hosts in a single write
+  blockinfile:
+    dest: /etc/hosts
+    blocks:
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK host1"
+        block: "10.10.1.10 host1"
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK host2"
+        block: "10.10.1.11 host2"
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK host3"
+        state: absent
 """
 
 import re
 import os
+import hashlib
 import tempfile
 
 
+BLOCK_KEYS = ('block', 'content', 'marker', 'state', 'insertafter', 'insertbefore')
+
+
 def write_changes(module, contents, dest):
 
     tmpfd, tmpfile = tempfile.mkstemp()
@@ -158,6 +186,11 @@ def write_changes(module, contents, dest):
     f.write(contents)
     f.close()
 
+    install_changes(module, tmpfile, dest)
+
+
+def install_changes(module, tmpfile, dest):
+
     validate = module.params.get('validate', None)
     valid = not validate
     if validate:
@@ -172,6 +205,221 @@ def write_changes(module, contents, dest):
         module.atomic_move(tmpfile, dest, unsafe_writes=module.params['unsafe_writes'])
 
 
+def read_lines(f):
+
+    """ Yield the lines of the open file f without their line breaks,
+    splitting on the same \\n, \\r and \\r\\n as str.splitlines, one line
+    at a time. The caller closes f, python 2.4 allows no yield inside
+    try/finally """
+
+    for raw in f:
+        for line in raw.splitlines() or ['']:
+            yield line
+
+
+def ends_with_newline(path):
+    f = open(path, 'rb')
+    try:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) in ('\n', '\r')
+    finally:
+        f.close()
+
+
+class HashWriter(object):
+
+    """ Write to an optional file object while hashing what is written """
+
+    def __init__(self, f=None):
+        self.f = f
+        self.sha1 = hashlib.sha1()
+
+    def write(self, data):
+        self.sha1.update(data)
+        if self.f is not None:
+            self.f.write(data)
+
+
+def prepare_blocks(module):
+
+    """ Normalize the blocks option into (marker0, marker1, blocklines,
+    insertafter, insertbefore, insertre) tuples """
+
+    params = module.params
+    prepared = []
+    markers = set()
+    for item in params['blocks']:
+        if not isinstance(item, dict):
+            module.fail_json(msg='Each item of blocks must be a dict: %s' % item)
+        unknown = [k for k in item if k not in BLOCK_KEYS]
+        if unknown:
+            module.fail_json(msg='Unsupported keys in blocks item: %s' % ', '.join(unknown))
+
+        marker = item.get('marker', params['marker'])
+        block = item.get('block', item.get('content', ''))
+        present = item.get('state', params['state']) == 'present'
+        insertafter = item.get('insertafter', params['insertafter'])
+        insertbefore = item.get('insertbefore', params['insertbefore'])
+        if insertafter is not None and insertbefore is not None:
+            module.fail_json(msg='insertafter and insertbefore are mutually exclusive: %s' % marker)
+        if insertbefore is None and insertafter is None:
+            insertafter = 'EOF'
+
+        if insertafter not in (None, 'EOF'):
+            insertre = re.compile(insertafter)
+        elif insertbefore not in (None, 'BOF'):
+            insertre = re.compile(insertbefore)
+        else:
+            insertre = None
+
+        marker0 = re.sub(r'{mark}', 'BEGIN', marker)
+        marker1 = re.sub(r'{mark}', 'END', marker)
+        if marker0 in markers:
+            module.fail_json(msg='Duplicate marker in blocks: %s' % marker)
+        markers.add(marker0)
+
+        if present and block:
+            blocklines = [marker0] + block.splitlines() + [marker1]
+        else:
+            blocklines = []
+        prepared.append((marker0, marker1, blocklines, insertafter, insertbefore, insertre))
+    return prepared
+
+
+def apply_blocks(module, dest, path_exists):
+
+    """ Apply every item of blocks in one scan and one write of dest.
+    Returns whether the file changed and the path of the new contents,
+    which is None in check mode """
+
+    blocks = prepare_blocks(module)
+
+    # Markers are matched by prefix, index them by length so that each line
+    # costs one dict lookup per distinct marker length. The longest marker
+    # wins, so '# BEGIN host1' does not claim the lines of '# BEGIN host10'
+    marker_index = {}
+    for i, (marker0, marker1, blocklines, insertafter, insertbefore, insertre) in enumerate(blocks):
+        for which, marker in ((0, marker0), (1, marker1)):
+            marker_index.setdefault(len(marker), {})[marker] = (i, which)
+    marker_lengths = sorted(marker_index, reverse=True)
+    regexes = {}
+    for i, block in enumerate(blocks):
+        if block[5] is not None:
+            regexes.setdefault(block[5].pattern, (block[5], []))[1].append(i)
+
+    found = [[None, None] for block in blocks]
+    matched = [None] * len(blocks)
+    original_sha1 = hashlib.sha1()
+    nlines = 0
+    if path_exists:
+        f = open(dest, 'rb')
+        try:
+            for n, line in enumerate(read_lines(f)):
+                nlines = n + 1
+                for length in marker_lengths:
+                    hit = marker_index[length].get(line[:length])
+                    if hit is not None:
+                        found[hit[0]][hit[1]] = n
+                        break
+                for regex, ids in regexes.values():
+                    if regex.search(line):
+                        for i in ids:
+                            matched[i] = n
+        finally:
+            f.close()
+        f = open(dest, 'rb')
+        try:
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                original_sha1.update(chunk)
+        finally:
+            f.close()
+
+    # Work out what to remove and where to insert, against the original lines
+    removals = []
+    inserts = {}
+    for i, (marker0, marker1, blocklines, insertafter, insertbefore, insertre) in enumerate(blocks):
+        n0, n1 = found[i]
+        if None in (n0, n1):
+            if insertre is not None:
+                n0 = matched[i]
+                if n0 is None:
+                    n0 = nlines
+                elif insertafter is not None:
+                    n0 += 1
+            elif insertbefore is not None:
+                n0 = 0           # insertbefore=BOF
+            else:
+                n0 = nlines      # insertafter=EOF
+        else:
+            n0, n1 = min(n0, n1), max(n0, n1)
+            removals.append((n0, n1, marker0))
+        if blocklines:
+            inserts.setdefault(n0, []).append(blocklines)
+
+    removals.sort()
+    for prev, cur in zip(removals, removals[1:]):
+        if cur[0] <= prev[1]:
+            module.fail_json(msg='Blocks %s and %s overlap in %s' % (prev[2], cur[2], dest))
+
+    newline = path_exists and ends_with_newline(dest)
+    tmpfile = out = src = None
+    if not module.check_mode:
+        tmpfd, tmpfile = tempfile.mkstemp()
+        out = os.fdopen(tmpfd, 'wb')
+    writer = HashWriter(out)
+
+    state = {'first': True}
+
+    def emit(line):
+        if not state['first']:
+            writer.write('\n')
+        writer.write(line)
+        state['first'] = False
+
+    try:
+        removal = 0
+        lines = []
+        if path_exists:
+            src = open(dest, 'rb')
+            lines = read_lines(src)
+        for n, line in enumerate(lines):
+            for blocklines in inserts.get(n, ()):
+                for blockline in blocklines:
+                    emit(blockline)
+            while removal < len(removals) and removals[removal][1] < n:
+                removal += 1
+            if removal < len(removals) and removals[removal][0] <= n:
+                continue
+            emit(line)
+        for blocklines in inserts.get(nlines, ()):
+            for blockline in blocklines:
+                emit(blockline)
+        if newline and not state['first']:
+            writer.write('\n')
+    finally:
+        if src is not None:
+            src.close()
+        if out is not None:
+            out.close()
+
+    if path_exists:
+        changed = writer.sha1.digest() != original_sha1.digest()
+    else:
+        # Like a single absent block, nothing to remove does not create the file
+        changed = any(item.get('state', module.params['state']) == 'present'
+                      for item in module.params['blocks'])
+    if not changed and tmpfile:
+        os.remove(tmpfile)
+        tmpfile = None
+    return changed, tmpfile
+
+
 def check_file_attrs(module, changed, message):
 
     file_args = module.load_file_common_arguments(module.params)
@@ -197,8 +445,9 @@ def main():
             create=dict(default=False, type='bool'),
             backup=dict(default=False, type='bool'),
             validate=dict(default=None, type='str'),
+            blocks=dict(default=None, type='list'),
         ),
-        mutually_exclusive=[['insertbefore', 'insertafter']],
+        mutually_exclusive=[['insertbefore', 'insertafter'], ['block', 'blocks']],
         add_file_common_args=True,
         supports_check_mode=True
     )
@@ -213,10 +462,31 @@ def main():
                          msg='Destination %s is a directory !' % dest)
 
     path_exists = os.path.exists(dest)
+    if not path_exists and not module.boolean(params['create']):
+        module.fail_json(rc=257,
+                         msg='Destination %s does not exist !' % dest)
+
+    if params['blocks'] is not None:
+        changed, tmpfile = apply_blocks(module, dest, path_exists)
+        if not changed:
+            msg = ''
+        elif not path_exists:
+            msg = 'File created'
+        else:
+            msg = 'Blocks updated'
+
+        if changed and not module.check_mode:
+            if module.boolean(params['backup']) and path_exists:
+                module.backup_local(dest)
+            install_changes(module, tmpfile, dest)
+
+        if module.check_mode and not path_exists:
+            module.exit_json(changed=changed, msg=msg)
+
+        msg, changed = check_file_attrs(module, changed, msg)
+        module.exit_json(changed=changed, msg=msg)
+
     if not path_exists:
-        if not module.boolean(params['create']):
-            module.fail_json(rc=257,
-                             msg='Destination %s does not exist !' % dest)
         original = None
         lines = []
     else:
@@ -18,12 +18,17 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA"""
 
 import datetime
+import httplib
 import os
 import platform
+import Queue
 import socket
+import ssl
 import sys
+import threading
 import types
 import urllib
+from urlparse import urlsplit
 
 HAS_LIB_JSON = True
 try:
@@ -185,6 +190,20 @@ options:
       - Optional for putting an object into SDT (action=sdt)
     required: false
     default: 30
+  hosts:
+    description:
+      - A list of hosts to manage in a single task (target=host).
+      - Each entry is a dictionary which may set hostname (required), displayname, collector, description, groups, properties, alertenable, starttime and duration. Options which are not set in an entry are taken from the task.
+      - Collectors, host groups and hosts are listed once for the whole list and the result of each host is returned in C(results).
+    required: false
+    default: null
+    version_added: "2.3"
+  workers:
+    description:
+      - The number of hosts from C(hosts) which are managed concurrently.
+    required: false
+    default: 1
+    version_added: "2.3"
 ...
 '''
 EXAMPLES = '''
@@ -293,6 +312,32 @@ EXAMPLES = '''
           password='{{ password }}'
           collector='mycompany-Collector'
 
+    #example of adding many hosts at once
+    ---
+    - hosts: localhost
+      remote_user: '{{ username }}'
+      vars:
+        company: 'mycompany'
+        user: 'myusername'
+        password: 'mypassword'
+      tasks:
+      - name: Deploy LogicMonitor hosts
+        local_action:
+          module: logicmonitor
+          target: host
+          action: add
+          collector: 'mycompany-Collector'
+          company: '{{ company }}'
+          user: '{{ user }}'
+          password: '{{ password }}'
+          groups: "/servers/production"
+          workers: 10
+          hosts:
+            - hostname: web1.example.com
+            - hostname: db1.example.com
+              groups: "/servers/production/database"
+              properties: {'type': 'db'}
+
     #example of putting a host group in SDT
     ---
     - hosts: localhost
@@ -539,6 +584,12 @@ EXAMPLES = '''
 
 class LogicMonitor(object):
 
+    # RPCs which only read account state. Their responses are reused for
+    # the rest of the run, until a call which may change state is made.
+    CACHED_RPCS = frozenset(["getAgents", "getHost", "getHostGroup",
+                             "getHostGroups", "getHostProperties", "getHosts",
+                             "getTimeZoneSetting"])
+
     def __init__(self, module, **params):
         self.__version__ = "1.0-python"
         self.module = module
@@ -551,6 +602,54 @@ class LogicMonitor(object):
         self.fqdn = socket.getfqdn()
         self.lm_url = "logicmonitor.com/santaba"
         self.__version__ = self.__version__ + "-ansible-module"
+        self.http = threading.local()
+        self.rpc_cache = {}
+
+    def open(self, url, headers=None):
+        """Return the body of a GET request for url, reusing a single
+        keep-alive HTTPS connection per thread for all requests of this
+        run. Requests going through a proxy are left to open_url"""
+        if not hasattr(ssl, "create_default_context"):
+            # Without SSL contexts httplib can't verify certificates
+            return open_url(url, headers=headers).read()
+
+        parts = urlsplit(url)
+        if "https" in urllib.getproxies() and \
+                not urllib.proxy_bypass(parts.hostname):
+            # open_url goes through the https_proxy, honoring no_proxy
+            return open_url(url, headers=headers).read()
+        path = parts.path + "?" + parts.query
+
+        conn = getattr(self.http, "conn", None)
+        if conn is not None and self.http.host != parts.netloc:
+            conn.close()
+            conn = None
+
+        while True:
+            reused = conn is not None
+            if not reused:
+                self.module.debug("Opening connection to " + parts.netloc)
+                conn = httplib.HTTPSConnection(
+                    parts.netloc, context=ssl.create_default_context())
+                self.http.conn = conn
+                self.http.host = parts.netloc
+            try:
+                conn.request("GET", path, headers=headers or {})
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (httplib.HTTPException, socket.error):
+                conn.close()
+                conn = None
+                self.http.conn = None
+                # The server may have closed an idle connection; retry once
+                # on a fresh one
+                if reused:
+                    continue
+                raise IOError("Unable to reach " + parts.netloc)
+
+            if resp.status >= 400:
+                raise IOError("HTTP Error %d: %s" % (resp.status, resp.reason))
+            return raw
 
     def rpc(self, action, params):
         """Make a call to the LogicMonitor RPC library
@@ -568,6 +667,11 @@ class LogicMonitor(object):
 
         param_str = param_str + creds
 
+        cache_key = (action, param_str)
+        if cache_key in self.rpc_cache:
+            self.module.debug("Using cached response for " + action)
+            return self.rpc_cache[cache_key]
+
         try:
             url = ("https://" + self.company + "." + self.lm_url +
                    "/rpc/" + action + "?" + param_str)
@@ -575,19 +679,27 @@ class LogicMonitor(object):
             # Set custom LogicMonitor header with version
             headers = {"X-LM-User-Agent": self.__version__}
 
-            # Set headers
-            f = open_url(url, headers=headers)
-
-            raw = f.read()
+            raw = self.open(url, headers=headers)
             resp = json.loads(raw)
             if resp["status"] == 403:
                 self.module.debug("Authentication failed.")
                 self.fail(msg="Error: " + resp["errmsg"])
             else:
+                if action in self.CACHED_RPCS:
+                    if resp["status"] == 200:
+                        self.rpc_cache[cache_key] = raw
+                elif not action.startswith(("get", "verify")):
+                    self.invalidate()
                 return raw
         except IOError:
             self.fail(msg="Error: Unknown exception making RPC call")
 
+    def invalidate(self):
+        """Forget cached RPC responses after account state may have
+        changed"""
+        self.module.debug("Invalidating cached RPC responses")
+        self.rpc_cache.clear()
+
     def do(self, action, params):
         """Make a call to the LogicMonitor
          server \"do\" function"""
@@ -607,10 +719,9 @@ class LogicMonitor(object):
             self.module.debug("Attempting to open URL: " +
                               "https://" + self.company + "." + self.lm_url +
                               "/do/" + action + "?" + param_str)
-            f = open_url(
+            return self.open(
                 "https://" + self.company + "." + self.lm_url +
                 "/do/" + action + "?" + param_str)
-            return f.read()
         except IOError:
             # self.module.debug("Error opening URL. " + ioe)
             self.fail("Unknown exception opening URL")
@@ -1640,6 +1751,211 @@ class Host(LogicMonitor):
         return map(lambda x: x.strip(), groups)
 
 
+class HostBatchError(Exception):
+    """Raised instead of failing the module when a host of a batch fails"""
+    pass
+
+
+class HostBatchExit(Exception):
+    """Raised instead of exiting the module when a host of a batch is done"""
+    pass
+
+
+class HostBatch(LogicMonitor):
+
+    def __init__(self, params, module=None):
+        """Initializor for a batch of LogicMonitor hosts. Collectors,
+        host groups and hosts are listed once and indexed for all hosts
+        of the batch"""
+        self.change = False
+        self.params = params
+
+        LogicMonitor.__init__(self, module, **params)
+        self.module.debug("Instantiating HostBatch object")
+
+        self.check_mode = self.module.check_mode
+        self.workers = max(1, int(self.params["workers"]))
+        self.lock = threading.RLock()
+
+        self.module.debug("Indexing collectors")
+        self.collectors = {}
+        for collector in self.get_collectors() or []:
+            self.collectors[collector["description"]] = collector
+
+        self.module.debug("Making RPC call to 'getHostGroups'")
+        resp = json.loads(self.rpc("getHostGroups", {}))
+        if resp["status"] != 200:
+            self.fail(msg="Error: unable to list host groups.\n" +
+                          resp["errmsg"])
+
+        self.module.debug("Indexing host groups")
+        self.groups = {}
+        for group in resp["data"]:
+            self.groups[group["fullPath"]] = group
+
+        self.module.debug("Making RPC call to 'getHosts'")
+        resp = json.loads(self.rpc("getHosts", {"hostGroupId": 1}))
+        if resp["status"] != 200:
+            self.fail(msg="Error: unable to list hosts.\n" + resp["errmsg"])
+
+        self.module.debug("Indexing hosts")
+        self.hosts_by_displayname = {}
+        self.hosts_by_hostname = {}
+        for host in resp["data"]["hosts"]:
+            self.hosts_by_displayname[host["displayedAs"]] = host
+            self.hosts_by_hostname[(host["hostName"], host["agentId"])] = host
+
+    def get_group(self, fullpath):
+        """Returns the indexed group matching the specified path"""
+        return self.groups.get(fullpath.lstrip('/'))
+
+    def run(self, action):
+        """Run action for every host of the batch using up to
+        self.workers concurrent connections. Returns a list of
+        per host results"""
+        self.module.debug("Running HostBatch.run...")
+
+        specs = self.params["hosts"]
+        results = [None] * len(specs)
+        pending = Queue.Queue()
+        for index, spec in enumerate(specs):
+            pending.put((index, spec))
+
+        def worker():
+            while True:
+                try:
+                    index, spec = pending.get_nowait()
+                except Queue.Empty:
+                    return
+                results[index] = self.run_host(spec, action)
+
+        threads = []
+        for i in range(min(self.workers, len(specs))):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        for result in results:
+            if result["changed"]:
+                self.change = True
+        return results
+
+    def run_host(self, spec, action):
+        """Run action for a single host spec and return its result"""
+        result = {"hostname": spec.get("hostname"),
+                  "displayname": spec.get("displayname") or spec.get("hostname"),
+                  "changed": False,
+                  "failed": False}
+        host = None
+        try:
+            host = BatchHost(self, spec)
+            getattr(host, action)()
+        except HostBatchExit:
+            pass
+        except Exception:
+            result["failed"] = True
+            result["msg"] = str(sys.exc_info()[1])
+
+        if host is not None:
+            result["changed"] = host.change
+        return result
+
+
+class BatchHost(Host):
+
+    def __init__(self, batch, spec):
+        """Initializor for a LogicMonitor host managed as part of a batch.
+        Lookups are answered from the indexes of the batch and failures
+        are raised instead of exiting the module"""
+        self.change = False
+        self.batch = batch
+        self.params = dict(batch.params)
+        self.params.update(spec)
+        self.collector = None
+
+        LogicMonitor.__init__(self, batch.module, **self.params)
+        self.module.debug("Instantiating BatchHost object")
+
+        # Share the connections and RPC responses of the batch
+        self.http = batch.http
+        self.rpc_cache = batch.rpc_cache
+        self.check_mode = batch.check_mode
+
+        if not self.params["hostname"]:
+            self.fail(msg="Each entry of hosts requires a hostname.")
+        self.hostname = self.params["hostname"]
+        self.displayname = self.params["displayname"] or self.hostname
+
+        info = self.get_host_by_displayname(self.displayname)
+
+        if (info is not None and not spec.get("collector") and
+           "agentDescription" in info):
+            self.params["collector"] = info["agentDescription"]
+
+        if self.params["collector"]:
+            self.collector = batch.collectors.get(self.params["collector"])
+        else:
+            self.fail(msg="No collector specified.")
+
+        if info is None:
+            info = self.get_host_by_hostname(self.hostname, self.collector)
+
+        self.info = info
+        self.properties = self.params["properties"] or {}
+        self.description = self.params["description"]
+        self.starttime = self.params["starttime"]
+        self.duration = self.params["duration"]
+        self.alertenable = self.params["alertenable"]
+        groups = self.params["groups"]
+        if isinstance(groups, basestring):
+            groups = groups.split(",")
+        if groups is not None:
+            self.groups = self._strip_groups(groups)
+        else:
+            self.groups = None
+
+    def get_host_by_hostname(self, hostname, collector):
+        if collector:
+            return self.batch.hosts_by_hostname.get((hostname, collector["id"]))
+        return None
+
+    def get_host_by_displayname(self, displayname):
+        return self.batch.hosts_by_displayname.get(displayname)
+
+    def get_group(self, fullpath):
+        return self.batch.get_group(fullpath)
+
+    def create_group(self, fullpath):
+        """Create a path of host groups once for all hosts of the batch.
+        Returns the id of the hostgroup"""
+        self.batch.lock.acquire()
+        try:
+            group = self.get_group(fullpath)
+            if group:
+                return group["id"]
+
+            groupid = LogicMonitor.create_group(self, fullpath)
+            path = fullpath.lstrip('/')
+            self.batch.groups[path] = {"id": groupid, "fullPath": path}
+            return groupid
+        finally:
+            self.batch.lock.release()
+
+    def invalidate(self):
+        # The batch indexes are kept up to date explicitly
+        pass
+
+    def fail(self, msg):
+        raise HostBatchError(msg)
+
+    def exit(self, changed):
+        self.change = changed
+        raise HostBatchExit()
+
+
 class Datasource(LogicMonitor):
 
     def __init__(self, params, module=None):
@@ -2069,6 +2385,24 @@ def selector(module):
 
     if module.params["target"] == "collector":
         target = Collector(module.params, module)
+    elif module.params["target"] == "host" and module.params["hosts"]:
+        for i, spec in enumerate(module.params["hosts"]):
+            if not isinstance(spec, dict):
+                module.fail_json(
+                    msg="Error: hosts[%d] must be a dict of host options" % i)
+        batch = HostBatch(module.params, module)
+        actions = {"add": "create",
+                   "remove": "remove",
+                   "sdt": "sdt",
+                   "update": "update"}
+        results = batch.run(actions[module.params["action"].lower()])
+
+        failed = [r["displayname"] for r in results if r["failed"]]
+        if failed:
+            module.fail_json(msg="Error: unable to manage hosts: " +
+                                 ", ".join(failed),
+                             changed=batch.change, results=results)
+        module.exit_json(changed=batch.change, results=results)
     elif module.params["target"] == "host":
         # Make sure required parameter collector is specified
         if ((module.params["action"] == "add" or
@@ -2149,7 +2483,9 @@ def main():
             duration=dict(required=False, default=30),
             properties=dict(required=False, default={}, type="dict"),
             groups=dict(required=False, default=[], type="list"),
-            alertenable=dict(required=False, default="true", choices=BOOLEANS)
+            alertenable=dict(required=False, default="true", choices=BOOLEANS),
+            hosts=dict(required=False, default=None, type="list"),
+            workers=dict(required=False, default=1, type="int")
         ),
         supports_check_mode=True
     )
@@ -25,6 +25,7 @@ description:
   - You can specify multiple services at once by separating them with commas, .e.g., C(services=httpd,nfs,puppet).
   - When specifying what service to handle there is a special service value, I(host), which will handle alerts/downtime for the I(host itself), e.g., C(service=host). This keyword may not be given with other services at the same time. I(Setting alerts/downtime for a host does not affect alerts/downtime for any of the services running on it.) To schedule downtime for all services on particular host use keyword "all", e.g., C(service=all).
   - When using the M(nagios) module you will need to specify your Nagios server using the C(delegate_to) parameter.
+  - All commands generated by a task are written to the command file through a single open handle.
 version_added: "0.7"
 options:
   action:
@@ -38,7 +39,9 @@ options:
                "servicegroup_host_downtime" ]
   host:
     description:
-      - Host to operate on in Nagios.
+      - Host to operate on in Nagios. Separate multiple hosts with commas
+        to run the action for all of them at once.
+      - Multiple hosts were added in 2.3.
     required: false
     default: null
   cmdfile:
@@ -104,6 +107,9 @@ EXAMPLES = '''
 # schedule downtime for a few services
 - nagios: action=downtime services=frob,foobar,qeuz host={{ inventory_hostname }}
 
+# schedule downtime for ALL services on a list of hosts in one task
+- nagios: action=downtime minutes=45 service=all host={{ groups['web'] | join(',') }}
+
 # set 30 minutes downtime for all services in servicegroup foo
 - nagios: action=servicegroup_service_downtime minutes=30 servicegroup=foo host={{ inventory_hostname }}
 
@@ -145,6 +151,10 @@ import ConfigParser
 import types
 import time
 import os.path
+import select
+
+# Writes to a FIFO of at most this size are atomic
+PIPE_BUF = getattr(select, 'PIPE_BUF', 512)
 
 ######################################################################
 
@@ -312,7 +322,11 @@ class Nagios(object):
         self.action = kwargs['action']
         self.author = kwargs['author']
         self.comment = kwargs['comment']
-        self.host = kwargs['host']
+        if kwargs['host'] is None:
+            self.hosts = [None]
+        else:
+            self.hosts = [h.strip() for h in kwargs['host'].split(',')]
+        self.host = self.hosts[0]
         self.servicegroup = kwargs['servicegroup']
         self.minutes = int(kwargs['minutes'])
         self.cmdfile = kwargs['cmdfile']
@@ -323,6 +337,7 @@ class Nagios(object):
         else:
             self.services = kwargs['services'].split(',')
 
+        self.command_buffer = []
         self.command_results = []
 
     def _now(self):
@@ -334,15 +349,52 @@ class Nagios(object):
 
     def _write_command(self, cmd):
         """
-        Write the given command to the Nagios command file
+        Queue the given command for the Nagios command file. Queued
+        commands are written by _flush_commands().
+        """
+
+        self.command_buffer.append(cmd)
+        self.command_results.append(cmd.strip())
+
+    def _chunk_commands(self):
+        """
+        Join the queued commands into chunks of at most PIPE_BUF bytes,
+        never splitting a command. A command longer than PIPE_BUF gets a
+        chunk of its own.
+        """
+
+        chunks = []
+        chunk = ''
+        for cmd in self.command_buffer:
+            if chunk and len(chunk) + len(cmd) > PIPE_BUF:
+                chunks.append(chunk)
+                chunk = ''
+            chunk += cmd
+        chunks.append(chunk)
+        return chunks
+
+    def _flush_commands(self):
+        """
+        Write all queued commands to the Nagios command file through a
+        single open handle.
+
+        Commands are grouped into writes of at most PIPE_BUF bytes so
+        that each write to the FIFO stays atomic and no command gets
+        interleaved with commands other processes submit.
         """
 
+        if not self.command_buffer:
+            return
+
         try:
             fp = open(self.cmdfile, 'w')
-            fp.write(cmd)
-            fp.flush()
-            fp.close()
-            self.command_results.append(cmd.strip())
+            try:
+                for chunk in self._chunk_commands():
+                    fp.write(chunk)
+                    fp.flush()
+            finally:
+                fp.close()
+            self.command_buffer = []
         except IOError:
             self.module.fail_json(msg='unable to write to nagios command file',
                                   cmdfile=self.cmdfile)
@@ -936,25 +988,9 @@ class Nagios(object):
         cmd = 'ENABLE_NOTIFICATIONS'
         self._write_command(self._fmt_notif_str(cmd))
 
-    def nagios_cmd(self, cmd):
-        """
-        This sends an arbitrary command to nagios
-
-        It prepends the submitted time and appends a \n
-
-        You just have to provide the properly formatted command
-        """
-
-        pre = '[%s]' % int(time.time())
-
-        post = '\n'
-        cmdstr = '%s %s%s' % (pre, cmd, post)
-        self._write_command(cmdstr)
-
-    def act(self):
+    def _act(self):
         """
-        Figure out what you want to do from ansible, and then do the
-        needful (at the earliest).
+        Queue the commands for the requested action on self.host.
         """
         # host or service downtime?
         if self.action == 'downtime':
@@ -1021,10 +1057,42 @@ class Nagios(object):
             self.module.fail_json(msg="unknown action specified: '%s'" % \
                                       self.action)
 
+    def nagios_cmd(self, cmd):
+        """
+        This sends an arbitrary command to nagios
+
+        It prepends the submitted time and appends a \n
+
+        You just have to provide the properly formatted command
+        """
+
+        pre = '[%s]' % int(time.time())
+
+        post = '\n'
+        cmdstr = '%s %s%s' % (pre, cmd, post)
+        self._write_command(cmdstr)
+
+    def act(self):
+        """
+        Figure out what you want to do from ansible, and then do the
+        needful (at the earliest) for every host given.
+        """
+        for host in self.hosts:
+            self.host = host
+            self._act()
+            if self.action in ['servicegroup_host_downtime',
+                               'servicegroup_service_downtime',
+                               'silence_nagios', 'unsilence_nagios',
+                               'command']:
+                # Not host specific, only run these once
+                break
+
+        self._flush_commands()
         self.module.exit_json(nagios_commands=self.command_results,
                               changed=True)
 
 ######################################################################
 # import module snippets
 from ansible.module_utils.basic import *
-main()
+if __name__ == '__main__':
+    main()
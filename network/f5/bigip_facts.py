@@ -79,6 +79,68 @@ options:
     default: null
     choices: []
     aliases: []
+  fields:
+    description:
+      - Dictionary mapping a fact category to the list of fields to collect
+        for it. Only the iControl calls needed for those fields are made.
+        Categories that are not listed return all of their fields. Not
+        applicable for software, certificate and key fact categories.
+    required: false
+    default: {}
+    version_added: "2.3"
+  partition:
+    description:
+      - Only list objects in this partition instead of searching every
+        folder on the device.
+    required: false
+    default: null
+    version_added: "2.3"
+  recursive:
+    description:
+      - Also list objects in sub-folders of C(partition), or of C(/) when
+        no partition is given. Disabling this when C(partition) is set keeps
+        the device from walking the folder tree.
+    required: false
+    default: true
+    version_added: "2.3"
+  workers:
+    description:
+      - Maximum number of concurrent iControl sessions used to collect
+        facts. Fact categories, and the fields within each category, are
+        fetched in parallel when this is greater than 1. The seconds spent
+        on each category are returned in C(timings).
+    required: false
+    default: 1
+    version_added: "2.3"
+  cache:
+    description:
+      - Store each collected fact category on disk and reuse it on later
+        runs against the same server, user and filter. Cached categories are
+        discarded once their TTL expires or the device configuration
+        changes. Categories served from the cache are returned in C(cached).
+    required: false
+    default: false
+    version_added: "2.3"
+  cache_path:
+    description:
+      - Directory holding the fact cache.
+    required: false
+    default: ~/.ansible/bigip_facts_cache
+    version_added: "2.3"
+  cache_ttl:
+    description:
+      - Seconds a cached fact category remains valid.
+    required: false
+    default: 300
+    version_added: "2.3"
+  include_ttl:
+    description:
+      - Dictionary of per category TTLs, in seconds, overriding C(cache_ttl).
+        Useful for volatile categories such as C(system_info), whose time and
+        uptime fields change constantly.
+    required: false
+    default: {}
+    version_added: "2.3"
 extends_documentation_fragment: f5
 '''
 
@@ -90,6 +152,41 @@ EXAMPLES = '''
       password: "secret"
       include: "interface,vlan"
   delegate_to: localhost
+
+- name: Collect pool and virtual server facts over four sessions
+  bigip_facts:
+      server: "lb.mydomain.com"
+      user: "admin"
+      password: "secret"
+      include: "pool,virtual_server,node"
+      workers: 4
+  delegate_to: localhost
+
+- name: Collect cached node facts, refreshing system info every minute
+  bigip_facts:
+      server: "lb.mydomain.com"
+      user: "admin"
+      password: "secret"
+      include: "node,system_info"
+      cache: yes
+      cache_ttl: 3600
+      include_ttl:
+        system_info: 60
+  delegate_to: localhost
+
+- name: Collect only the members and status of pools in one partition
+  bigip_facts:
+      server: "lb.mydomain.com"
+      user: "admin"
+      password: "secret"
+      include: "pool"
+      partition: "tenant1"
+      recursive: no
+      fields:
+        pool:
+          - member
+          - object_status
+  delegate_to: localhost
 '''
 
 try:
@@ -99,10 +196,23 @@ except ImportError:
 else:
     bigsuds_found = True
 
+import copy
 import fnmatch
+import hashlib
+import json
+import os
 import re
+import sys
+import tempfile
+import threading
+import time
 import traceback
 
+try:
+    import Queue
+except ImportError:
+    import queue as Queue
+
 
 class F5(object):
     """F5 iControl class.
@@ -1371,19 +1481,219 @@ class ProvisionInfo(object):
         return result
 
 
-def generate_dict(api_obj, fields):
+class ConfigSync(object):
+    """Config sync class.
+
+    F5 BIG-IP configuration change tracking class.
+
+    Attributes:
+        api: iControl API instance.
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    def get_local_config_time(self):
+        variables = self.api.Management.DBVariable.query(['configsync.localconfigtime'])
+        return variables[0]['value']
+
+
+class FactCache(object):
+    """Fact cache class.
+
+    On-disk cache of fact categories. Entries are keyed by the connection
+    and filter they were collected with, expire after a per-category TTL and
+    are discarded as soon as the device configuration fingerprint changes.
+
+    Attributes:
+        path: Directory holding the cache files.
+        key: Values identifying the device and query; the selected fields
+            of each category are added per entry.
+        fingerprint: Configuration fingerprint of the device.
+    """
+
+    def __init__(self, path, key, fingerprint):
+        self.path = path
+        self.key = key
+        self.fingerprint = fingerprint
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, 0o700)
+
+    def filename(self, include, selected=None):
+        key = self.key + [include, sorted(selected or [])]
+        digest = hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + '.json')
+
+    def get(self, include, ttl, selected=None):
+        try:
+            f = open(self.filename(include, selected))
+            try:
+                entry = json.load(f)
+            finally:
+                f.close()
+        except (IOError, ValueError):
+            return None
+        if entry.get('fingerprint') != self.fingerprint:
+            return None
+        if time.time() - entry.get('created', 0) >= ttl:
+            return None
+        return entry.get('facts')
+
+    def set(self, include, facts, selected=None):
+        entry = dict(created=time.time(), fingerprint=self.fingerprint, facts=facts)
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        try:
+            f = os.fdopen(fd, 'w')
+            try:
+                json.dump(entry, f)
+            finally:
+                f.close()
+            os.rename(tmp, self.filename(include, selected))
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+
+class FactCollector(object):
+    """Fact collection engine.
+
+    Runs iControl calls over a bounded pool of bigsuds sessions so that
+    the fields of a fact category, and the fact categories themselves,
+    are fetched concurrently.
+
+    Attributes:
+        workers: Maximum number of concurrent iControl sessions.
+        timings: Seconds spent collecting each fact category.
+    """
+
+    def __init__(self, f5, connect, workers=1):
+        self.connect = connect
+        self.workers = max(1, workers)
+        self.timings = {}
+        self.connections = [f5]
+        self.idle = Queue.Queue()
+        self.idle.put(f5)
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except Queue.Empty:
+            pass
+        self.lock.acquire()
+        try:
+            if len(self.connections) < self.workers:
+                f5 = self.connect()
+                self.connections.append(f5)
+                return f5
+        finally:
+            self.lock.release()
+        return self.idle.get()
+
+    def release(self, f5):
+        self.idle.put(f5)
+
+    def call(self, func, *args):
+        f5 = self.acquire()
+        try:
+            return func(f5.get_api(), *args)
+        finally:
+            self.release(f5)
+
+    def invoke(self, api_obj, method):
+        # Rebind a copy of the API object to whichever session is free;
+        # bigsuds clients must not be shared between threads.
+        def _invoke(api):
+            bound = copy.copy(api_obj)
+            bound.api = api
+            return getattr(bound, method)()
+        return self.call(_invoke)
+
+    def map(self, func, items):
+        items = list(items)
+        if self.workers == 1 or len(items) < 2:
+            return [func(item) for item in items]
+
+        results = [None] * len(items)
+        errors = []
+        pending = Queue.Queue()
+        for index, item in enumerate(items):
+            pending.put((index, item))
+
+        def worker():
+            while not errors:
+                try:
+                    index, item = pending.get_nowait()
+                except Queue.Empty:
+                    return
+                try:
+                    results[index] = func(item)
+                except Exception:
+                    errors.append(sys.exc_info()[1])
+
+        threads = []
+        for i in range(min(self.workers, len(items))):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def fetch(self, api_obj, fields):
+        """Returns (field, response) pairs for the fields the device supports."""
+        def _fetch(field):
+            try:
+                return (field, self.invoke(api_obj, "get_" + field))
+            except (MethodNotFound, WebFault):
+                return None
+        return [x for x in self.map(_fetch, fields) if x is not None]
+
+    def collect(self, jobs):
+        """Runs (name, function, args) jobs, returning a dict of results by name.
+
+        Fact categories are independent, so they are collected concurrently
+        and share the session pool for their iControl calls.
+        """
+        def _collect(job):
+            name, func, args = job
+            start = time.time()
+            result = func(self, *args)
+            self.timings[name] = round(time.time() - start, 3)
+            return result
+
+        results = self.map(_collect, jobs)
+        return dict(zip([job[0] for job in jobs], results))
+
+
+def generate_config_fingerprint(collector):
+    system_info = collector.call(SystemInfo)
+    config_sync = collector.call(ConfigSync)
+    fields = [collector.invoke(system_info, 'get_system_id'),
+              collector.invoke(config_sync, 'get_local_config_time')]
+    return hashlib.sha1(json.dumps(fields).encode('utf-8')).hexdigest()
+
+
+def select_fields(fields, selected):
+    if not selected:
+        return fields
+    unknown = [x for x in selected if x not in fields]
+    if unknown:
+        raise ValueError("unsupported fields: %s, valid fields are: %s" % (",".join(unknown), ",".join(fields)))
+    return [x for x in fields if x in selected]
+
+
+def generate_dict(collector, api_obj, fields):
     result_dict = {}
     lists = []
     supported_fields = []
     if api_obj.get_list():
-        for field in fields:
-            try:
-                api_response = getattr(api_obj, "get_" + field)()
-            except (MethodNotFound, WebFault):
-                pass
-            else:
-                lists.append(api_response)
-                supported_fields.append(field)
+        for field, api_response in collector.fetch(api_obj, fields):
+            lists.append(api_response)
+            supported_fields.append(field)
         for i, j in enumerate(api_obj.get_list()):
             temp = {}
             temp.update([(item[0], item[1][i]) for item in zip(supported_fields, lists)])
@@ -1391,20 +1701,12 @@ def generate_dict(api_obj, fields):
     return result_dict
 
 
-def generate_simple_dict(api_obj, fields):
-    result_dict = {}
-    for field in fields:
-        try:
-            api_response = getattr(api_obj, "get_" + field)()
-        except (MethodNotFound, WebFault):
-            pass
-        else:
-            result_dict[field] = api_response
-    return result_dict
+def generate_simple_dict(collector, api_obj, fields):
+    return dict(collector.fetch(api_obj, fields))
 
 
-def generate_interface_dict(f5, regex):
-    interfaces = Interfaces(f5.get_api(), regex)
+def generate_interface_dict(collector, regex, selected=None):
+    interfaces = collector.call(Interfaces, regex)
     fields = ['active_media', 'actual_flow_control', 'bundle_state',
               'description', 'dual_media_state', 'enabled_state', 'if_index',
               'learning_mode', 'lldp_admin_status', 'lldp_tlvmap',
@@ -1415,30 +1717,33 @@ def generate_interface_dict(f5, regex):
               'sfp_media_state', 'stp_active_edge_port_state',
               'stp_enabled_state', 'stp_link_type',
               'stp_protocol_detection_reset_state']
-    return generate_dict(interfaces, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, interfaces, fields)
 
 
-def generate_self_ip_dict(f5, regex):
-    self_ips = SelfIPs(f5.get_api(), regex)
+def generate_self_ip_dict(collector, regex, selected=None):
+    self_ips = collector.call(SelfIPs, regex)
     fields = ['address', 'allow_access_list', 'description',
               'enforced_firewall_policy', 'floating_state', 'fw_rule',
               'netmask', 'staged_firewall_policy', 'traffic_group',
               'vlan', 'is_traffic_group_inherited']
-    return generate_dict(self_ips, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, self_ips, fields)
 
 
-def generate_trunk_dict(f5, regex):
-    trunks = Trunks(f5.get_api(), regex)
+def generate_trunk_dict(collector, regex, selected=None):
+    trunks = collector.call(Trunks, regex)
     fields = ['active_lacp_state', 'configured_member_count', 'description',
               'distribution_hash_option', 'interface', 'lacp_enabled_state',
               'lacp_timeout_option', 'link_selection_policy', 'media_speed',
               'media_status', 'operational_member_count', 'stp_enabled_state',
               'stp_protocol_detection_reset_state']
-    return generate_dict(trunks, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, trunks, fields)
 
 
-def generate_vlan_dict(f5, regex):
-    vlans = Vlans(f5.get_api(), regex)
+def generate_vlan_dict(collector, regex, selected=None):
+    vlans = collector.call(Vlans, regex)
     fields = ['auto_lasthop', 'cmp_hash_algorithm', 'description',
               'dynamic_forwarding', 'failsafe_action', 'failsafe_state',
               'failsafe_timeout', 'if_index', 'learning_mode',
@@ -1446,11 +1751,12 @@ def generate_vlan_dict(f5, regex):
               'sflow_poll_interval', 'sflow_poll_interval_global',
               'sflow_sampling_rate', 'sflow_sampling_rate_global',
               'source_check_state', 'true_mac_address', 'vlan_id']
-    return generate_dict(vlans, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, vlans, fields)
 
 
-def generate_vs_dict(f5, regex):
-    virtual_servers = VirtualServers(f5.get_api(), regex)
+def generate_vs_dict(collector, regex, selected=None):
+    virtual_servers = collector.call(VirtualServers, regex)
     fields = ['actual_hardware_acceleration', 'authentication_profile',
               'auto_lasthop', 'bw_controller_policy', 'clone_pool',
               'cmp_enable_mode', 'connection_limit', 'connection_mirror_state',
@@ -1467,11 +1773,12 @@ def generate_vs_dict(f5, regex):
               'source_address_translation_type', 'source_port_behavior',
               'staged_firewall_policy', 'translate_address_state',
               'translate_port_state', 'type', 'vlan', 'wildmask']
-    return generate_dict(virtual_servers, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, virtual_servers, fields)
 
 
-def generate_pool_dict(f5, regex):
-    pools = Pools(f5.get_api(), regex)
+def generate_pool_dict(collector, regex, selected=None):
+    pools = collector.call(Pools, regex)
     fields = ['action_on_service_down', 'active_member_count',
               'aggregate_dynamic_ratio', 'allow_nat_state',
               'allow_snat_state', 'client_ip_tos', 'client_link_qos',
@@ -1484,11 +1791,12 @@ def generate_pool_dict(f5, regex):
               'queue_on_connection_limit_state', 'queue_time_limit',
               'reselect_tries', 'server_ip_tos', 'server_link_qos',
               'simple_timeout', 'slow_ramp_time']
-    return generate_dict(pools, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, pools, fields)
 
 
-def generate_device_dict(f5, regex):
-    devices = Devices(f5.get_api(), regex)
+def generate_device_dict(collector, regex, selected=None):
+    devices = collector.call(Devices, regex)
     fields = ['active_modules', 'base_mac_address', 'blade_addresses',
               'build', 'chassis_id', 'chassis_type', 'comment',
               'configsync_address', 'contact', 'description', 'edition',
@@ -1497,69 +1805,76 @@ def generate_device_dict(f5, regex):
               'optional_modules', 'platform_id', 'primary_mirror_address',
               'product', 'secondary_mirror_address', 'software_version',
               'timelimited_modules', 'timezone', 'unicast_addresses']
-    return generate_dict(devices, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, devices, fields)
 
 
-def generate_device_group_dict(f5, regex):
-    device_groups = DeviceGroups(f5.get_api(), regex)
+def generate_device_group_dict(collector, regex, selected=None):
+    device_groups = collector.call(DeviceGroups, regex)
     fields = ['all_preferred_active', 'autosync_enabled_state', 'description',
               'device', 'full_load_on_sync_state',
               'incremental_config_sync_size_maximum',
               'network_failover_enabled_state', 'sync_status', 'type']
-    return generate_dict(device_groups, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, device_groups, fields)
 
 
-def generate_traffic_group_dict(f5, regex):
-    traffic_groups = TrafficGroups(f5.get_api(), regex)
+def generate_traffic_group_dict(collector, regex, selected=None):
+    traffic_groups = collector.call(TrafficGroups, regex)
     fields = ['auto_failback_enabled_state', 'auto_failback_time',
               'default_device', 'description', 'ha_load_factor',
               'ha_order', 'is_floating', 'mac_masquerade_address',
               'unit_id']
-    return generate_dict(traffic_groups, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, traffic_groups, fields)
 
 
-def generate_rule_dict(f5, regex):
-    rules = Rules(f5.get_api(), regex)
+def generate_rule_dict(collector, regex, selected=None):
+    rules = collector.call(Rules, regex)
     fields = ['definition', 'description', 'ignore_vertification',
               'verification_status']
-    return generate_dict(rules, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, rules, fields)
 
 
-def generate_node_dict(f5, regex):
-    nodes = Nodes(f5.get_api(), regex)
+def generate_node_dict(collector, regex, selected=None):
+    nodes = collector.call(Nodes, regex)
     fields = ['address', 'connection_limit', 'description', 'dynamic_ratio',
               'monitor_instance', 'monitor_rule', 'monitor_status',
               'object_status', 'rate_limit', 'ratio', 'session_status']
-    return generate_dict(nodes, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, nodes, fields)
 
 
-def generate_virtual_address_dict(f5, regex):
-    virtual_addresses = VirtualAddresses(f5.get_api(), regex)
+def generate_virtual_address_dict(collector, regex, selected=None):
+    virtual_addresses = collector.call(VirtualAddresses, regex)
     fields = ['address', 'arp_state', 'auto_delete_state', 'connection_limit',
               'description', 'enabled_state', 'icmp_echo_state',
               'is_floating_state', 'netmask', 'object_status',
               'route_advertisement_state', 'traffic_group']
-    return generate_dict(virtual_addresses, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, virtual_addresses, fields)
 
 
-def generate_address_class_dict(f5, regex):
-    address_classes = AddressClasses(f5.get_api(), regex)
+def generate_address_class_dict(collector, regex, selected=None):
+    address_classes = collector.call(AddressClasses, regex)
     fields = ['address_class', 'description']
-    return generate_dict(address_classes, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, address_classes, fields)
 
 
-def generate_certificate_dict(f5, regex):
-    certificates = Certificates(f5.get_api(), regex)
+def generate_certificate_dict(collector, regex):
+    certificates = collector.call(Certificates, regex)
     return dict(zip(certificates.get_list(), certificates.get_certificate_list()))
 
 
-def generate_key_dict(f5, regex):
-    keys = Keys(f5.get_api(), regex)
+def generate_key_dict(collector, regex):
+    keys = collector.call(Keys, regex)
     return dict(zip(keys.get_list(), keys.get_key_list()))
 
 
-def generate_client_ssl_profile_dict(f5, regex):
-    profiles = ProfileClientSSL(f5.get_api(), regex)
+def generate_client_ssl_profile_dict(collector, regex, selected=None):
+    profiles = collector.call(ProfileClientSSL, regex)
     fields = ['alert_timeout', 'allow_nonssl_state', 'authenticate_depth',
               'authenticate_once_state', 'ca_file', 'cache_size',
               'cache_timeout', 'certificate_file', 'chain_file',
@@ -1579,11 +1894,12 @@ def generate_client_ssl_profile_dict(f5, regex):
               'server_name', 'session_ticket_state', 'sni_default_state',
               'sni_require_state', 'ssl_option', 'strict_resume_state',
               'unclean_shutdown_state', 'is_base_profile', 'is_system_profile']
-    return generate_dict(profiles, fields)
+    fields = select_fields(fields, selected)
+    return generate_dict(collector, profiles, fields)
 
 
-def generate_system_info_dict(f5):
-    system_info = SystemInfo(f5.get_api())
+def generate_system_info_dict(collector, selected=None):
+    system_info = collector.call(SystemInfo)
     fields = ['base_mac_address',
               'blade_temperature', 'chassis_slot_information',
               'globally_unique_identifier', 'group_id',
@@ -1592,19 +1908,21 @@ def generate_system_info_dict(f5):
               'product_information', 'pva_version', 'system_id',
               'system_information', 'time',
               'time_zone', 'uptime']
-    return generate_simple_dict(system_info, fields)
+    fields = select_fields(fields, selected)
+    return generate_simple_dict(collector, system_info, fields)
 
 
-def generate_software_list(f5):
-    software = Software(f5.get_api())
-    software_list = software.get_all_software_status()
+def generate_software_list(collector):
+    software = collector.call(Software)
+    software_list = collector.invoke(software, 'get_all_software_status')
     return software_list
 
 
-def generate_provision_dict(f5):
-    provisioned = ProvisionInfo(f5.get_api())
+def generate_provision_dict(collector, selected=None):
+    provisioned = collector.call(ProvisionInfo)
     fields = ['list', 'provisioned_list']
-    return generate_simple_dict(provisioned, fields)
+    fields = select_fields(fields, selected)
+    return generate_simple_dict(collector, provisioned, fields)
 
 
 def main():
@@ -1614,6 +1932,14 @@ def main():
         session=dict(type='bool', default=False),
         include=dict(type='list', required=True),
         filter=dict(type='str', required=False),
+        workers=dict(type='int', default=1),
+        cache=dict(type='bool', default=False),
+        cache_path=dict(type='path', default='~/.ansible/bigip_facts_cache'),
+        cache_ttl=dict(type='int', default=300),
+        include_ttl=dict(type='dict', default={}),
+        fields=dict(type='dict', default={}),
+        partition=dict(type='str', required=False),
+        recursive=dict(type='bool', default=True),
     )
     argument_spec.update(meta_args)
 
@@ -1631,6 +1957,14 @@ def main():
     validate_certs = module.params['validate_certs']
     session = module.params['session']
     fact_filter = module.params['filter']
+    workers = module.params['workers']
+    use_cache = module.params['cache']
+    cache_path = module.params['cache_path']
+    cache_ttl = module.params['cache_ttl']
+    include_ttl = module.params['include_ttl']
+    fields = module.params['fields']
+    partition = module.params['partition']
+    recursive = module.params['recursive']
 
     if validate_certs:
         import ssl
@@ -1650,66 +1984,118 @@ def main():
     include_test = map(lambda x: x in valid_includes, include)
     if not all(include_test):
         module.fail_json(msg="value of include must be one or more of: %s, got: %s" % (",".join(valid_includes), ",".join(include)))
+    for key, value in fields.items():
+        if key not in valid_includes or key in ('certificate', 'key', 'software'):
+            module.fail_json(msg="fields can not be selected for fact category: %s" % key)
+        if not isinstance(value, list):
+            fields[key] = [x.strip() for x in str(value).split(',')]
+
+    if partition:
+        folder = "/" + partition.strip("/")
+    else:
+        folder = "/"
+    if recursive:
+        query_state = "STATE_ENABLED"
+    else:
+        query_state = "STATE_DISABLED"
+
+    def connect():
+        # Additional sessions need the same folder and query state as the
+        # first one; without sessions that state is already shared.
+        conn = F5(server, user, password, session, validate_certs, server_port)
+        if session:
+            conn.set_active_folder(folder)
+            conn.set_recursive_query_state(query_state)
+        return conn
 
     try:
         facts = {}
+        timings = {}
+        cached = []
 
         if len(include) > 0:
             f5 = F5(server, user, password, session, validate_certs, server_port)
-            saved_active_folder = f5.get_active_folder()
-            saved_recursive_query_state = f5.get_recursive_query_state()
-            if saved_active_folder != "/":
-                f5.set_active_folder("/")
-            if saved_recursive_query_state != "STATE_ENABLED":
-                f5.enable_recursive_query_state()
-
+            collector = FactCollector(f5, connect, workers)
+            jobs = []
             if 'interface' in include:
-                facts['interface'] = generate_interface_dict(f5, regex)
+                jobs.append(('interface', generate_interface_dict, (regex, fields.get('interface'))))
             if 'self_ip' in include:
-                facts['self_ip'] = generate_self_ip_dict(f5, regex)
+                jobs.append(('self_ip', generate_self_ip_dict, (regex, fields.get('self_ip'))))
             if 'trunk' in include:
-                facts['trunk'] = generate_trunk_dict(f5, regex)
+                jobs.append(('trunk', generate_trunk_dict, (regex, fields.get('trunk'))))
             if 'vlan' in include:
-                facts['vlan'] = generate_vlan_dict(f5, regex)
+                jobs.append(('vlan', generate_vlan_dict, (regex, fields.get('vlan'))))
             if 'virtual_server' in include:
-                facts['virtual_server'] = generate_vs_dict(f5, regex)
+                jobs.append(('virtual_server', generate_vs_dict, (regex, fields.get('virtual_server'))))
             if 'pool' in include:
-                facts['pool'] = generate_pool_dict(f5, regex)
+                jobs.append(('pool', generate_pool_dict, (regex, fields.get('pool'))))
             if 'provision' in include:
-                facts['provision'] = generate_provision_dict(f5)
+                jobs.append(('provision', generate_provision_dict, (fields.get('provision'),)))
             if 'device' in include:
-                facts['device'] = generate_device_dict(f5, regex)
+                jobs.append(('device', generate_device_dict, (regex, fields.get('device'))))
             if 'device_group' in include:
-                facts['device_group'] = generate_device_group_dict(f5, regex)
+                jobs.append(('device_group', generate_device_group_dict, (regex, fields.get('device_group'))))
             if 'traffic_group' in include:
-                facts['traffic_group'] = generate_traffic_group_dict(f5, regex)
+                jobs.append(('traffic_group', generate_traffic_group_dict, (regex, fields.get('traffic_group'))))
             if 'rule' in include:
-                facts['rule'] = generate_rule_dict(f5, regex)
+                jobs.append(('rule', generate_rule_dict, (regex, fields.get('rule'))))
             if 'node' in include:
-                facts['node'] = generate_node_dict(f5, regex)
+                jobs.append(('node', generate_node_dict, (regex, fields.get('node'))))
             if 'virtual_address' in include:
-                facts['virtual_address'] = generate_virtual_address_dict(f5, regex)
+                jobs.append(('virtual_address', generate_virtual_address_dict, (regex, fields.get('virtual_address'))))
             if 'address_class' in include:
-                facts['address_class'] = generate_address_class_dict(f5, regex)
+                jobs.append(('address_class', generate_address_class_dict, (regex, fields.get('address_class'))))
             if 'software' in include:
-                facts['software'] = generate_software_list(f5)
+                jobs.append(('software', generate_software_list, ()))
             if 'certificate' in include:
-                facts['certificate'] = generate_certificate_dict(f5, regex)
+                jobs.append(('certificate', generate_certificate_dict, (regex,)))
             if 'key' in include:
-                facts['key'] = generate_key_dict(f5, regex)
+                jobs.append(('key', generate_key_dict, (regex,)))
             if 'client_ssl_profile' in include:
-                facts['client_ssl_profile'] = generate_client_ssl_profile_dict(f5, regex)
+                jobs.append(('client_ssl_profile', generate_client_ssl_profile_dict, (regex, fields.get('client_ssl_profile'))))
             if 'system_info' in include:
-                facts['system_info'] = generate_system_info_dict(f5)
-
-            # restore saved state
-            if saved_active_folder and saved_active_folder != "/":
-                f5.set_active_folder(saved_active_folder)
-            if saved_recursive_query_state and \
-               saved_recursive_query_state != "STATE_ENABLED":
-                f5.set_recursive_query_state(saved_recursive_query_state)
-
-        result = {'ansible_facts': facts}
+                jobs.append(('system_info', generate_system_info_dict, (fields.get('system_info'),)))
+
+            if use_cache:
+                cache = FactCache(cache_path,
+                                  [server, server_port, user, folder,
+                                   recursive, fact_filter],
+                                  generate_config_fingerprint(collector))
+                missing = []
+                for job in jobs:
+                    ttl = include_ttl.get(job[0], cache_ttl)
+                    cached_facts = cache.get(job[0], ttl, fields.get(job[0]))
+                    if cached_facts is None:
+                        missing.append(job)
+                    else:
+                        facts[job[0]] = cached_facts
+                        cached.append(job[0])
+                jobs = missing
+
+            if jobs:
+                saved_active_folder = f5.get_active_folder()
+                saved_recursive_query_state = f5.get_recursive_query_state()
+                if saved_active_folder != folder:
+                    f5.set_active_folder(folder)
+                if saved_recursive_query_state != query_state:
+                    f5.set_recursive_query_state(query_state)
+
+                collected = collector.collect(jobs)
+                facts.update(collected)
+                timings = collector.timings
+
+                # restore saved state
+                if saved_active_folder and saved_active_folder != folder:
+                    f5.set_active_folder(saved_active_folder)
+                if saved_recursive_query_state and \
+                   saved_recursive_query_state != query_state:
+                    f5.set_recursive_query_state(saved_recursive_query_state)
+
+                if use_cache:
+                    for name, value in collected.items():
+                        cache.set(name, value, fields.get(name))
+
+        result = {'ansible_facts': facts, 'timings': timings, 'cached': cached}
 
     except Exception as e:
         module.fail_json(msg="received exception: %s\ntraceback: %s" % (e, traceback.format_exc()))
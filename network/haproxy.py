@@ -37,6 +37,15 @@ options:
       - Name of the HAProxy backend pool.
     required: false
     default: auto-detected
+  backends:
+    description:
+      - List of HAProxy backend pools to change the host in. All commands are
+        sent over a single socket connection and, with C(wait), all backends
+        are polled together from one C(show stat) per retry.
+      - Mutually exclusive with C(backend).
+    required: false
+    default: null
+    version_added: "2.3"
   host:
     description:
       - Name of the backend host to change.
@@ -123,6 +132,13 @@ EXAMPLES = '''
 # enable server in 'www' backend pool wait until healthy. Retry 10 times with intervals of 5 seconds to retrieve the health
 - haproxy: state=enabled host={{ inventory_hostname }} backend=www wait=yes wait_retries=10 wait_interval=5
 
+# disable server in several backend pools at once and wait for all of them
+- haproxy:
+    state: disabled
+    host: "{{ inventory_hostname }}"
+    backends: [ www, api, static ]
+    wait: yes
+
 # enable server in 'www' backend pool with change server(s) weight
 - haproxy: state=enabled host={{ inventory_hostname }} socket=/var/run/haproxy.sock weight=10 backend=www
 
@@ -131,6 +147,7 @@ author: "Ravi Bhure (@ravibhure)"
 
 import socket
 import csv
+import re
 import time
 from string import Template
 
@@ -140,6 +157,7 @@ RECV_SIZE = 1024
 ACTION_CHOICES = ['enabled', 'disabled']
 WAIT_RETRIES=25
 WAIT_INTERVAL=5
+PROMPT_RE = re.compile(r'(?:^|\n)> ')
 
 ######################################################################
 class TimeoutException(Exception):
@@ -163,6 +181,7 @@ class HAProxy(object):
         self.state = self.module.params['state']
         self.host = self.module.params['host']
         self.backend = self.module.params['backend']
+        self.backends = self.module.params['backends']
         self.weight = self.module.params['weight']
         self.socket = self.module.params['socket']
         self.shutdown_sessions = self.module.params['shutdown_sessions']
@@ -192,6 +211,32 @@ class HAProxy(object):
         return result
 
 
+    def execute_many(self, cmds, capture_output=True):
+        """
+        Executes several HAProxy commands over a single connection to the local
+        UNIX socket, using interactive mode so the connection is kept open
+        between commands. Returns the output of each command.
+        """
+        self.client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.client.connect(self.socket)
+        self.client.sendall('prompt\n%s\nquit\n' % '\n'.join(cmds))
+        result = ''
+        buf = self.client.recv(RECV_SIZE)
+        while buf:
+            result += buf
+            buf = self.client.recv(RECV_SIZE)
+        self.client.close()
+
+        # Every command's output is preceded by a prompt, the first chunk
+        # belongs to the prompt command itself
+        outputs = [o.strip() for o in PROMPT_RE.split(result)[1:len(cmds) + 1]]
+        outputs += [''] * (len(cmds) - len(outputs))
+        if capture_output:
+            for cmd, output in zip(cmds, outputs):
+                self.capture_command_output(cmd, output)
+        return outputs
+
+
     def capture_command_output(self, cmd, output):
         """
         Capture the output for a command
@@ -204,14 +249,41 @@ class HAProxy(object):
         self.command_results['output'].append(output)
 
 
+    def snapshot(self):
+        """
+        Read 'show stat' once and index it by (pxname, svname). Returns the
+        index and the list of backend pxnames in the order HAProxy reports them.
+        """
+        data = self.execute('show stat', 200, False).lstrip('# ')
+        stats = {}
+        backends = []
+        for d in csv.DictReader(data.splitlines()):
+            stats[(d['pxname'], d['svname'])] = { 'status': d['status'], 'weight': d['weight'] }
+            if d['svname'] == 'BACKEND':
+                backends.append(d['pxname'])
+        self.stats = stats
+        self.all_backends = backends
+        return stats
+
+
     def discover_all_backends(self):
         """
         Discover all entries with svname = 'BACKEND' and return a list of their corresponding
         pxnames
         """
-        data = self.execute('show stat', 200, False).lstrip('# ')
-        r = csv.DictReader(data.splitlines())
-        return map(lambda d: d['pxname'], filter(lambda d: d['svname'] == 'BACKEND', r))
+        self.snapshot()
+        return self.all_backends
+
+
+    def requested_backends(self, pxname):
+        """
+        Backends the command applies to, from the last snapshot when none were given.
+        """
+        if pxname is None:
+            return self.all_backends
+        if isinstance(pxname, list):
+            return pxname
+        return [pxname]
 
 
     def execute_for_backends(self, cmd, pxname, svname, wait_for_status = None):
@@ -219,32 +291,30 @@ class HAProxy(object):
         Run some command on the specified backends. If no backends are provided they will
         be discovered automatically (all backends)
         """
-        # Discover backends if none are given
-        if pxname is None:
-            backends = self.discover_all_backends()
-        else:
-            backends = [pxname]
+        backends = self.requested_backends(pxname)
 
-        # Run the command for each requested backend
-        for backend in backends:
-            # Fail when backends were not found
-            state = self.get_state_for(backend, svname)
-            if (self.fail_on_not_found or self.wait) and state is None:
-                self.module.fail_json(msg="The specified backend '%s/%s' was not found!" % (backend, svname))
+        # Fail when backends were not found, before anything is changed
+        if self.fail_on_not_found or self.wait:
+            for backend in backends:
+                if (backend, svname) not in self.stats:
+                    self.module.fail_json(msg="The specified backend '%s/%s' was not found!" % (backend, svname))
 
-            self.execute(Template(cmd).substitute(pxname = backend, svname = svname))
-            if self.wait:
-                self.wait_until_status(backend, svname, wait_for_status)
+        cmds = [Template(cmd).substitute(pxname = backend, svname = svname) for backend in backends]
+        if cmds:
+            self.execute_many(cmds)
+        if self.wait:
+            self.wait_until_status(backends, svname, wait_for_status)
 
 
-    def get_state_for(self, pxname, svname):
+    def get_state_for(self, pxname, svname, refresh=True):
         """
         Find the state of specific services. When pxname is not set, get all backends for a specific host.
         Returns a list of dictionaries containing the status and weight for those services.
         """
-        data = self.execute('show stat', 200, False).lstrip('# ')
-        r = csv.DictReader(data.splitlines())
-        state = map(lambda d: { 'status': d['status'], 'weight': d['weight'] }, filter(lambda d: (pxname is None or d['pxname'] == pxname) and d['svname'] == svname, r))
+        if refresh:
+            self.snapshot()
+        state = [self.stats[(backend, svname)] for backend in self.requested_backends(pxname)
+                 if (backend, svname) in self.stats]
         return state or None
 
 
@@ -253,18 +323,19 @@ class HAProxy(object):
         Wait for a service to reach the specified status. Try RETRIES times
         with INTERVAL seconds of sleep in between. If the service has not reached
         the expected status in that time, the module will fail. If the service was 
-        not found, the module will fail.
+        not found, the module will fail. When several backends are given they are
+        all checked from the same snapshot.
         """
+        pending = self.requested_backends(pxname)
         for i in range(1, self.wait_retries):
-            state = self.get_state_for(pxname, svname)
-
-            # We can assume there will only be 1 element in state because both svname and pxname are always set when we get here
-            if state[0]['status'] == status:
+            stats = self.snapshot()
+            pending = [backend for backend in pending
+                       if stats.get((backend, svname), {}).get('status') != status]
+            if not pending:
                 return True
-            else:
-                time.sleep(self.wait_interval)
+            time.sleep(self.wait_interval)
 
-        self.module.fail_json(msg="server %s/%s not status '%s' after %d retries. Aborting." % (pxname, svname, status, self.wait_retries))
+        self.module.fail_json(msg="server %s/%s not status '%s' after %d retries. Aborting." % (', '.join(pending), svname, status, self.wait_retries))
 
 
     def enabled(self, host, backend, weight):
@@ -295,20 +366,22 @@ class HAProxy(object):
         """
         Figure out what you want to do from ansible, and then do it.
         """
+        backend = self.backends or self.backend
+
         # Get the state before the run
-        state_before = self.get_state_for(self.backend, self.host)
+        state_before = self.get_state_for(backend, self.host)
         self.command_results['state_before'] = state_before
 
         # toggle enable/disbale server
         if self.state == 'enabled':
-            self.enabled(self.host, self.backend, self.weight)
+            self.enabled(self.host, backend, self.weight)
         elif self.state == 'disabled':
-            self.disabled(self.host, self.backend, self.shutdown_sessions)
+            self.disabled(self.host, backend, self.shutdown_sessions)
         else:
             self.module.fail_json(msg="unknown state specified: '%s'" % self.state)
 
         # Get the state after the run
-        state_after = self.get_state_for(self.backend, self.host)
+        state_after = self.get_state_for(backend, self.host)
         self.command_results['state_after'] = state_after
 
         # Report change status
@@ -328,6 +401,7 @@ def main():
             state = dict(required=True, default=None, choices=ACTION_CHOICES),
             host=dict(required=True, default=None),
             backend=dict(required=False, default=None),
+            backends=dict(required=False, default=None, type='list'),
             weight=dict(required=False, default=None),
             socket = dict(required=False, default=DEFAULT_SOCKET_LOCATION),
             shutdown_sessions=dict(required=False, default=False, type='bool'),
@@ -336,6 +410,7 @@ def main():
             wait_retries=dict(required=False, default=WAIT_RETRIES, type='int'),
             wait_interval=dict(required=False, default=WAIT_INTERVAL, type='int'),
         ),
+        mutually_exclusive=[['backend', 'backends']],
     )
 
     if not socket:
@@ -58,70 +58,94 @@ EXAMPLES = '''
 '''
 
 import os
-
-def get_local_version(pear_output):
-    """Take pear remoteinfo output and get the installed version"""
-    lines = pear_output.split('\n')
-    for line in lines:
-        if 'Installed ' in line:
-            installed = line.rsplit(None, 1)[-1].strip()
-            if installed == '-': continue
-            return installed
-    return None
-
-def get_repository_version(pear_output):
-    """Take pear remote-info output and get the latest version"""
-    lines = pear_output.split('\n')
-    for line in lines:
-        if 'Latest ' in line:
-            return line.rsplit(None, 1)[-1].strip()
-    return None
-
-def query_package(module, name, state="present"):
-    """Query the package status in both the local system and the repository.
-    Returns a boolean to indicate if the package is installed,
-    and a second boolean to indicate if the package is up-to-date."""
-    if state == "present":
-        lcmd = "pear info %s" % (name)
-        lrc, lstdout, lstderr = module.run_command(lcmd, check_rc=False)
-        if lrc != 0:
-            # package is not installed locally
-            return False, False
-
-        rcmd = "pear remote-info %s" % (name)
-        rrc, rstdout, rstderr = module.run_command(rcmd, check_rc=False)
-
-        # get the version installed locally (if any)
-        lversion = get_local_version(rstdout)
-
-        # get the version in the repository
-        rversion = get_repository_version(rstdout)
-
-        if rrc == 0:
-            # Return True to indicate that the package is installed locally,
-            # and the result of the version number comparison
-            # to determine if the package is up-to-date.
-            return True, (lversion == rversion)
-
-        return False, False
+import re
+
+def package_keys(channel, name):
+    """The names a package can be requested by: bare, or prefixed with its
+    channel or the channel alias"""
+    name = name.lower()
+    keys = [name]
+    if channel:
+        channel = channel.lower()
+        keys.append("%s/%s" % (channel, name))
+        keys.append("%s/%s" % (channel.split('.')[0], name))
+    return keys
+
+
+def lookup(packages, name):
+    """Find a requested package name in a dict built with package_keys. A
+    name with a channel prefix only matches a package of that channel"""
+    return packages.get(name.lower())
+
+
+def query_packages(module, latest=False):
+    """Query the installed packages of all channels with a single pear list,
+    and, when latest is set, the available upgrades with a single
+    pear list-upgrades.
+    Returns a dict of the installed versions and a dict of the repository
+    versions of the packages that are not up-to-date."""
+    rc, stdout, stderr = module.run_command("pear list -a", check_rc=False)
+    if rc != 0:
+        module.fail_json(msg="could not list installed packages", stderr=stderr)
+
+    installed = {}
+    channel = None
+    for line in stdout.split('\n'):
+        match = re.match(r'^INSTALLED PACKAGES, CHANNEL (\S+):', line)
+        if match:
+            channel = match.group(1)
+            continue
+        fields = line.split()
+        if len(fields) < 2 or fields[0] == 'PACKAGE' or line.startswith('='):
+            continue
+        for key in package_keys(channel, fields[0]):
+            installed[key] = fields[1]
+
+    outdated = {}
+    if latest:
+        rc, stdout, stderr = module.run_command("pear list-upgrades", check_rc=False)
+        for line in stdout.split('\n'):
+            # CHANNEL PACKAGE LOCAL (state) REMOTE (state) SIZE
+            fields = line.split()
+            if len(fields) < 4 or fields[0] == 'CHANNEL' or '.' not in fields[0]:
+                continue
+            remote = [field for field in fields[2:] if not field.startswith('(')]
+            if len(remote) > 1:
+                version = remote[1]
+            else:
+                version = remote[0]
+            for key in package_keys(fields[0], fields[1]):
+                outdated[key] = version
+
+    return installed, outdated
+
+
+def query_package_states(module, packages, latest=False):
+    """Returns a dict of the (installed, updated) status of each package"""
+    installed, outdated = query_packages(module, latest)
+    status = {}
+    for package in packages:
+        status[package] = (lookup(installed, package) is not None,
+                           lookup(outdated, package) is None)
+    return status
 
 
 def remove_packages(module, packages):
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        installed, updated = query_package(module, package)
-        if not installed:
-            continue
+    # Query the packages first, to see if we even need to remove
+    status = query_package_states(module, packages)
+    to_remove = [package for package in packages if status[package][0]]
 
-        cmd = "pear uninstall %s" % (package)
+    if to_remove:
+        cmd = "pear uninstall %s" % (" ".join(to_remove))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
+            # Query again so we can report the packages that failed
+            status = query_package_states(module, to_remove)
+            failed = [package for package in to_remove if status[package][0]] or to_remove
+            module.fail_json(msg="failed to remove %s" % (", ".join(failed)))
 
-        remove_c += 1
+    remove_c = len(to_remove)
 
     if remove_c > 0:
 
@@ -133,26 +157,30 @@ def remove_packages(module, packages):
 def install_packages(module, state, packages):
     install_c = 0
 
-    for i, package in enumerate(packages):
-        # if the package is installed and state == present
-        # or state == latest and is up-to-date then skip
-        installed, updated = query_package(module, package)
-        if installed and (state == 'present' or (state == 'latest' and updated)):
-            continue
+    status = query_package_states(module, packages, state == 'latest')
+
+    # if the package is installed and state == present
+    # or state == latest and is up-to-date then skip
+    to_install = [package for package in packages
+                  if not (status[package][0] and (state == 'present' or (state == 'latest' and status[package][1])))]
 
-        if state == 'present':
-            command = 'install'
+    if state == 'present':
+        command = 'install'
 
-        if state == 'latest':
-            command = 'upgrade'
+    if state == 'latest':
+        command = 'upgrade'
 
-        cmd = "pear %s %s" % (command, package)
+    if to_install:
+        cmd = "pear %s %s" % (command, " ".join(to_install))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to install %s" % (package))
+            # Query again so we can report the packages that failed
+            status = query_package_states(module, to_install, state == 'latest')
+            failed = [package for package in to_install if not all(status[package])] or to_install
+            module.fail_json(msg="failed to install %s" % (", ".join(failed)))
 
-        install_c += 1
+        install_c = len(to_install)
 
     if install_c > 0:
         module.exit_json(changed=True, msg="installed %s package(s)" % (install_c))
@@ -162,8 +190,9 @@ def install_packages(module, state, packages):
 
 def check_packages(module, packages, state):
     would_be_changed = []
+    status = query_package_states(module, packages, state == 'latest')
     for package in packages:
-        installed, updated = query_package(module, package)
+        installed, updated = status[package]
         if ((state in ["present", "latest"] and not installed) or
                 (state == "absent" and installed) or
                 (state == "latest" and not updated)):
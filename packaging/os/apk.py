@@ -99,39 +99,64 @@ def update_package_db(module):
     else:
         module.fail_json(msg="could not update package db")
 
-def query_package(module, name):
-    cmd = "%s -v info --installed %s" % (APK_PATH, name)
-    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    if rc == 0:
-        return True
-    else:
-        return False
+def split_package(package):
+    # name-version-rN, or name-version for virtual packages
+    match = re.match(r"^(.+)-([^-]+-r\d+)$", package) or re.match(r"^(.+)-([^-]+)$", package)
+    if match:
+        return match.groups()
+    return package, None
 
-def query_latest(module, name):
-    cmd = "%s version %s" % (APK_PATH, name)
+def query_packages(module):
+    # name -> version of all the installed packages
+    cmd = "%s -v info" % (APK_PATH)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    search_pattern = "(%s)-[\d\.\w]+-[\d\w]+\s+(.)\s+[\d\.\w]+-[\d\w]+\s+" % (name)
-    match = re.search(search_pattern, stdout)
-    if match and match.group(2) == "<":
-        return False
-    return True
-
-def query_virtual(module, name):
-    cmd = "%s -v info --description %s" % (APK_PATH, name)
+    if rc != 0:
+        module.fail_json(msg="could not list installed packages")
+    installed = {}
+    for line in stdout.splitlines():
+        if line.strip() and not line.startswith('WARNING'):
+            name, version = split_package(line.strip())
+            installed[name] = version
+    return installed
+
+def query_outdated(module):
+    # names of the installed packages with a newer version available
+    cmd = "%s version -l '<'" % (APK_PATH)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    search_pattern = "^%s: virtual meta package" % (name)
-    if re.search(search_pattern, stdout):
-        return True
-    return False
+    outdated = set()
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and fields[1] == '<':
+            outdated.add(split_package(fields[0])[0])
+    return outdated
 
-def get_dependencies(module, name):
-    cmd = "%s -v info --depends %s" % (APK_PATH, name)
+def query_sections(module, option, names):
+    # name -> lines of the "<package> <section>:" blocks apk info prints for each name
+    cmd = "%s -v info %s %s" % (APK_PATH, option, " ".join(names))
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    dependencies = stdout.split()
-    if len(dependencies) > 1:
-        return dependencies[1:]
-    else:
-        return []
+    sections = {}
+    lines = None
+    for line in stdout.splitlines():
+        match = re.match(r"^(\S+) [\w ]+:$", line)
+        inline = re.match(r"^(\S+): (.+)$", line)
+        if match:
+            lines = sections.setdefault(split_package(match.group(1))[0], [])
+        elif inline:
+            # the one line "<package>: <value>" form
+            sections.setdefault(inline.group(1), []).append(inline.group(2).strip())
+            sections.setdefault(split_package(inline.group(1))[0], []).append(inline.group(2).strip())
+        elif line.strip() and lines is not None:
+            lines.append(line.strip())
+    return sections
+
+def get_virtual_dependencies(module, names):
+    # name -> dependencies of the virtual packages among names
+    descriptions = query_sections(module, '--description', names)
+    virtual = [name for name in names if 'virtual meta package' in descriptions.get(name, [])]
+    if not virtual:
+        return {}
+    dependencies = query_sections(module, '--depends', virtual)
+    return dict((name, dependencies.get(name, [])) for name in virtual)
 
 def upgrade_packages(module):
     if module.check_mode:
@@ -147,26 +172,23 @@ def upgrade_packages(module):
 
 def install_packages(module, names, state):
     upgrade = False
-    to_install = []
     to_upgrade = []
-    for name in names:
-        # Check if virtual package
-        if query_virtual(module, name):
-            # Get virtual package dependencies
-            dependencies = get_dependencies(module, name)
-            for dependency in dependencies:
-                if state == 'latest' and not query_latest(module, dependency):
+    installed = query_packages(module)
+    to_install = [name for name in names if name not in installed]
+    if state == 'latest':
+        outdated = query_outdated(module)
+        present = [name for name in names if name in installed]
+        # Virtual packages are upgraded through their dependencies
+        virtual = present and get_virtual_dependencies(module, present) or {}
+        for name in present:
+            for dependency in virtual.get(name, [name]):
+                if dependency in outdated and dependency not in to_upgrade:
                     to_upgrade.append(dependency)
-        else:
-            if not query_package(module, name):
-                to_install.append(name)
-            elif state == 'latest' and not query_latest(module, name):
-                to_upgrade.append(name)
     if to_upgrade:
         upgrade = True
     if not to_install and not upgrade:
         module.exit_json(changed=False, msg="package(s) already installed")
-    packages = " ".join(to_install) + " ".join(to_upgrade)
+    packages = " ".join(to_install + to_upgrade)
     if upgrade:
         if module.check_mode:
             cmd = "%s add --upgrade --simulate %s" % (APK_PATH, packages)
@@ -183,10 +205,8 @@ def install_packages(module, names, state):
     module.exit_json(changed=True, msg="installed %s package(s)" % (packages))
 
 def remove_packages(module, names):
-    installed = []
-    for name in names:
-        if query_package(module, name):
-            installed.append(name)
+    packages = query_packages(module)
+    installed = [name for name in names if name in packages]
     if not installed:
         module.exit_json(changed=False, msg="package(s) already removed")
     names = " ".join(installed)
@@ -59,7 +59,6 @@ EXAMPLES = '''
 - opkg: name=foo state=present force=overwrite
 '''
 
-import pipes
 
 def update_package_db(module, opkg_path):
     """ Updates packages list. """
@@ -70,16 +69,21 @@ def update_package_db(module, opkg_path):
         module.fail_json(msg="could not update package db")
 
 
-def query_package(module, opkg_path, name, state="present"):
-    """ Returns whether a package is installed or not. """
+def query_packages(module, opkg_path):
+    """ Returns a dict of the installed packages and their versions. """
 
-    if state == "present":
+    rc, out, err = module.run_command("%s list-installed" % opkg_path)
+    if rc != 0:
+        module.fail_json(msg="could not list installed packages: %s" % err)
 
-        rc, out, err = module.run_command("%s list-installed | grep -q \"^%s \"" % (pipes.quote(opkg_path), pipes.quote(name)), use_unsafe_shell=True)
-        if rc == 0:
-            return True
+    installed = {}
+    for line in out.splitlines():
+        # <name> - <version>[ - <description>]
+        fields = line.split(" - ")
+        if len(fields) >= 2:
+            installed[fields[0].strip()] = fields[1].strip()
 
-        return False
+    return installed
 
 
 def remove_packages(module, opkg_path, packages):
@@ -90,19 +94,19 @@ def remove_packages(module, opkg_path, packages):
     if force:
         force = "--force-%s" % force
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        if not query_package(module, opkg_path, package):
-            continue
-
-        rc, out, err = module.run_command("%s remove %s %s" % (opkg_path, force, package))
+    # Query the packages first, to see if we even need to remove
+    installed = query_packages(module, opkg_path)
+    to_remove = [package for package in packages if package in installed]
+    remove_c = len(to_remove)
 
-        if query_package(module, opkg_path, package):
-            module.fail_json(msg="failed to remove %s: %s" % (package, out))
+    if to_remove and not module.check_mode:
+        rc, out, err = module.run_command("%s remove %s %s" % (opkg_path, force, " ".join(to_remove)))
 
-        remove_c += 1
+        # Query again so we can report the packages that failed
+        installed = query_packages(module, opkg_path)
+        failed = [package for package in to_remove if package in installed]
+        if failed:
+            module.fail_json(msg="failed to remove %s: %s" % (", ".join(failed), out))
 
     if remove_c > 0:
 
@@ -119,18 +123,18 @@ def install_packages(module, opkg_path, packages):
     if force:
         force = "--force-%s" % force
 
-    install_c = 0
-
-    for package in packages:
-        if query_package(module, opkg_path, package):
-            continue
-
-        rc, out, err = module.run_command("%s install %s %s" % (opkg_path, force, package))
+    installed = query_packages(module, opkg_path)
+    to_install = [package for package in packages if package not in installed]
+    install_c = len(to_install)
 
-        if not query_package(module, opkg_path, package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out))
+    if to_install and not module.check_mode:
+        rc, out, err = module.run_command("%s install %s %s" % (opkg_path, force, " ".join(to_install)))
 
-        install_c += 1
+        # Query again so we can report the packages that failed
+        installed = query_packages(module, opkg_path)
+        failed = [package for package in to_install if package not in installed]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s" % (", ".join(failed), out))
 
     if install_c > 0:
         module.exit_json(changed=True, msg="installed %s package(s)" % (install_c))
@@ -145,14 +149,15 @@ def main():
             state = dict(default="present", choices=["present", "installed", "absent", "removed"]),
             force = dict(default="", choices=["", "depends", "maintainer", "reinstall", "overwrite", "downgrade", "space", "postinstall", "remove", "checksum", "removal-of-dependent-packages"]),
             update_cache = dict(default="no", aliases=["update-cache"], type='bool')
-        )
+        ),
+        supports_check_mode = True
     )
 
     opkg_path = module.get_bin_path('opkg', True, ['/bin'])
 
     p = module.params
 
-    if p["update_cache"]:
+    if p["update_cache"] and not module.check_mode:
         update_package_db(module, opkg_path)
 
     pkgs = p["name"].split(",")
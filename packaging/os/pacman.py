@@ -118,38 +118,45 @@ import os
 import re
 import sys
 
-def get_version(pacman_output):
-    """Take pacman -Qi or pacman -Si output and get the Version"""
-    lines = pacman_output.split('\n')
-    for line in lines:
-        if 'Version' in line:
-            return line.split(':')[1].strip()
-    return None
-
-def query_package(module, pacman_path, name, state="present"):
-    """Query the package status in both the local system and the repository. Returns a boolean to indicate if the package is installed, a second boolean to indicate if the package is up-to-date and a third boolean to indicate whether online information were available"""
-    if state == "present":
-        lcmd = "%s -Qi %s" % (pacman_path, name)
-        lrc, lstdout, lstderr = module.run_command(lcmd, check_rc=False)
-        if lrc != 0:
+def query_packages(module, pacman_path, names):
+    """Query the status of all names with a single pacman -Q and pacman -Sl. Returns a dict of tuples by name: a boolean to indicate if the package is installed, a second boolean to indicate if the package is up-to-date and a third boolean to indicate whether online information were unavailable"""
+    rc, stdout, stderr = module.run_command("%s -Q" % pacman_path, check_rc=False)
+    local = {}
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) >= 2:
+            local[fields[0]] = fields[1]
+
+    remote = {}
+    rc, stdout, stderr = module.run_command("%s -Sl" % pacman_path, check_rc=False)
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) >= 3:
+            # pacman -Si reports the first repository carrying the package
+            remote.setdefault(fields[1], fields[2])
+            remote.setdefault('%s/%s' % (fields[0], fields[1]), fields[2])
+
+    status = {}
+    for name in names:
+        lversion = local.get(name.split('/')[-1])
+        if lversion is None:
             # package is not installed locally
-            return False, False, False
-
-        # get the version installed locally (if any)
-        lversion = get_version(lstdout)
-
-        rcmd = "%s -Si %s" % (pacman_path, name)
-        rrc, rstdout, rstderr = module.run_command(rcmd, check_rc=False)
-        # get the version in the repository
-        rversion = get_version(rstdout)
+            status[name] = (False, False, False)
+        elif name in remote:
+            status[name] = (True, lversion == remote[name], False)
+        else:
+            # package is installed but cannot fetch remote Version. Last True stands for the error
+            status[name] = (True, True, True)
+    return status
 
-        if rrc == 0:
-            # Return True to indicate that the package is installed locally, and the result of the version number comparison
-            # to determine if the package is up-to-date.
-            return True, (lversion == rversion), False
 
-    # package is installed but cannot fetch remote Version. Last True stands for the error
-        return True, True, True
+def failed_packages(stderr, packages):
+    """Packages named in the errors of a failed transaction, all of them when none is named"""
+    failed = []
+    for package in packages:
+        if re.search(r'(^|[\s:\'"])%s([\s:\'"]|$)' % re.escape(package), stderr, re.MULTILINE):
+            failed.append(package)
+    return failed or packages
 
 
 def update_package_db(module, pacman_path):
@@ -194,21 +201,22 @@ def remove_packages(module, pacman_path, packages):
     else:
         args = "R"
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        installed, updated, unknown = query_package(module, pacman_path, package)
-        if not installed:
-            continue
+    # Query the packages first, to see if we even need to remove
+    status = query_packages(module, pacman_path, packages)
+    to_remove = [package for package in packages if status[package][0]]
 
-        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, package)
+    remove_c = 0
+    if to_remove:
+        # Remove everything in one transaction
+        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, " ".join(to_remove))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
+            # report the packages that failed
+            failed = failed_packages(stderr, to_remove)
+            module.fail_json(msg="failed to remove %s" % (", ".join(failed)), stdout=stdout, stderr=stderr)
 
-        remove_c += 1
+        remove_c = len(to_remove)
 
     if remove_c > 0:
 
@@ -222,9 +230,12 @@ def install_packages(module, pacman_path, state, packages, package_files):
     package_err = []
     message = ""
 
+    status = query_packages(module, pacman_path, packages)
+    to_sync = []
+    to_upgrade = []
     for i, package in enumerate(packages):
         # if the package is installed and state == present or state == latest and is up-to-date then skip
-        installed, updated, latestError = query_package(module, pacman_path, package)
+        installed, updated, latestError = status[package]
         if latestError and state == 'latest':
             package_err.append(package)
 
@@ -232,17 +243,24 @@ def install_packages(module, pacman_path, state, packages, package_files):
             continue
 
         if package_files[i]:
-            params = '-U %s' % package_files[i]
+            to_upgrade.append((package, package_files[i]))
         else:
-            params = '-S %s' % package
+            to_sync.append((package, package))
+
+    # One transaction for the repository packages and one for the package files
+    for op, targets in (('-S', to_sync), ('-U', to_upgrade)):
+        if not targets:
+            continue
 
-        cmd = "%s %s --noconfirm --needed" % (pacman_path, params)
+        cmd = "%s %s %s --noconfirm --needed" % (pacman_path, op, " ".join(target for package, target in targets))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to install %s" % (package))
+            # report the packages that failed
+            failed = failed_packages(stderr, [target for package, target in targets])
+            module.fail_json(msg="failed to install %s" % (", ".join(failed)), stdout=stdout, stderr=stderr)
 
-        install_c += 1
+        install_c += len(targets)
 
     if state == 'latest' and len(package_err) > 0:
         message = "But could not ensure 'latest' state for %s package(s) as remote version could not be fetched." % (package_err)
@@ -254,8 +272,9 @@ def install_packages(module, pacman_path, state, packages, package_files):
 
 def check_packages(module, pacman_path, packages, state):
     would_be_changed = []
+    status = query_packages(module, pacman_path, packages)
     for package in packages:
-        installed, updated, unknown = query_package(module, pacman_path, package)
+        installed, updated, unknown = status[package]
         if ((state in ["present", "latest"] and not installed) or
                 (state == "absent" and installed) or
                 (state == "latest" and not updated)):
@@ -272,16 +291,24 @@ def check_packages(module, pacman_path, packages, state):
 def expand_package_groups(module, pacman_path, pkgs):
     expanded = []
 
-    for pkg in pkgs:
-        cmd = "%s -Sgq %s" % (pacman_path, pkg)
+    # List the known groups once, then expand all the requested ones together
+    rc, stdout, stderr = module.run_command("%s -Sg" % pacman_path, check_rc=False)
+    groups = set(line.strip() for line in stdout.split('\n') if line.strip())
+
+    members = {}
+    requested = [pkg for pkg in pkgs if pkg in groups]
+    if requested:
+        cmd = "%s -Sg %s" % (pacman_path, " ".join(requested))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+        for line in stdout.split('\n'):
+            fields = line.split()
+            if len(fields) == 2:
+                members.setdefault(fields[0], []).append(fields[1])
 
-        if rc == 0:
+    for pkg in pkgs:
+        if pkg in members:
             # A group was found matching the name, so expand it
-            for name in stdout.split('\n'):
-                name = name.strip()
-                if name:
-                    expanded.append(name)
+            expanded.extend(members[pkg])
         else:
             expanded.append(pkg)
 
@@ -121,72 +121,38 @@ EXAMPLES = '''
 
 import re
 
-def query_package(module, name):
-    """Search for the package by name.
+def query_packages(module):
+    """List the installed packages.
 
-    Possible return values:
-    * "present"  - installed, no upgrade needed
-    * "outdated" - installed, but can be upgraded
-    * False      - not installed or not found
+    Returns a dict of the installed package names and their versions,
+    from a single "pkgin list".
     """
 
-    # test whether '-p' (parsable) flag is supported.
-    rc, out, err = module.run_command("%s -p -v" % PKGIN_PATH)
+    rc, out, err = module.run_command("%s list" % PKGIN_PATH)
 
-    if rc == 0:
-        pflag = '-p'
-        splitchar = ';'
-    else:
-        pflag = ''
-        splitchar = ' '
-
-    # Use "pkgin search" to find the package. The regular expression will
-    # only match on the complete name.
-    rc, out, err = module.run_command("%s %s search \"^%s$\"" % (PKGIN_PATH, pflag, name))
-
-    # rc will not be 0 unless the search was a success
-    if rc == 0:
-
-        # Search results may contain more than one line (e.g., 'emacs'), so iterate
-        # through each line to see if we have a match.
-        packages = out.split('\n')
+    if rc != 0:
+        module.fail_json(msg="could not list installed packages: %s" % err)
 
-        for package in packages:
+    installed = {}
 
-            # Break up line at spaces.  The first part will be the package with its
-            # version (e.g. 'gcc47-libs-4.7.2nb4'), and the second will be the state
-            # of the package:
-            #     ''  - not installed
-            #     '<' - installed but out of date
-            #     '=' - installed and up to date
-            #     '>' - installed but newer than the repository version
-            pkgname_with_version, raw_state = package.split(splitchar)[0:2]
+    for package in out.split('\n'):
 
-            # Search for package, stripping version
-            # (results in sth like 'gcc47-libs' or 'emacs24-nox11')
-            pkg_search_obj = re.search(r'^(.*?)\-[0-9][0-9.]*(nb[0-9]+)*', pkgname_with_version, re.M)
+        # The first part is the package with its version (e.g.
+        # 'gcc47-libs-4.7.2nb4'), separated from the comment by a space, or
+        # a ';' in parsable output
+        pkgname_with_version = re.split(r'[;\s]', package.strip(), 1)[0]
 
-            # Do not proceed unless we have a match
-            if not pkg_search_obj:
-                continue
+        # Split the version off the package name
+        # (results in sth like 'gcc47-libs' or 'emacs24-nox11')
+        pkg_search_obj = re.search(r'^(.*?)\-([0-9][0-9.]*(nb[0-9]+)*.*)$', pkgname_with_version)
 
-            # Grab matched string
-            pkgname_without_version = pkg_search_obj.group(1)
-
-            if name != pkgname_without_version:
-                continue
+        # Do not proceed unless we have a match
+        if not pkg_search_obj:
+            continue
 
-            # The package was found; now return its state
-            if raw_state == '<':
-                return 'outdated'
-            elif raw_state == '=' or raw_state == '>':
-                return 'present'
-            else:
-                return False
-            # no fall-through
+        installed[pkg_search_obj.group(1)] = pkg_search_obj.group(2)
 
-        # No packages were matched, so return False
-        return False
+    return installed
 
 
 def format_action_message(module, action, count):
@@ -229,21 +195,21 @@ def format_pkgin_command(module, command, package=None):
 
 def remove_packages(module, packages):
 
-    remove_c = 0
-
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        if not query_package(module, package):
-            continue
+    # Query the packages first, to see if we even need to remove
+    installed = query_packages(module)
+    to_remove = [package for package in packages if package in installed]
+    remove_c = len(to_remove)
 
+    if to_remove:
         rc, out, err = module.run_command(
-            format_pkgin_command(module, "remove", package))
+            format_pkgin_command(module, "remove", " ".join(to_remove)))
 
-        if not module.check_mode and query_package(module, package):
-            module.fail_json(msg="failed to remove %s: %s" % (package, out))
-
-        remove_c += 1
+        if not module.check_mode:
+            # Query again so we can report the packages that failed
+            installed = query_packages(module)
+            failed = [package for package in to_remove if package in installed]
+            if failed:
+                module.fail_json(msg="failed to remove %s: %s" % (", ".join(failed), out))
 
     if remove_c > 0:
         module.exit_json(changed=True, msg=format_action_message(module, "removed", remove_c))
@@ -253,19 +219,20 @@ def remove_packages(module, packages):
 
 def install_packages(module, packages):
 
-    install_c = 0
-
-    for package in packages:
-        if query_package(module, package):
-            continue
+    installed = query_packages(module)
+    to_install = [package for package in packages if package not in installed]
+    install_c = len(to_install)
 
+    if to_install:
         rc, out, err = module.run_command(
-            format_pkgin_command(module, "install", package))
-
-        if not module.check_mode and not query_package(module, package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out))
-
-        install_c += 1
+            format_pkgin_command(module, "install", " ".join(to_install)))
+
+        if not module.check_mode:
+            # Query again so we can report the packages that failed
+            installed = query_packages(module)
+            failed = [package for package in to_install if package not in installed]
+            if failed:
+                module.fail_json(msg="failed to install %s: %s" % (", ".join(failed), out))
 
     if install_c > 0:
         module.exit_json(changed=True, msg=format_action_message(module, "installed", install_c))
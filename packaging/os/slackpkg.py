@@ -67,40 +67,62 @@ EXAMPLES = '''
 '''
 
 
-def query_package(module, slackpkg_path, name):
+def query_packages(module, slackpkg_path):
+    """ Returns a dict of the installed packages and their versions. """
 
-    import glob
+    import os
     import platform
+    import re
 
+    # Accept the packages of the whole arch family of the machine: 32-bit
+    # x86 packages are built as i486 or i586 while the machine is i686
     machine = platform.machine()
-    packages = glob.glob("/var/log/packages/%s-*-[%s|noarch]*" % (name,
-                                                                  machine))
+    if re.match(r"^i[3-6]86$", machine):
+        family = r"i[3-6]86"
+    elif machine.startswith("arm"):
+        family = r"arm.*"
+    else:
+        family = re.escape(machine)
+    archs = re.compile(r"^(%s|noarch|fw)$" % family)
+    installed = {}
 
-    if len(packages) > 0:
-        return True
+    try:
+        entries = os.listdir("/var/log/packages")
+    except OSError:
+        entries = []
 
-    return False
+    for entry in entries:
+        # <name>-<version>-<arch>-<build>
+        fields = entry.rsplit("-", 3)
+        if len(fields) == 4 and archs.match(fields[2]):
+            installed[fields[0]] = fields[1]
 
+    return installed
+
+
+def run_slackpkg(module, slackpkg_path, action, packages):
+    """ Runs one slackpkg action for all packages. """
+
+    return module.run_command("%s -default_answer=y -batch=on %s %s"
+                              % (slackpkg_path, action, " ".join(packages)))
 
-def remove_packages(module, slackpkg_path, packages):
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        if not query_package(module, slackpkg_path, package):
-            continue
+def remove_packages(module, slackpkg_path, packages):
 
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s -default_answer=y -batch=on \
-                                              remove %s" % (slackpkg_path,
-                                              package))
+    # Query the packages first, to see if we even need to remove
+    installed = query_packages(module, slackpkg_path)
+    to_remove = [package for package in packages if package in installed]
+    remove_c = len(to_remove)
 
-        if not module.check_mode and query_package(module, slackpkg_path,
-                                                   package):
-            module.fail_json(msg="failed to remove %s: %s" % (package, out))
+    if to_remove and not module.check_mode:
+        rc, out, err = run_slackpkg(module, slackpkg_path, "remove", to_remove)
 
-        remove_c += 1
+        # Query again so we can report the packages that failed
+        installed = query_packages(module, slackpkg_path)
+        failed = [package for package in to_remove if package in installed]
+        if failed:
+            module.fail_json(msg="failed to remove %s: %s"
+                             % (", ".join(failed), out))
 
     if remove_c > 0:
 
@@ -111,23 +133,21 @@ def remove_packages(module, slackpkg_path, packages):
 
 def install_packages(module, slackpkg_path, packages):
 
-    install_c = 0
-
-    for package in packages:
-        if query_package(module, slackpkg_path, package):
-            continue
+    installed = query_packages(module, slackpkg_path)
+    to_install = [package for package in packages if package not in installed]
+    install_c = len(to_install)
 
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s -default_answer=y -batch=on \
-                                              install %s" % (slackpkg_path,
-                                              package))
+    if to_install and not module.check_mode:
+        rc, out, err = run_slackpkg(module, slackpkg_path, "install",
+                                    to_install)
 
-        if not module.check_mode and not query_package(module, slackpkg_path,
-                                                       package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out),
-                             stderr=err)
-
-        install_c += 1
+        # Query again so we can report the packages that failed
+        installed = query_packages(module, slackpkg_path)
+        failed = [package for package in to_install
+                  if package not in installed]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s"
+                             % (", ".join(failed), out), stderr=err)
 
     if install_c > 0:
         module.exit_json(changed=True, msg="present %s package(s)"
@@ -137,20 +157,17 @@ def install_packages(module, slackpkg_path, packages):
 
 
 def upgrade_packages(module, slackpkg_path, packages):
-    install_c = 0
-
-    for package in packages:
-        if not module.check_mode:
-            rc, out, err = module.run_command("%s -default_answer=y -batch=on \
-                                              upgrade %s" % (slackpkg_path,
-                                              package))
+    install_c = len(packages)
 
-        if not module.check_mode and not query_package(module, slackpkg_path,
-                                                       package):
-            module.fail_json(msg="failed to install %s: %s" % (package, out),
-                             stderr=err)
+    if packages and not module.check_mode:
+        rc, out, err = run_slackpkg(module, slackpkg_path, "upgrade",
+                                    packages)
 
-        install_c += 1
+        installed = query_packages(module, slackpkg_path)
+        failed = [package for package in packages if package not in installed]
+        if failed:
+            module.fail_json(msg="failed to install %s: %s"
+                             % (", ".join(failed), out), stderr=err)
 
     if install_c > 0:
         module.exit_json(changed=True, msg="present %s package(s)"
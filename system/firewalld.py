@@ -86,6 +86,32 @@ options:
     required: false
     default: null
     version_added: "2.1"
+  services:
+    description:
+      - "Complete list of the services of the zone. With C(state=enabled) the zone is converged to exactly these services, with C(state=disabled) they are removed from it."
+      - "The permanent and runtime settings of the zone are fetched once, the differences applied with a single permanent update and the runtime calls for the changed items only."
+      - "Can be combined with C(ports), C(sources) and C(rich_rules), but not with the single item options."
+    required: false
+    default: null
+    version_added: "2.3"
+  ports:
+    description:
+      - "Complete list of the ports of the zone, in the form PORT/PROTOCOL or PORT-PORT/PROTOCOL. See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
+  sources:
+    description:
+      - "Complete list of the sources of the zone. See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
+  rich_rules:
+    description:
+      - "Complete list of the rich rules of the zone. See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
 notes:
   - Not tested on any Debian based system.
   - Requires the python2 bindings of firewalld, which may not be installed by default if the distribution switched to python 3 
@@ -102,6 +128,17 @@ EXAMPLES = '''
 - firewalld: source='192.0.2.0/24' zone=internal state=enabled
 - firewalld: zone=trusted interface=eth2 permanent=true state=enabled
 - firewalld: masquerade=yes state=enabled permanent=true zone=dmz
+
+# Converge the whole zone in one go
+- firewalld:
+    zone: public
+    permanent: true
+    immediate: true
+    state: enabled
+    services: [ssh, http, https]
+    ports: [8080/tcp, 161-162/udp]
+    rich_rules:
+      - 'rule family="ipv4" source address="192.0.2.0/24" service name="ftp" accept'
 '''
 
 import os
@@ -326,6 +363,142 @@ def set_rich_rule_disabled_permanent(zone, rule):
     fw_zone.update(fw_settings)
 
 
+####################
+# zone reconciliation
+#
+ZONE_ITEMS = ('services', 'ports', 'sources', 'rich_rules')
+
+def get_zone_items(zone):
+    return dict(
+        services=fw.getServices(zone),
+        ports=[tuple(port_proto) for port_proto in fw.getPorts(zone)],
+        sources=fw.getSources(zone),
+        rich_rules=fw.getRichRules(zone),
+    )
+
+def get_zone_items_permanent(fw_settings):
+    return dict(
+        services=fw_settings.getServices(),
+        ports=[tuple(port_proto) for port_proto in fw_settings.getPorts()],
+        sources=fw_settings.getSources(),
+        rich_rules=fw_settings.getRichRules(),
+    )
+
+def get_desired_zone_items(module):
+    desired = {}
+    for kind in ZONE_ITEMS:
+        items = module.params[kind]
+        if items is None:
+            continue
+        if kind == 'ports':
+            ports = []
+            for item in items:
+                if '/' not in item:
+                    module.fail_json(msg='improper port format (missing protocol?): %s' % item)
+                ports.append(tuple(item.split('/', 1)))
+            items = ports
+        elif kind == 'rich_rules':
+            # Convert the rule strings to standard format
+            # before comparing them
+            items = [str(Rich_Rule(rule_str=rule)) for rule in items]
+        desired[kind] = items
+    return desired
+
+def diff_zone_items(current, desired, desired_state):
+    changes = {}
+    for kind, items in desired.items():
+        present = set(current[kind])
+        wanted = set(items)
+        if desired_state == "enabled":
+            added = []
+            for item in items:
+                if item not in present and item not in added:
+                    added.append(item)
+            removed = [item for item in current[kind] if item not in wanted]
+        else:
+            added = []
+            removed = [item for item in current[kind] if item in wanted]
+        if added or removed:
+            changes[kind] = (added, removed)
+    return changes
+
+def set_zone_items(zone, changes, timeout):
+    for kind, (added, removed) in changes.items():
+        for item in removed:
+            if kind == 'services':
+                fw.removeService(zone, item)
+            elif kind == 'ports':
+                fw.removePort(zone, item[0], item[1])
+            elif kind == 'sources':
+                fw.removeSource(zone, item)
+            else:
+                fw.removeRichRule(zone, item)
+        for item in added:
+            if kind == 'services':
+                fw.addService(zone, item, timeout)
+            elif kind == 'ports':
+                fw.addPort(zone, item[0], item[1], timeout)
+            elif kind == 'sources':
+                fw.addSource(zone, item)
+            else:
+                fw.addRichRule(zone, item, timeout)
+
+def set_zone_items_permanent(fw_zone, fw_settings, current, changes):
+    for kind, (added, removed) in changes.items():
+        items = [item for item in current[kind] if item not in removed] + added
+        if kind == 'services':
+            fw_settings.setServices(items)
+        elif kind == 'ports':
+            fw_settings.setPorts(items)
+        elif kind == 'sources':
+            fw_settings.setSources(items)
+        else:
+            fw_settings.setRichRules(items)
+    fw_zone.update(fw_settings)
+
+def describe_zone_changes(changes):
+    result = {}
+    for kind, (added, removed) in changes.items():
+        if kind == 'ports':
+            added = ['%s/%s' % port_proto for port_proto in added]
+            removed = ['%s/%s' % port_proto for port_proto in removed]
+        result[kind] = dict(added=added, removed=removed)
+    return result
+
+def reconcile_zone(module, zone, permanent, immediate, desired_state, timeout):
+    desired = get_desired_zone_items(module)
+    msgs = []
+    zone_changes = {}
+
+    if permanent:
+        # One settings fetch and one update for the whole zone
+        fw_zone = fw.config().getZoneByName(zone)
+        fw_settings = fw_zone.getSettings()
+        current = get_zone_items_permanent(fw_settings)
+        changes = diff_zone_items(current, desired, desired_state)
+        msgs.append('Permanent operation')
+        if changes:
+            zone_changes['permanent'] = describe_zone_changes(changes)
+            if not module.check_mode:
+                set_zone_items_permanent(fw_zone, fw_settings, current, changes)
+    if immediate or not permanent:
+        current = get_zone_items(zone)
+        changes = diff_zone_items(current, desired, desired_state)
+        msgs.append('Non-permanent operation')
+        if changes:
+            zone_changes['runtime'] = describe_zone_changes(changes)
+            if not module.check_mode:
+                set_zone_items(zone, changes, timeout)
+
+    for mode in sorted(zone_changes):
+        for kind in sorted(zone_changes[mode]):
+            msgs.append("Changed %s %s of zone %s: added %d, removed %d" % (
+                mode, kind, zone, len(zone_changes[mode][kind]['added']),
+                len(zone_changes[mode][kind]['removed'])))
+
+    module.exit_json(changed=bool(zone_changes), zone_changes=zone_changes, msg=', '.join(msgs))
+
+
 def main():
 
     module = AnsibleModule(
@@ -341,6 +514,10 @@ def main():
             timeout=dict(type='int',required=False,default=0),
             interface=dict(required=False,default=None),
             masquerade=dict(required=False,default=None),
+            services=dict(type='list',required=False,default=None),
+            ports=dict(type='list',required=False,default=None),
+            sources=dict(type='list',required=False,default=None),
+            rich_rules=dict(type='list',required=False,default=None),
         ),
         supports_check_mode=True
     )
@@ -390,6 +567,11 @@ def main():
     interface = module.params['interface']
     masquerade = module.params['masquerade']
 
+    if [kind for kind in ZONE_ITEMS if module.params[kind] is not None]:
+        if service != None or port != None or rich_rule != None or source != None or interface != None or masquerade != None:
+            module.fail_json(msg='services, ports, sources and rich_rules cannot be combined with a single port, service, source, rich_rule, interface or masquerade')
+        reconcile_zone(module, zone, permanent, immediate, desired_state, timeout)
+
     modification_count = 0
     if service != None:
         modification_count += 1
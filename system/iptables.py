@@ -18,6 +18,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this software.  If not, see <http://www.gnu.org/licenses/>.
 
+import binascii
+import pwd
+import re
+import shlex
+import socket
+
 BINS = dict(
     ipv4='iptables',
     ipv6='ip6tables',
@@ -291,6 +297,28 @@ options:
         ACCEPT, DROP, QUEUE, RETURN. Only built in chains can have policies.
         This parameter requires the chain parameter. Ignores all other
         parameters."
+  rules:
+    version_added: "2.3"
+    description:
+      - "A list of rules to reconcile in one go. Each entry is a dict taking
+        the same keys as the single rule options (C(table), C(chain),
+        C(state), C(action), C(protocol), C(source), C(jump), ...); keys left
+        out default to the value of the module option."
+      - "The current ruleset is read once with iptables-save (or
+        ip6tables-save), the changes are computed from it and applied in a
+        single atomic iptables-restore --noflush transaction. Check mode and
+        diff mode are answered from the same snapshot."
+      - "Rules are compared with the iptables-save output after normalizing
+        addresses, ports, users, connection states and limits; other values
+        have to be written the way iptables-save prints them to be found."
+      - "Addresses are compared by their network, so C(10.1.2.3/8) matches
+        the C(10.0.0.0/8) iptables-save prints. Host names are resolved when
+        planning. A host name resolving to several addresses, or a comma
+        separated list of addresses, becomes one rule per address in
+        iptables and is never found again; give each address its own rule."
+      - "Mutually exclusive with C(flush) and C(policy)."
+    required: false
+    default: null
 '''
 
 EXAMPLES = '''
@@ -311,8 +339,63 @@ EXAMPLES = '''
 
 # Tag all outbound tcp packets with DSCP DiffServ class CS1
 - iptables: chain=OUTPUT jump=DSCP table=mangle set_dscp_mark_class=CS1 protocol=tcp
+
+# Reconcile a whole set of rules in a single iptables-restore transaction
+- iptables:
+    chain: INPUT
+    rules:
+      - { ctstate: [ESTABLISHED, RELATED], jump: ACCEPT }
+      - { protocol: tcp, destination_port: 22, jump: ACCEPT, comment: ssh }
+      - { protocol: tcp, destination_port: 80, jump: ACCEPT }
+      - { source: 8.8.8.8, jump: DROP, action: insert }
+      - { protocol: tcp, destination_port: 23, jump: ACCEPT, state: absent }
+      - { table: nat, chain: PREROUTING, protocol: tcp, match: tcp, destination_port: 8080, jump: REDIRECT, to_ports: 80 }
+  become: yes
+'''
+
+RETURN = '''
+changes:
+    description: The rule changes applied, or that would be applied, in rules mode
+    returned: when rules is set
+    type: list
+    sample: ["-t filter -A INPUT -p tcp --destination-port 80 -j ACCEPT"]
 '''
 
+# Options of a single rule, which can also be given per entry of rules
+RULE_KEYS = (
+    'table', 'chain', 'state', 'action', 'protocol', 'source', 'to_source',
+    'destination', 'to_destination', 'match', 'jump', 'goto', 'in_interface',
+    'out_interface', 'fragment', 'set_counters', 'source_port',
+    'destination_port', 'to_ports', 'set_dscp_mark', 'set_dscp_mark_class',
+    'comment', 'ctstate', 'limit', 'limit_burst', 'uid_owner', 'reject_with',
+    'icmp_type',
+)
+
+# Long option names, as iptables-save prints them
+SAVE_FLAGS = {
+    '--protocol': '-p',
+    '--source': '-s',
+    '--src': '-s',
+    '--destination': '-d',
+    '--dst': '-d',
+    '--match': '-m',
+    '--jump': '-j',
+    '--goto': '-g',
+    '--in-interface': '-i',
+    '--out-interface': '-o',
+    '--fragment': '-f',
+    '--source-port': '--sport',
+    '--destination-port': '--dport',
+    '--set-counters': '-c',
+}
+
+LIMIT_UNITS = {
+    's': 'sec', 'sec': 'sec', 'second': 'sec',
+    'm': 'min', 'min': 'min', 'minute': 'min',
+    'h': 'hour', 'hour': 'hour',
+    'd': 'day', 'day': 'day',
+}
+
 
 def append_param(rule, param, flag, is_list):
     if is_list:
@@ -417,6 +500,307 @@ def set_chain_policy(iptables_path, module, params):
     module.run_command(cmd, check_rc=True)
 
 
+def resolve_address(name, ipv6):
+    """The address name resolves to, or name when it resolves to none or
+    to several, which iptables turns into one rule per address"""
+    family = ipv6 and socket.AF_INET6 or socket.AF_INET
+    try:
+        infos = socket.getaddrinfo(name, None, family)
+    except socket.error:
+        return name
+    addresses = []
+    for info in infos:
+        if info[4][0] not in addresses:
+            addresses.append(info[4][0])
+    if len(addresses) != 1:
+        return name
+    return addresses[0]
+
+
+def mask_address(address, length, ipv6):
+    """Clear the host bits of address, iptables-save prints the network of
+    address/length. Returns address unchanged when it is not an IP"""
+    family = ipv6 and socket.AF_INET6 or socket.AF_INET
+    try:
+        packed = socket.inet_pton(family, address)
+    except (socket.error, ValueError, AttributeError):
+        return address
+    bits = len(packed) * 8
+    if length > bits:
+        return address
+    value = int(binascii.hexlify(packed), 16)
+    value &= ~((1 << (bits - length)) - 1)
+    return socket.inet_ntop(family, binascii.unhexlify('%0*x' % (bits // 4, value)))
+
+
+def normalize_address(address, ipv6):
+    mask = None
+    if '/' in address:
+        address, mask = address.split('/', 1)
+    if not address.replace('.', '').isdigit() and ':' not in address:
+        # a hostname, iptables stores the address it resolves to
+        address = resolve_address(address, ipv6)
+        if not address.replace('.', '').isdigit() and ':' not in address:
+            if mask is None:
+                return address
+            return '%s/%s' % (address, mask)
+    if mask is None:
+        mask = str(ipv6 and 128 or 32)
+    if '.' in mask and not ipv6:
+        # dotted netmask to prefix length
+        octets = mask.split('.')
+        if len(octets) == 4 and not [octet for octet in octets if not octet.isdigit()]:
+            value = 0
+            for octet in octets:
+                value = (value << 8) | (int(octet) & 0xff)
+            host = ~value & 0xffffffff
+            # only contiguous masks have a prefix length
+            if host & (host + 1) == 0:
+                length = 32
+                while host:
+                    host >>= 1
+                    length -= 1
+                mask = str(length)
+            elif len(address.split('.')) == 4 and address.replace('.', '').isdigit():
+                address = '.'.join([str(int(a) & int(m)) for a, m in zip(address.split('.'), octets)])
+    if mask.isdigit():
+        address = mask_address(address, int(mask), ipv6)
+    return '%s/%s' % (address, mask)
+
+
+def normalize_port(port):
+    if port.isdigit():
+        return port
+    try:
+        return str(socket.getservbyname(port))
+    except socket.error:
+        return port
+
+
+def normalize_group(flag, values, ipv6):
+    """Normalize one option of a rule and its values to the way iptables-save
+    prints it"""
+    flag = SAVE_FLAGS.get(flag, flag)
+    if flag in ('-s', '-d'):
+        values = [','.join(normalize_address(address, ipv6) for address in value.split(','))
+                  for value in values]
+    elif flag == '-p':
+        values = [value.lower() for value in values]
+    elif flag in ('--sport', '--dport', '--sports', '--dports'):
+        values = [','.join(':'.join(normalize_port(port) for port in ports.split(':'))
+                           for ports in value.split(','))
+                  for value in values]
+    elif flag in ('--state', '--ctstate'):
+        values = [','.join(sorted(value.upper().split(','))) for value in values]
+    elif flag == '--limit':
+        limits = []
+        for value in values:
+            if '/' in value:
+                rate, unit = value.split('/', 1)
+                limits.append(rate + '/' + LIMIT_UNITS.get(unit, unit))
+            else:
+                limits.append(value + '/sec')
+        values = limits
+    elif flag == '--uid-owner':
+        try:
+            values = [str(pwd.getpwnam(values[0]).pw_uid)]
+        except (KeyError, IndexError):
+            pass
+    elif flag == '-f':
+        # takes no value
+        values = []
+    return flag, tuple(values)
+
+
+def rule_key(tokens, ipv6):
+    """Turn the arguments of a rule into a key that does not depend on the
+    spelling or order of its options"""
+    groups = []
+    negate = False
+    for token in tokens:
+        if token == '!':
+            negate = True
+        elif token.startswith('-') and len(token) > 1 and not token[1:].isdigit():
+            groups.append([negate, token, []])
+            negate = False
+        elif groups:
+            groups[-1][2].append(token)
+
+    protocols = [values for negate, flag, values in groups if SAVE_FLAGS.get(flag, flag) == '-p']
+    key = []
+    for negate, flag, values in groups:
+        flag, values = normalize_group(flag, values, ipv6)
+        if flag == '-c':
+            # counters are not part of the rule
+            continue
+        if flag == '-m' and values and [values[0]] in protocols:
+            # implied by the protocol, iptables-save prints it anyway
+            continue
+        key.append((negate, flag, values))
+    return tuple(sorted(key))
+
+
+def restore_quote(token):
+    # iptables-restore only understands double quotes
+    if not token or [c for c in token if c.isspace() or c in '"\'\\']:
+        return '"%s"' % token.replace('\\', '\\\\').replace('"', '\\"')
+    return token
+
+
+def parse_save(output, ipv6):
+    """Index the rules of an iptables-save output by table and chain"""
+    tables = {}
+    table = None
+    for line in output.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('*'):
+            table = tables.setdefault(line[1:], dict(chains={}, order=[]))
+        elif table is None:
+            continue
+        elif line.startswith(':'):
+            chain = line[1:].split()[0]
+            if chain not in table['chains']:
+                table['chains'][chain] = []
+                table['order'].append(chain)
+        elif line.startswith('-A '):
+            tokens = shlex.split(line)
+            chain = tokens[1]
+            if chain not in table['chains']:
+                table['chains'][chain] = []
+                table['order'].append(chain)
+            table['chains'][chain].append((rule_key(tokens[2:], ipv6), line))
+        elif line == 'COMMIT':
+            table = None
+    return tables
+
+
+def render_tables(tables, names):
+    lines = []
+    for name in names:
+        table = tables.get(name)
+        if table is None:
+            continue
+        lines.append('*%s' % name)
+        for chain in table['order']:
+            lines.extend(line for key, line in table['chains'][chain])
+        lines.append('COMMIT')
+    return '\n'.join(lines) + '\n'
+
+
+def rule_entries(module):
+    """The entries of rules, completed with the module options"""
+    entries = []
+    for i, item in enumerate(module.params['rules']):
+        if not isinstance(item, dict):
+            module.fail_json(msg="rules[%d] must be a dict" % i)
+        unknown = [key for key in item if key not in RULE_KEYS]
+        if unknown:
+            module.fail_json(msg="rules[%d] has unsupported keys: %s" % (i, ', '.join(sorted(unknown))))
+        entry = dict((key, module.params[key]) for key in RULE_KEYS)
+        entry.update(item)
+        for key in ('match', 'ctstate'):
+            if entry[key] is None:
+                entry[key] = []
+            elif not isinstance(entry[key], list):
+                entry[key] = str(entry[key]).split(',')
+        for key in RULE_KEYS:
+            if entry[key] is not None and not isinstance(entry[key], list):
+                entry[key] = str(entry[key])
+        if not entry['chain']:
+            module.fail_json(msg="rules[%d] has no chain" % i)
+        if entry['state'] not in ('present', 'absent'):
+            module.fail_json(msg="rules[%d] has an invalid state: %s" % (i, entry['state']))
+        if entry['action'] not in ('append', 'insert'):
+            module.fail_json(msg="rules[%d] has an invalid action: %s" % (i, entry['action']))
+        entries.append(entry)
+    return entries
+
+
+def plan_rules(tables, entries, ipv6):
+    """Apply the entries to the indexed tables and return the changes, as
+    (table, iptables-restore line) pairs"""
+    changes = []
+    for entry in entries:
+        table = tables.setdefault(entry['table'], dict(chains={}, order=[]))
+        chain = entry['chain']
+        if chain not in table['chains']:
+            table['chains'][chain] = []
+            table['order'].append(chain)
+        rules = table['chains'][chain]
+
+        spec = construct_rule(entry)
+        key = rule_key(spec, ipv6)
+        spec = ' '.join(restore_quote(token) for token in spec)
+        present = [i for i, rule in enumerate(rules) if rule[0] == key]
+
+        if entry['state'] == 'present' and not present:
+            if entry['action'] == 'insert':
+                rules.insert(0, (key, '-A %s %s' % (chain, spec)))
+                changes.append((entry['table'], '-I %s %s' % (chain, spec)))
+            else:
+                rules.append((key, '-A %s %s' % (chain, spec)))
+                changes.append((entry['table'], '-A %s %s' % (chain, spec)))
+        elif entry['state'] == 'absent' and present:
+            # like iptables -D, removes the first matching rule
+            del rules[present[0]]
+            changes.append((entry['table'], '-D %s %s' % (chain, spec)))
+    return changes
+
+
+def apply_rules(module, ip_version):
+    ipv6 = (ip_version == 'ipv6')
+    save_path = module.get_bin_path(BINS[ip_version] + '-save', True)
+    restore_path = module.get_bin_path(BINS[ip_version] + '-restore', True)
+    entries = rule_entries(module)
+
+    rc, out, err = module.run_command([save_path], check_rc=True)
+    tables = parse_save(out, ipv6)
+    names = []
+    for entry in entries:
+        if entry['table'] not in names:
+            names.append(entry['table'])
+    before = render_tables(tables, names)
+
+    changes = plan_rules(tables, entries, ipv6)
+    result = dict(
+        changed=bool(changes),
+        ip_version=ip_version,
+        changes=['-t %s %s' % change for change in changes],
+    )
+    if module._diff:
+        result['diff'] = dict(before=before, after=render_tables(tables, names))
+
+    if not changes or module.check_mode:
+        module.exit_json(**result)
+
+    # One transaction: iptables-restore applies all the tables or none
+    lines = []
+    # line number -> index of the change in result['changes']
+    line_changes = {}
+    for name in names:
+        table_changes = [(i, line) for i, (table, line) in enumerate(changes) if table == name]
+        if not table_changes:
+            continue
+        lines.append('*%s' % name)
+        for i, line in table_changes:
+            lines.append(line)
+            line_changes[len(lines)] = i
+        lines.append('COMMIT')
+
+    rc, out, err = module.run_command([restore_path, '--noflush'], data='\n'.join(lines))
+    if rc != 0:
+        # report the change on the line iptables-restore failed on
+        match = re.search(r'line (\d+) failed', err)
+        if match and int(match.group(1)) in line_changes:
+            result['failed_change'] = result['changes'][line_changes[int(match.group(1))]]
+        result['changed'] = False
+        module.fail_json(msg="%s failed: %s" % (restore_path, err.strip()), **result)
+
+    module.exit_json(**result)
+
+
 def main():
     module = AnsibleModule(
         supports_check_mode=True,
@@ -469,10 +853,12 @@ def main():
                 default=None,
                 type='str',
                 choices=['ACCEPT', 'DROP', 'QUEUE', 'RETURN']),
+            rules=dict(required=False, default=None, type='list'),
         ),
         mutually_exclusive=(
             ['set_dscp_mark', 'set_dscp_mark_class'],
             ['flush', 'policy'],
+            ['rules', 'policy'],
         ),
     )
     args = dict(
@@ -487,6 +873,13 @@ def main():
     )
 
     ip_version = module.params['ip_version']
+
+    # Reconcile a list of rules in one transaction
+    if module.params['rules'] is not None:
+        if args['flush'] is True:
+            module.fail_json(msg="parameters are mutually exclusive: rules, flush")
+        apply_rules(module, ip_version)
+
     iptables_path = module.get_bin_path(BINS[ip_version], True)
 
     # Check if chain option is required
@@ -33,7 +33,8 @@ options:
     aliases: [ 'host' ]
     description:
       - The host to add or remove (must match a host specified in key)
-    required: true
+      - Required unless C(keys) is given.
+    required: false
     default: null
   key:
     description:
@@ -51,6 +52,15 @@ options:
     choices: [ "present", "absent" ]
     required: no
     default: present
+  keys:
+    description:
+      - A list of dicts with C(name), C(key) and optionally C(state), which
+        defaults to C(state). They are applied in order to the file, which is
+        read once into an index keyed by host, including hashed entries, and
+        written once. ssh-keygen is not used in this mode.
+    required: no
+    default: null
+    version_added: "2.3"
 requirements: [ ]
 author: "Matthew Vernon (@mcv21)"
 '''
@@ -61,6 +71,12 @@ EXAMPLES = '''
   known_hosts: path='/etc/ssh/ssh_known_hosts'
                name='foo.com.invalid'
                key="{{ lookup('file', 'pubkeys/foo.com.invalid') }}"
+
+# Add the keys of a whole fleet in a single write
+- name: tell the host about all our servers
+  known_hosts:
+    path: /etc/ssh/ssh_known_hosts
+    keys: "{{ fleet_host_keys }}"
 '''
 
 # Makes sure public host keys are present or absent in the given known_hosts
@@ -72,12 +88,17 @@ EXAMPLES = '''
 #    key = line(s) to add to known_hosts file
 #    path = the known_hosts file to edit (default: ~/.ssh/known_hosts)
 #    state = absent|present (default: present)
+#    keys = list of dicts with name, key and state, applied in a single write
 
 import os
 import os.path
 import tempfile
 import errno
 import re
+import base64
+import fnmatch
+import hashlib
+import hmac
 from ansible.module_utils.pycompat24 import get_exception
 from ansible.module_utils.basic import *
 
@@ -265,19 +286,191 @@ def normalize_known_hosts_key(key, host):
         d['key']=k[2]
     return d
 
+class KnownHosts(object):
+    '''
+    A known_hosts file parsed once, with the lines indexed by host name.
+    Hashed |1| entries are matched by computing HMAC-SHA1 of the looked up
+    host with the salt of each entry, as ssh-keygen -F does.
+    '''
+
+    def __init__(self, path):
+        self.lines = []
+        self.plain = {}     # lowercased host name -> line numbers
+        self.patterns = []  # line numbers of entries with wildcards or negations
+        self.hashed = []    # (line number, hmac keyed with the salt, expected digest)
+        if os.path.exists(path):
+            f = open(path, "r")
+            try:
+                for line in f:
+                    self.add(line)
+            finally:
+                f.close()
+
+    def add(self, line):
+        '''Append a line and index the host names of its entry'''
+        if not line.endswith('\n'):
+            line += '\n'
+        n = len(self.lines)
+        self.lines.append(line)
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            return
+        hosts = fields[0]
+        if hosts.startswith('@'):
+            if len(fields) < 2:
+                return
+            hosts = fields[1]
+        if hosts.startswith('|1|'):
+            try:
+                salt, digest = hosts[3:].split('|', 1)
+                self.hashed.append((n, hmac.new(base64.b64decode(salt), digestmod=hashlib.sha1),
+                                    base64.b64decode(digest)))
+            except (ValueError, TypeError):
+                pass
+        elif '*' in hosts or '?' in hosts or '!' in hosts:
+            self.patterns.append(n)
+        else:
+            for name in hosts.split(','):
+                self.plain.setdefault(name.lower(), []).append(n)
+
+    def find(self, host):
+        '''Line numbers of the entries for host, in file order'''
+        host = host.lower()
+        found = list(self.plain.get(host, []))
+        host_bytes = host
+        if not isinstance(host_bytes, bytes):
+            host_bytes = host_bytes.encode('utf-8')
+        for n, mac, digest in self.hashed:
+            mac = mac.copy()
+            mac.update(host_bytes)
+            if mac.digest() == digest:
+                found.append(n)
+        for n in self.patterns:
+            if match_host_patterns(host, self.host_field(n)):
+                found.append(n)
+        return sorted(n for n in found if self.lines[n] is not None)
+
+    def host_field(self, n):
+        fields = self.lines[n].split()
+        if fields[0].startswith('@'):
+            return fields[1]
+        return fields[0]
+
+    def remove(self, n):
+        self.lines[n] = None
+
+    def content(self):
+        return ''.join(line for line in self.lines if line is not None)
+
+def match_host_patterns(host, patterns):
+    '''Match host against a comma separated list of ssh patterns, a matching negated pattern wins'''
+    matched = False
+    for pattern in patterns.lower().split(','):
+        if pattern.startswith('!'):
+            if fnmatch.fnmatchcase(host, pattern[1:]):
+                return False
+        elif fnmatch.fnmatchcase(host, pattern):
+            matched = True
+    return matched
+
+def key_matches_host(key, host):
+    '''Whether the host field of a key line matches host, like sanity_check does with ssh-keygen'''
+    index = KnownHosts(os.devnull)
+    for line in key.splitlines():
+        if line.strip():
+            index.add(line)
+    return len(index.find(host)) > 0
+
+def enforce_state_bulk(module, params):
+    """
+    Add or remove every key of the keys list, writing the file once.
+    """
+
+    path = params.get("path")
+    index = KnownHosts(path)
+    changed = False
+
+    for item in params["keys"]:
+        host = item.get("name", item.get("host"))
+        key = item.get("key", None)
+        state = item.get("state", params.get("state"))
+        if not host:
+            module.fail_json(msg="Every item of keys needs a name", item=item)
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="Invalid state %s for %s" % (state, host))
+        if key is None and state != "absent":
+            module.fail_json(msg="No key specified when adding host %s" % host)
+        if key and key[-1] != '\n':
+            key += '\n'
+        if key is not None and not key_matches_host(key, host):
+            module.fail_json(msg="Host parameter does not match hashed host field in supplied key", host=host)
+
+        lines = index.find(host)
+
+        # Only remove whole host if found and no key provided
+        if key is None:
+            for n in lines:
+                index.remove(n)
+                changed = True
+            continue
+
+        # Look for the same key, or another key of the same type to replace
+        new_key = normalize_known_hosts_key(key, host)
+        found_line = None
+        same = False
+        for n in lines:
+            found_key = normalize_known_hosts_key(index.lines[n], host)
+            if new_key == found_key:
+                found_line, same = n, True
+                break
+            elif new_key['type'] == found_key['type']:
+                found_line = n
+                break
+
+        if state == 'present':
+            if same:
+                continue
+            if found_line is not None:
+                index.remove(found_line)
+            index.add(key)
+            changed = True
+        elif found_line is not None:
+            index.remove(found_line)
+            changed = True
+
+    if changed and not module.check_mode:
+        try:
+            outf = tempfile.NamedTemporaryFile(mode='w', dir=os.path.dirname(path), delete=False)
+            outf.write(index.content())
+            outf.close()
+            module.atomic_move(outf.name, path)
+        except (IOError, OSError):
+            e = get_exception()
+            module.fail_json(msg="Failed to write to file %s: %s" % \
+                                 (path,str(e)))
+
+    params['changed'] = changed
+    return params
+
 def main():
 
     module = AnsibleModule(
         argument_spec = dict(
-            name      = dict(required=True,  type='str', aliases=['host']),
+            name      = dict(required=False, type='str', aliases=['host']),
             key       = dict(required=False,  type='str'),
             path      = dict(default="~/.ssh/known_hosts", type='path'),
             state     = dict(default='present', choices=['absent','present']),
+            keys      = dict(required=False, type='list'),
             ),
+        required_one_of = [['name', 'keys']],
+        mutually_exclusive = [['name', 'keys'], ['key', 'keys']],
         supports_check_mode = True
         )
 
-    results = enforce_state(module,module.params)
+    if module.params['keys'] is not None:
+        results = enforce_state_bulk(module,module.params)
+    else:
+        results = enforce_state(module,module.params)
     module.exit_json(**results)
 
 main()
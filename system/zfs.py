@@ -30,7 +30,8 @@ options:
   name:
     description:
       - File system, snapshot or volume name e.g. C(rpool/myfs)
-    required: true
+      - Required unless C(datasets) is given.
+    required: false
   state:
     description:
       - Whether to create (C(present)), or remove (C(absent)) a
@@ -48,6 +49,19 @@ options:
       - The C(zfs) module takes key=value pairs for zfs properties to be set. See the zfs(8) man page for more information.
     default: null
     required: false
+  datasets:
+    description:
+      - A list of datasets to reconcile in one go, each a dict with a C(name),
+        an optional C(state) (defaults to the module C(state)) and the zfs
+        properties of the dataset as further keys.
+      - The current properties of all the datasets are read with a single
+        recursive C(zfs get) over their pools. Snapshots are taken together,
+        and changed properties are set with one C(zfs set) per dataset where
+        the zfs version accepts several properties at once.
+      - Mutually exclusive with C(name).
+    default: null
+    required: false
+    version_added: "2.3"
 
 author: "Johan Wiren (@johanwiren)"
 '''
@@ -70,10 +84,32 @@ EXAMPLES = '''
 
 # Destroy a filesystem
 - zfs: name=rpool/myfs state=absent
+
+# Reconcile many datasets with a single property scan
+- zfs:
+    state: present
+    datasets:
+      - { name: tank/home, compression: lz4 }
+      - { name: tank/home/alice, quota: 10G }
+      - { name: tank/home/bob, quota: 20G, setuid: off }
+      - { name: tank/home/bob@backup }
+      - { name: tank/scratch, state: absent }
+'''
+
+RETURN = '''
+datasets:
+    description: Changes per dataset when datasets is used, with the action
+                 taken (create, destroy or set) and the properties set
+    returned: when datasets is set
+    type: dict
+    sample: {"tank/home/alice": {"action": "set", "properties": {"quota": "10G"}}}
 '''
 
 
 import os
+import re
+
+SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)([KMGTPEZ]?)B?$', re.IGNORECASE)
 
 
 class Zfs(object):
@@ -204,27 +240,177 @@ class Zfs(object):
         return properties
 
 
-def main():
+def parse_size(value):
+    match = SIZE_RE.match(value)
+    if not match:
+        return None
+    return int(float(match.group(1)) * 1024 ** ' KMGTPEZ'.index(match.group(2).upper() or ' '))
 
-    module = AnsibleModule(
-        argument_spec = dict(
-            name =         dict(type='str', required=True),
-            state =        dict(type='str', required=True, choices=['present', 'absent']),
-            # No longer used. Kept here to not interfere with zfs properties
-            createparent = dict(type='bool', required=False)
-            ),
-        supports_check_mode=True,
-        check_invalid_arguments=False
-        )
 
-    state = module.params.pop('state')
-    name = module.params.pop('name')
+def property_matches(current, value):
+    """Compare a parsable (zfs get -p) property value with a requested one"""
+    if current is None:
+        return False
+    if current == value:
+        return True
+    if value == 'none':
+        # sizes read as 0 when unset
+        value = '0'
+    current_size = parse_size(current)
+    return current_size is not None and current_size == parse_size(value)
 
+
+class ZfsDatasets(object):
+    """Reconcile many datasets from a single recursive property scan"""
+
+    def __init__(self, module, datasets):
+        self.module = module
+        self.datasets = datasets
+        self.changes = dict()
+        self.changed = False
+        self.multi_set = True
+        self.zfs_cmd = module.get_bin_path('zfs', True)
+        self.zpool_cmd = module.get_bin_path('zpool', True)
+        self.pools = []
+        for name, state, properties in datasets:
+            pool = name.split('@')[0].split('/')[0]
+            if pool not in self.pools:
+                self.pools.append(pool)
+        self.is_solaris = os.uname()[0] == 'SunOS'
+        self.enhanced_sharing = self.check_enhanced_sharing()
+
+    def check_enhanced_sharing(self):
+        if not self.is_solaris:
+            return False
+        cmd = [self.zpool_cmd, 'get', 'version'] + self.pools
+        (rc, out, err) = self.module.run_command(cmd, check_rc=True)
+        versions = [line.split()[2] for line in out.splitlines()[1:]]
+        if not versions:
+            return False
+        for version in versions:
+            # OpenZFS reports no version or 5000
+            if version == '-' or int(version) == 5000 or int(version) < 34:
+                return False
+        return True
+
+    def get_current_properties(self):
+        """Index the local properties of every dataset of the pools by name"""
+        cmd = [self.zfs_cmd, 'get', '-H', '-p', '-o', 'name,property,value,source', '-r', '-t', 'all']
+        if self.enhanced_sharing:
+            cmd += ['-e']
+        cmd += ['all'] + self.pools
+        rc, out, err = self.module.run_command(cmd)
+        index = dict()
+        for line in out.splitlines():
+            fields = line.split('\t')
+            if len(fields) < 4:
+                continue
+            name, prop, value, source = fields[:4]
+            properties = index.setdefault(name, dict())
+            if source == 'local':
+                properties[prop] = value
+        # Add alias for enhanced sharing properties
+        if self.enhanced_sharing:
+            for properties in index.values():
+                properties['sharenfs'] = properties.get('share.nfs', None)
+                properties['sharesmb'] = properties.get('share.smb', None)
+        return index
+
+    def run(self, cmd):
+        if self.module.check_mode:
+            return
+        (rc, out, err) = self.module.run_command(cmd)
+        if rc != 0:
+            self.module.fail_json(msg=err, datasets=self.changes)
+
+    def create(self, name, properties):
+        properties = dict(properties)
+        volsize = properties.pop('volsize', None)
+        volblocksize = properties.pop('volblocksize', None)
+        origin = properties.pop('origin', None)
+        cmd = [self.zfs_cmd]
+        if origin:
+            cmd += ['clone', '-p']
+        else:
+            cmd += ['create', '-p']
+        if volsize:
+            cmd += ['-V', volsize]
+        if volblocksize:
+            cmd += ['-b', volblocksize]
+        for prop, value in properties.items():
+            cmd += ['-o', '%s=%s' % (prop, value)]
+        if origin:
+            cmd.append(origin)
+        cmd.append(name)
+        self.run(cmd)
+
+    def snapshot(self, names, properties):
+        # zfs snapshot takes all the snapshots sharing the same properties at once
+        cmd = [self.zfs_cmd, 'snapshot']
+        for prop, value in properties:
+            cmd += ['-o', '%s=%s' % (prop, value)]
+        self.run(cmd + names)
+
+    def set_properties(self, name, properties):
+        if self.multi_set and len(properties) > 1 and not self.module.check_mode:
+            cmd = [self.zfs_cmd, 'set']
+            cmd += ['%s=%s' % (prop, value) for prop, value in properties.items()]
+            (rc, out, err) = self.module.run_command(cmd + [name])
+            if rc == 0:
+                return
+            # older zfs only takes one property per zfs set
+            self.multi_set = False
+        for prop, value in properties.items():
+            self.run([self.zfs_cmd, 'set', '%s=%s' % (prop, value), name])
+
+    def reconcile(self):
+        current = self.get_current_properties()
+        snapshots = dict()
+        destroyed = []
+
+        # Parents are created before their children and destroyed after them
+        for name, state, properties in sorted(self.datasets, key=lambda d: d[0].count('/')):
+            if state == 'present':
+                if name in current:
+                    changed = dict((prop, value) for prop, value in properties.items()
+                                   if not property_matches(current[name].get(prop, None), value))
+                    if changed:
+                        self.changes[name] = dict(action='set', properties=changed)
+                        self.set_properties(name, changed)
+                elif '@' in name:
+                    self.changes[name] = dict(action='create', properties=properties)
+                    # one zfs snapshot call cannot span pools
+                    pool = name.split('@')[0].split('/')[0]
+                    snapshots.setdefault((pool, tuple(sorted(properties.items()))), []).append(name)
+                else:
+                    self.changes[name] = dict(action='create', properties=properties)
+                    self.create(name, properties)
+                    current[name] = dict()
+
+        for (pool, properties), names in snapshots.items():
+            self.snapshot(names, properties)
+
+        for name, state, properties in sorted(self.datasets, key=lambda d: -d[0].count('/')):
+            if state == 'absent' and name in current:
+                self.changes[name] = dict(action='destroy', properties=dict())
+                destroyed.append(name)
+
+        for name in destroyed:
+            # destroy -R takes the children along
+            if [parent for parent in destroyed
+                    if parent != name and (name.startswith(parent + '/') or name.startswith(parent + '@'))]:
+                continue
+            self.run([self.zfs_cmd, 'destroy', '-R', name])
+
+        self.changed = bool(self.changes)
+
+
+def zfs_properties(params, exclude):
     # Get all valid zfs-properties
     properties = dict()
-    for prop, value in module.params.iteritems():
+    for prop, value in params.items():
         # All freestyle params are zfs properties
-        if prop not in module.argument_spec:
+        if prop not in exclude:
             # Reverse the boolification of freestyle zfs properties
             if type(value) == bool:
                 if value is True:
@@ -232,7 +418,44 @@ def main():
                 else:
                     properties[prop] = 'off'
             else:
-                properties[prop] = value
+                properties[prop] = str(value)
+    return properties
+
+
+def main():
+
+    module = AnsibleModule(
+        argument_spec = dict(
+            name =         dict(type='str', required=False),
+            state =        dict(type='str', required=True, choices=['present', 'absent']),
+            # No longer used. Kept here to not interfere with zfs properties
+            createparent = dict(type='bool', required=False),
+            datasets =     dict(type='list', required=False)
+            ),
+        required_one_of=[['name', 'datasets']],
+        mutually_exclusive=[['name', 'datasets']],
+        supports_check_mode=True,
+        check_invalid_arguments=False
+        )
+
+    state = module.params.pop('state')
+    name = module.params.pop('name')
+    datasets = module.params.pop('datasets')
+
+    if datasets is not None:
+        entries = []
+        for i, entry in enumerate(datasets):
+            if not isinstance(entry, dict) or not entry.get('name'):
+                module.fail_json(msg="datasets[%d] must be a dict with a name" % i)
+            entry_state = entry.get('state', state)
+            if entry_state not in ['present', 'absent']:
+                module.fail_json(msg="datasets[%d] has an invalid state: %s" % (i, entry_state))
+            entries.append((entry['name'], entry_state, zfs_properties(entry, ['name', 'state'])))
+        zfs = ZfsDatasets(module, entries)
+        zfs.reconcile()
+        module.exit_json(changed=zfs.changed, state=state, datasets=zfs.changes)
+
+    properties = zfs_properties(module.params, module.argument_spec)
 
     result = {}
     result['name'] = name
@@ -331,6 +331,18 @@ class AnsibleEc2VpcNatGatewayFunctions(unittest.TestCase):
         self.assertFalse(success)
         self.assertEqual(gws, {})
 
+    def test_wait_for_status_counts_polls(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        waiter = ng.Waiter(delay=0.5, max_delay=1)
+        success, err_msg, gws = (
+            ng.wait_for_status(
+                client, 2, 'nat-12345678', 'available', check_mode=True,
+                waiter=waiter
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue(waiter.polls > 1)
+
     def test_gateway_in_subnet_exists_with_allocation_id(self):
         client = boto3.client('ec2', region_name=aws_region)
         gws, err_msg = (
@@ -123,6 +123,30 @@ class AnsibleKinesisStreamFunctions(unittest.TestCase):
         self.assertTrue(success)
         self.assertEqual(stream, should_return)
 
+    def test_wait_for_status_counts_polls(self):
+        client = boto3.client('kinesis', region_name=aws_region)
+        waiter = kinesis_stream.Waiter()
+        success, err_msg, stream = (
+            kinesis_stream.wait_for_status(
+                client, 'test', 'ACTIVE', check_mode=True, waiter=waiter
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(waiter.polls, 1)
+
+    def test_waiter_backs_off_until_ready(self):
+        results = [False, False, True]
+        waiter = kinesis_stream.Waiter(delay=0.01, max_delay=0.02)
+        success = waiter.wait(lambda: results.pop(0), 5)
+        self.assertTrue(success)
+        self.assertEqual(waiter.polls, 3)
+
+    def test_waiter_stops_at_poll_budget(self):
+        waiter = kinesis_stream.Waiter(delay=0.01, max_delay=0.02, max_polls=2)
+        success = waiter.wait(lambda: False, 5)
+        self.assertFalse(success)
+        self.assertEqual(waiter.polls, 2)
+
     def test_tags_action_create(self):
         client = boto3.client('kinesis', region_name=aws_region)
         tags = {
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import BaseHTTPServer
+from StringIO import StringIO
+
+import cloud.vmware.vsphere_copy as vsphere_copy
+
+
+class DatastoreHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    ''' Stand-in for the datastore file API: answers the first
+    server.failures PUTs with server.failure_status, then stores bodies '''
+
+    def log_message(self, *args):
+        pass
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers['content-length']))
+        self.server.puts.append(self.path)
+        if self.server.failures:
+            self.server.failures -= 1
+            self.send_response(self.server.failure_status)
+            self.end_headers()
+            return
+        self.server.files[self.path] = body
+        self.send_response(201)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.server.heads.append(self.path)
+        if self.path not in self.server.files:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.server.files[self.path])))
+        self.end_headers()
+
+
+class AnsibleVsphereCopyUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), DatastoreHandler)
+        self.server.puts = []
+        self.server.heads = []
+        self.server.files = {}
+        self.server.failures = 0
+        self.server.failure_status = 503
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'disk.vmdk')
+        self.data = ''.join(chr(i % 256) for i in range(300000))
+        f = open(self.src, 'wb')
+        f.write(self.data)
+        f.close()
+        self.job = dict(src=self.src, url='http://127.0.0.1:%d%s' % (
+            self.server.server_address[1], vsphere_copy.vmware_path('datastore1', 'DC1', 'isos/disk.vmdk')))
+        self.path = self.job['url'].split(str(self.server.server_address[1]), 1)[1]
+
+        self.sleeps = []
+        self.real_sleep = vsphere_copy.time.sleep
+        vsphere_copy.time.sleep = self.sleeps.append
+
+    def tearDown(self):
+        vsphere_copy.time.sleep = self.real_sleep
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def upload(self, retries=0, cache=None):
+        return vsphere_copy.upload(self.job, 'root', 'secret', False, 65536, retries, 1, cache)
+
+    def test_chunk_reader_ignores_requested_size(self):
+        reader = vsphere_copy.ChunkReader(StringIO(self.data), 65536)
+        chunks = []
+        while True:
+            chunk = reader.read(8192)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual([len(c) for c in chunks], [65536] * 4 + [300000 - 4 * 65536])
+        self.assertEqual(''.join(chunks), self.data)
+
+    def test_upload_streams_body(self):
+        start = time.time()
+        result = self.upload()
+        elapsed = time.time() - start
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['status'], 201)
+        self.assertEqual(self.server.files[self.path], self.data)
+        # Not an assertion, a rough figure for comparing upload changes
+        print('%d bytes PUT in %.3fs' % (len(self.data), elapsed))
+
+    def test_retries_server_errors_with_backoff(self):
+        self.server.failures = 3
+        result = self.upload(retries=3)
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['retries'], 3)
+        self.assertEqual(len(self.server.puts), 4)
+        self.assertEqual(self.sleeps, [1, 2, 4])
+        # Every attempt reopens the source, so the stored body is complete
+        self.assertEqual(self.server.files[self.path], self.data)
+
+    def test_gives_up_after_retries(self):
+        self.server.failures = 5
+        result = self.upload(retries=1)
+        self.assertTrue(result['failed'])
+        self.assertEqual(result['status'], 503)
+        self.assertEqual(len(self.server.puts), 2)
+        self.assertEqual(self.sleeps, [1])
+
+    def test_client_errors_are_not_retried(self):
+        self.server.failures = 1
+        self.server.failure_status = 403
+        result = self.upload(retries=3)
+        self.assertTrue(result['failed'])
+        self.assertEqual(result['status'], 403)
+        self.assertEqual(len(self.server.puts), 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_digest_cache_skips_unchanged_upload(self):
+        cache = vsphere_copy.DigestCache(os.path.join(self.tmpdir, 'cache', 'digests.json'))
+        self.assertTrue(self.upload(cache=cache)['changed'])
+        self.assertEqual(self.server.heads, [])
+
+        # Same source and the datastore reports the same size: HEAD only
+        result = self.upload(cache=cache)
+        self.assertFalse(result['changed'])
+        self.assertEqual(len(self.server.puts), 1)
+        self.assertEqual(len(self.server.heads), 1)
+
+        # The cache survives a save and load
+        cache.save()
+        cache = vsphere_copy.DigestCache(cache.path)
+        self.assertFalse(self.upload(cache=cache)['changed'])
+        self.assertEqual(len(self.server.puts), 1)
+
+    def test_digest_cache_uploads_when_remote_size_differs(self):
+        cache = vsphere_copy.DigestCache(os.path.join(self.tmpdir, 'digests.json'))
+        self.upload(cache=cache)
+        self.server.files[self.path] = self.data[:100]
+        self.assertTrue(self.upload(cache=cache)['changed'])
+        self.assertEqual(len(self.server.puts), 2)
+        self.assertEqual(self.server.files[self.path], self.data)
+
+    def test_digest_cache_uploads_changed_source(self):
+        cache = vsphere_copy.DigestCache(os.path.join(self.tmpdir, 'digests.json'))
+        self.upload(cache=cache)
+        f = open(self.src, 'wb')
+        f.write(self.data[::-1])
+        f.close()
+        # Make sure the size and mtime check alone can not hide the change
+        os.utime(self.src, (0, 0))
+        self.assertTrue(self.upload(cache=cache)['changed'])
+        self.assertEqual(self.server.heads, [])
+        self.assertEqual(self.server.files[self.path], self.data[::-1])
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+
+import bz2
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import files.archive as archive
+
+
+def bz2_decompress_all(data):
+    # bz2.decompress only reads the first stream before python 3.3
+    chunks = []
+    while data:
+        decompressor = bz2.BZ2Decompressor()
+        chunks.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return archive.EMPTY.join(chunks)
+
+
+class AnsibleArchiveBlockCompressor(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        # Not a multiple of the block size, so the last block is short
+        self.data = archive.EMPTY.join([('line %d\n' % i).encode('ascii') for i in range(5000)])
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def compress(self, format, workers=3, block_size=4096):
+        f = open(self.path, 'wb')
+        try:
+            compressor = archive.BlockCompressor(f, format, workers, block_size=block_size)
+            # Feed odd sized writes so blocks straddle them
+            offset = 0
+            while offset < len(self.data):
+                compressor.write(self.data[offset:offset + 1000])
+                offset += 1000
+            compressor.close()
+        finally:
+            f.close()
+
+    def test_gz_round_trip(self):
+        self.compress('gz')
+        f = gzip.open(self.path, 'rb')
+        try:
+            self.assertEqual(f.read(), self.data)
+        finally:
+            f.close()
+
+    def test_bz2_round_trip(self):
+        self.compress('bz2')
+        f = open(self.path, 'rb')
+        try:
+            self.assertEqual(bz2_decompress_all(f.read()), self.data)
+        finally:
+            f.close()
+
+    def test_empty_input(self):
+        f = open(self.path, 'wb')
+        try:
+            archive.BlockCompressor(f, 'gz', 2).close()
+        finally:
+            f.close()
+        f = gzip.open(self.path, 'rb')
+        try:
+            self.assertEqual(f.read(), archive.EMPTY)
+        finally:
+            f.close()
+
+
+class AnsibleArchiveManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp() + os.sep
+        self.data = 'x'.encode('ascii') * 10
+        self.names = ['plain.txt']
+        if archive.text_type is not str:
+            # Paths are byte strs on python 2, where non-ASCII names matter
+            self.names.append('caf\xc3\xa9.txt')
+        for name in self.names:
+            f = open(self.root + name, 'wb')
+            try:
+                f.write(self.data)
+            finally:
+                f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_checksum(self):
+        entries = archive.build_manifest([self.root + 'plain.txt'], self.root, [], checksum=True)
+        self.assertEqual(entries[archive.manifest_name('plain.txt')][-1], hashlib.sha1(self.data).hexdigest())
+
+    def test_names_survive_json(self):
+        entries = archive.build_manifest([self.root], self.root, [])
+        self.assertEqual(len(entries), len(self.names))
+        self.assertEqual(json.loads(json.dumps(entries)), entries)
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import monitoring.nagios as nagios
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    def exit_json(self, **kwargs):
+        raise ModuleExit(kwargs)
+
+    def fail_json(self, **kwargs):
+        raise ModuleExit(kwargs)
+
+
+class FifoReader(threading.Thread):
+    """Stand-in for the Nagios core: reads the command FIFO until the
+    writer closes it, keeping every read as it arrived"""
+
+    def __init__(self, path):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.path = path
+        self.reads = []
+
+    def run(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            while True:
+                data = os.read(fd, 65536)
+                if not data:
+                    break
+                self.reads.append(data.decode('ascii'))
+        finally:
+            os.close(fd)
+
+
+class AnsibleNagiosCommandWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cmdfile = os.path.join(self.tmpdir, 'nagios.cmd')
+        os.mkfifo(self.cmdfile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make(self, hosts, services):
+        return nagios.Nagios(FakeModule(), action='downtime', author='Ansible',
+                             comment='Scheduling downtime', host=','.join(hosts),
+                             servicegroup=None, minutes=30, cmdfile=self.cmdfile,
+                             command=None, services=','.join(services))
+
+    def test_batched_commands_arrive_intact(self):
+        hosts = ['host%d.example.com' % i for i in range(200)]
+        services = ['service%d' % i for i in range(10)]
+        ansible_nagios = self.make(hosts, services)
+
+        # The reader only sees one EOF, so every command arriving proves
+        # they all went through a single open of the pipe
+        reader = FifoReader(self.cmdfile)
+        reader.start()
+        start = time.time()
+        self.assertRaises(ModuleExit, ansible_nagios.act)
+        reader.join(30)
+        elapsed = time.time() - start
+        self.assertFalse(reader.is_alive())
+
+        lines = ''.join(reader.reads).splitlines()
+        self.assertEqual(len(lines), len(hosts) * len(services))
+        self.assertEqual(lines, ansible_nagios.command_results)
+        expected = []
+        for host in hosts:
+            for service in services:
+                expected.append('SCHEDULE_SVC_DOWNTIME;%s;%s;' % (host, service))
+        for line, prefix in zip(lines, expected):
+            self.assertTrue(line.split(' ', 1)[1].startswith(prefix))
+        # Not an assertion, a rough figure for comparing writer changes
+        print('%d commands through the FIFO in %.3fs' % (len(lines), elapsed))
+
+    def test_chunks_split_at_pipe_buf(self):
+        ansible_nagios = self.make(['host%d' % i for i in range(50)],
+                                   ['service%d' % i for i in range(20)])
+        for host in ansible_nagios.hosts:
+            ansible_nagios.host = host
+            ansible_nagios._act()
+        chunks = ansible_nagios._chunk_commands()
+
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(''.join(chunks), ''.join(ansible_nagios.command_buffer))
+        for i, chunk in enumerate(chunks):
+            self.assertTrue(len(chunk) <= nagios.PIPE_BUF)
+            # Commands are never split across writes
+            self.assertTrue(chunk.endswith('\n'))
+            if i + 1 < len(chunks):
+                # A chunk is only cut when the next command would not fit
+                first = chunks[i + 1].split('\n', 1)[0] + '\n'
+                self.assertTrue(len(chunk) + len(first) > nagios.PIPE_BUF)
+
+    def test_long_command_gets_its_own_chunk(self):
+        ansible_nagios = self.make(['host'], ['service'])
+        long_cmd = '[0] %s\n' % ('X' * (nagios.PIPE_BUF + 10))
+        ansible_nagios.command_buffer = ['[0] A\n', long_cmd, '[0] B\n']
+        self.assertEqual(ansible_nagios._chunk_commands(), ['[0] A\n', long_cmd, '[0] B\n'])